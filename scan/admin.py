@@ -1,10 +1,18 @@
 from django.contrib import admin
 
 
-from .models import Department, Course, Topic, AIRefine
+from .models import (
+    Department, Course, Topic, AIRefine, RefineBatch, RefineBatchJob, QACard, ProviderCallLog, ScanBatch, ScanPage
+)
 
 # # Simple registration without customization
 admin.site.register(Department)
 admin.site.register(Course)
 admin.site.register(Topic)
-admin.site.register(AIRefine)
\ No newline at end of file
+admin.site.register(AIRefine)
+admin.site.register(RefineBatch)
+admin.site.register(RefineBatchJob)
+admin.site.register(QACard)
+admin.site.register(ProviderCallLog)
+admin.site.register(ScanBatch)
+admin.site.register(ScanPage)
@@ -8,13 +8,27 @@ All AI view functions are imported from the ai_views_functions package.
 from .ai_views_functions import (
     ai_refine_page,
     generate_ai_refine,
+    ai_refine_job_status,
+    stream_ai_refine,
+    bulk_refine_course,
+    bulk_refine_department,
+    refine_batch_status,
     select_ai_refine,
     ai_status,
+    ai_metrics,
+    ai_metrics_dashboard,
 )
 
 __all__ = [
     'ai_refine_page',
     'generate_ai_refine',
+    'ai_refine_job_status',
+    'stream_ai_refine',
+    'bulk_refine_course',
+    'bulk_refine_department',
+    'refine_batch_status',
     'select_ai_refine',
     'ai_status',
+    'ai_metrics',
+    'ai_metrics_dashboard',
 ]
\ No newline at end of file
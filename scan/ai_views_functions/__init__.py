@@ -4,12 +4,22 @@ Refactored AI views package for the scan app.
 Each module handles a specific AI functionality.
 """
 
-from .ai_refine_views import ai_refine_page, generate_ai_refine, select_ai_refine
+from .ai_refine_views import ai_refine_page, generate_ai_refine, select_ai_refine, ai_refine_job_status
+from .ai_stream_views import stream_ai_refine
+from .ai_bulk_views import bulk_refine_course, bulk_refine_department, refine_batch_status
 from .ai_status_views import ai_status
+from .ai_metrics_views import ai_metrics, ai_metrics_dashboard
 
 __all__ = [
     'ai_refine_page',
     'generate_ai_refine',
+    'ai_refine_job_status',
+    'stream_ai_refine',
+    'bulk_refine_course',
+    'bulk_refine_department',
+    'refine_batch_status',
     'select_ai_refine',
     'ai_status',
+    'ai_metrics',
+    'ai_metrics_dashboard',
 ]
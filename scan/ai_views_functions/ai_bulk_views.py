@@ -0,0 +1,59 @@
+# ==================== ai_views_functions/ai_bulk_views.py ====================
+"""
+Bulk AI refine views - Refine a whole course or department (ADMIN ONLY)
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from ..models import Course, Department, RefineBatch
+from ..utils.bulk_refine import create_refine_batch, batch_progress
+
+
+def _start_batch(request, course=None, department=None):
+    """Validate POST options, queue the batch and return its first progress snapshot."""
+    provider = request.POST.get('provider', 'both')
+    difficulty = request.POST.get('difficulty') or None
+
+    if provider not in ['gemini', 'groq', 'both']:
+        return JsonResponse({'error': 'Invalid provider'}, status=400)
+    if difficulty not in [None, 'easy', 'medium', 'difficult']:
+        return JsonResponse({'error': 'Invalid difficulty'}, status=400)
+
+    batch, _ = create_refine_batch(
+        provider=provider,
+        difficulty_level=difficulty,
+        course=course,
+        department=department,
+        include_stale=request.POST.get('stale', '1') in ['1', 'true'],
+        force=request.POST.get('force') in ['1', 'true'],
+    )
+    return JsonResponse(batch_progress(batch), status=202)
+
+
+@login_required(login_url='core:admin_login')
+@require_http_methods(["POST"])
+def bulk_refine_course(request, course_id):
+    """
+    ADMIN ONLY - Queue refines for every unrefined or stale topic of a course.
+    Jobs are processed by run_refine_worker; poll refine_batch_status.
+    """
+    course = get_object_or_404(Course, id=course_id, is_deleted=False)
+    return _start_batch(request, course=course)
+
+
+@login_required(login_url='core:admin_login')
+@require_http_methods(["POST"])
+def bulk_refine_department(request, department_id):
+    """ADMIN ONLY - Same as bulk_refine_course for all courses of a department."""
+    department = get_object_or_404(Department, id=department_id)
+    return _start_batch(request, department=department)
+
+
+@login_required(login_url='core:admin_login')
+@require_http_methods(["GET"])
+def refine_batch_status(request, batch_id):
+    """ADMIN ONLY - Progress of a bulk refine: counts, throughput, ETA, failures."""
+    batch = get_object_or_404(RefineBatch.objects.select_related('course', 'department'), id=batch_id)
+    return JsonResponse(batch_progress(batch))
@@ -0,0 +1,41 @@
+# ==================== ai_views_functions/ai_metrics_views.py ====================
+"""
+AI Metrics views - Provider latency percentiles from call telemetry (ADMIN ONLY)
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+from ..utils.telemetry import provider_latency_stats, PERCENTILES
+
+
+def _metrics(request):
+    """Stats for ?days= (1-90, default 7) and optional ?provider=."""
+    try:
+        days = min(max(int(request.GET.get('days', 7)), 1), 90)
+    except ValueError:
+        days = 7
+    provider = request.GET.get('provider') or None
+
+    return {
+        'days': days,
+        'provider': provider,
+        'percentiles': list(PERCENTILES),
+        'providers': provider_latency_stats(days, provider, group_by=('provider',)),
+        'breakdown': provider_latency_stats(days, provider),
+    }
+
+
+@login_required(login_url='core:admin_login')
+@require_http_methods(["GET"])
+def ai_metrics(request):
+    """ADMIN ONLY - JSON p50/p95/p99 per provider and per provider/model/difficulty."""
+    return JsonResponse(_metrics(request))
+
+
+@login_required(login_url='core:admin_login')
+@require_http_methods(["GET"])
+def ai_metrics_dashboard(request):
+    """ADMIN ONLY - Same numbers as ai_metrics as an HTML table."""
+    return render(request, 'scan/partials/ai_metrics.html', _metrics(request))
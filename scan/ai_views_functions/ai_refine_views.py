@@ -3,12 +3,18 @@
 """
 AI Refine views - Handle AI-powered text refinement
 """
+import time
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
 from ..models import Topic, AIRefine
-from ..utils.ai import refine_with_gemini, refine_with_groq, AIRefineError
+from ..utils.refine_queue import (
+    enqueue_refine, enqueue_multi_difficulty, claim_refine, claim_multi_difficulty,
+    run_refines_concurrently, wait_for_refines, serialize_refine
+)
 
 
 def ai_refine_page(request, topic_id):
@@ -43,108 +49,73 @@ def ai_refine_page(request, topic_id):
 
 @csrf_exempt
 def generate_ai_refine(request, topic_id):
-    """Generate AI refines with user-selected difficulty level"""
+    """
+    Queue AI refines with user-selected difficulty level.
+    
+    Returns job ids immediately (HTTP 202); poll ai_refine_job_status for
+    progress. POST mode=sync runs the providers inline for setups without
+    a worker process. A job that is already queued or running (double
+    click, second admin) is shared rather than started twice; sync callers
+    wait for it. POST all_levels=1 generates easy, medium and difficult
+    from one call per provider; the selected difficulty's job is reported
+    and the other levels' job ids are listed under `levels`.
+    """
     if request.method != 'POST':
         return JsonResponse({'error': 'POST required'}, status=405)
     
     topic = get_object_or_404(Topic, id=topic_id)
     provider = request.POST.get('provider', 'both')
+    mode = request.POST.get('mode', 'queue')
+    force = request.POST.get('force') in ['1', 'true']  # bypass the AI refine cache
+    all_levels = request.POST.get('all_levels') in ['1', 'true']
     
     # GET DIFFICULTY FROM POST REQUEST (sent from JavaScript)
     difficulty = request.POST.get('difficulty', 'medium')
     
+    if provider not in ['gemini', 'groq', 'both']:
+        return JsonResponse({'error': 'Invalid provider'}, status=400)
+    if difficulty not in ['easy', 'medium', 'difficult']:
+        return JsonResponse({'error': 'Invalid difficulty'}, status=400)
+    
     # OPTIONAL: Update topic's stored difficulty level
     # Uncomment these lines if you want to save the user's choice:
     topic.difficulty_level = difficulty
     topic.save(update_fields=['difficulty_level', 'updated_at'])
     
-    results = {}
-    
-    # Generate Gemini refine
-    if provider in ['gemini', 'both']:
-        try:
-            # Get or create with the SELECTED difficulty
-            gemini_refine, _ = AIRefine.objects.get_or_create(
-                topic=topic,
-                provider='gemini',
-                difficulty_level=difficulty,  # Use selected difficulty
-                defaults={'status': 'processing'}
-            )
-            
-            gemini_refine.status = 'processing'
-            gemini_refine.save()
-            
-            refined_text, proc_time, qa_count = refine_with_gemini(
-                topic.raw_text, 
-                topic.title,
-                difficulty_level=difficulty  # Pass selected difficulty to AI
-            )
-            
-            gemini_refine.refined_text = refined_text
-            gemini_refine.processing_time = proc_time
-            gemini_refine.qa_count = qa_count
-            gemini_refine.status = 'completed'
-            gemini_refine.error_message = ''
-            gemini_refine.save()
-            
-            results['gemini'] = {
-                'success': True,
-                'qa_count': qa_count,
-                'processing_time': round(proc_time, 2),
-                'difficulty': difficulty,
-                'preview': refined_text[:300] + '...' if len(refined_text) > 300 else refined_text
-            }
-            
-        except AIRefineError as e:
-            if 'gemini_refine' in locals():
-                gemini_refine.status = 'failed'
-                gemini_refine.error_message = str(e)
-                gemini_refine.save()
-            results['gemini'] = {'success': False, 'error': str(e)}
-    
-    # Generate Groq refine
-    if provider in ['groq', 'both']:
-        try:
-            # Get or create with the SELECTED difficulty
-            groq_refine, _ = AIRefine.objects.get_or_create(
-                topic=topic,
-                provider='groq',
-                difficulty_level=difficulty,  # Use selected difficulty
-                defaults={'status': 'processing'}
-            )
-            
-            groq_refine.status = 'processing'
-            groq_refine.save()
-            
-            refined_text, proc_time, qa_count = refine_with_groq(
-                topic.raw_text,
-                topic.title,
-                difficulty_level=difficulty  # Pass selected difficulty to AI
-            )
-            
-            groq_refine.refined_text = refined_text
-            groq_refine.processing_time = proc_time
-            groq_refine.qa_count = qa_count
-            groq_refine.status = 'completed'
-            groq_refine.error_message = ''
-            groq_refine.save()
-            
-            results['groq'] = {
-                'success': True,
-                'qa_count': qa_count,
-                'processing_time': round(proc_time, 2),
-                'difficulty': difficulty,
-                'preview': refined_text[:300] + '...' if len(refined_text) > 300 else refined_text
-            }
-            
-        except AIRefineError as e:
-            if 'groq_refine' in locals():
-                groq_refine.status = 'failed'
-                groq_refine.error_message = str(e)
-                groq_refine.save()
-            results['groq'] = {'success': False, 'error': str(e)}
-    
-    return JsonResponse(results)
+    providers = ['gemini', 'groq'] if provider == 'both' else [provider]
+    if all_levels:
+        groups = [enqueue_multi_difficulty(topic, name, bypass_cache=force) for name in providers]
+        jobs = [next(job for job in group if job.difficulty_level == difficulty) for group in groups]
+    else:
+        groups = [[enqueue_refine(topic, name, difficulty, bypass_cache=force)] for name in providers]
+        jobs = [group[0] for group in groups]
+    
+    if mode == 'sync':
+        started = time.time()
+        if all_levels:
+            # One claimed row per provider runs its whole group
+            lead_ids = [claim_multi_difficulty(group[0]) for group in groups]
+            claimed = list(AIRefine.objects.filter(id__in=[i for i in lead_ids if i]))
+        else:
+            claimed = [job for job in jobs if claim_refine(job.id)]
+            for job in claimed:
+                job.refresh_from_db()
+        # Providers run side by side; returns at AI_REFINE_SYNC_DEADLINE at the latest
+        run_refines_concurrently(claimed)
+        # Jobs another request is running: wait for its result instead
+        wait_for_refines(jobs, deadline=started + settings.AI_REFINE_SYNC_DEADLINE)
+    
+    results = {job.provider: serialize_refine(job) for job in jobs}
+    if all_levels:
+        for job, group in zip(jobs, groups):
+            results[job.provider]['levels'] = {row.difficulty_level: row.id for row in group}
+    return JsonResponse(results, status=200 if mode == 'sync' else 202)
+
+
+def ai_refine_job_status(request, job_id):
+    """Poll endpoint - reports pending/processing/completed/failed for one job"""
+    job = get_object_or_404(AIRefine, id=job_id)
+    return JsonResponse(serialize_refine(job))
 
 
 @csrf_exempt
@@ -1,21 +1,23 @@
-
 # ==================== ai_views_functions/ai_status_views.py ====================
 """
 AI Status views - Check AI service availability
 """
 from django.http import JsonResponse
 
-from ..utils.ai import test_gemini_connection, test_groq_connection
+from ..utils.health import get_health
 
 
 def ai_status(request):
-    """Check if AI APIs are working"""
-    gemini_ok, gemini_msg = test_gemini_connection()
-    groq_ok, groq_msg = test_groq_connection()
+    """
+    Cached AI provider health (see utils/health.py) - no provider call per hit.
+    Staff can force fresh probes with ?refresh=1.
+    """
+    refresh = request.GET.get('refresh') in ['1', 'true'] and request.user.is_staff
+    gemini = get_health('gemini', refresh=refresh)
+    groq = get_health('groq', refresh=refresh)
     
     return JsonResponse({
-        'gemini': {'ok': gemini_ok, 'message': gemini_msg},
-        'groq': {'ok': groq_ok, 'message': groq_msg},
-        'overall': gemini_ok or groq_ok
+        'gemini': gemini,
+        'groq': groq,
+        'overall': bool(gemini['ok']) or bool(groq['ok'])
     })
-
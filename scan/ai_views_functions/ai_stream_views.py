@@ -0,0 +1,95 @@
+# ==================== ai_views_functions/ai_stream_views.py ====================
+"""
+AI Stream views - Relay AI refine output to the browser as it is generated
+"""
+import json
+import time
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+
+from ..models import Topic, AIRefine
+from ..utils.ai import AIRefineError
+from ..utils.chunking import SectionStream
+from ..utils.prompts import DIFFICULTY_LEVELS
+from ..utils.refine_queue import (
+    REFINERS, start_refine_now, complete_refine, fail_refine, wait_for_refines, serialize_refine
+)
+
+
+def _sse(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _attached_events(refine):
+    """Events for a caller sharing a job another request or worker is running."""
+    yield _sse('start', {
+        'job_id': refine.id, 'provider': refine.provider, 'difficulty': refine.difficulty_level, 'attached': True,
+    })
+    wait_for_refines([refine], deadline=time.time() + settings.AI_REFINE_SYNC_DEADLINE)
+    yield _sse('done', serialize_refine(refine))
+
+
+def stream_ai_refine(request, topic_id):
+    """
+    Server-sent events endpoint for one provider.
+    
+    Events: start (job id) -> chunk (cleaned text) ... -> done (final job state).
+    Long topics are streamed chunk by chunk through the same section plan
+    as queued jobs (see SectionStream), and the finished text and sections
+    are saved to the AIRefine row like a queued job.
+    If the job is already running elsewhere, the stream attaches to it and
+    sends only start and done (no chunks).
+    """
+    topic = get_object_or_404(Topic, id=topic_id)
+    provider = request.GET.get('provider', 'gemini')
+    difficulty = request.GET.get('difficulty', 'medium')
+    force = request.GET.get('force') in ['1', 'true']
+
+    if provider not in ['gemini', 'groq']:
+        return JsonResponse({'error': 'Invalid provider'}, status=400)
+    if difficulty not in DIFFICULTY_LEVELS:
+        return JsonResponse({'error': 'Invalid difficulty'}, status=400)
+
+    refine = start_refine_now(topic, provider, difficulty, bypass_cache=force)
+    if refine is None:
+        running = AIRefine.objects.get(topic=topic, provider=provider, difficulty_level=difficulty)
+        response = StreamingHttpResponse(_attached_events(running), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def events():
+        start_time = time.time()
+        stream = SectionStream(
+            provider,
+            REFINERS[provider],
+            topic.raw_text,
+            topic.title,
+            difficulty_level=difficulty,
+            use_cache=not force,
+            previous_sections=None if force else refine.sections,
+        )
+        yield _sse('start', {'job_id': refine.id, 'provider': provider, 'difficulty': difficulty})
+
+        try:
+            for text in stream:
+                if text:
+                    yield _sse('chunk', {'text': text})
+        except AIRefineError as e:
+            fail_refine(refine, str(e))
+        except GeneratorExit:
+            # Browser went away mid-stream
+            fail_refine(refine, 'Stream cancelled before completion')
+            raise
+        else:
+            complete_refine(refine, stream.refined_text, time.time() - start_time, stream.qa_count, stream.sections)
+
+        yield _sse('done', serialize_refine(refine))
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # disable proxy buffering
+    return response
@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from scan.utils.table import detect_table_candidates
+
+
+SAMPLE_WORDS = (
+    'the cell membrane controls what enters and leaves types of cells include plant animal '
+    'symptoms of malaria are fever caused by parasites treated with drugs function of nucleus '
+    'example water energy stages of growth compared with versus between and'
+).split()
+
+
+def synthetic_ocr_text(size, seed=0):
+    """Deterministic OCR-like text: short lines, some "Term:" lines and numbered items."""
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        line = ' '.join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(3, 14)))
+        roll = rng.random()
+        if roll < 0.1:
+            line = 'Term: ' + line
+        elif roll < 0.15:
+            line = f'{rng.randint(1, 9)}. ' + line
+        elif roll < 0.2:
+            line = ''
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)[:size]
+
+
+class Command(BaseCommand):
+    help = 'Time detect_table_candidates on growing inputs to check it stays linear'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10_000, 25_000, 50_000, 100_000, 200_000],
+            help='Input sizes in characters'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per size (best is reported)')
+        parser.add_argument('--file', help='Benchmark a real OCR dump instead of synthetic text')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                source = f.read()
+            inputs = [(len(source), source)]
+        else:
+            inputs = [(size, synthetic_ocr_text(size)) for size in options['sizes']]
+
+        baseline = None
+        self.stdout.write(f"{'chars':>10} {'best ms':>10} {'ns/char':>10} {'vs first':>9}")
+        for size, text in inputs:
+            timings = []
+            for _ in range(max(1, options['repeat'])):
+                start = time.perf_counter()
+                detect_table_candidates(text)
+                timings.append(time.perf_counter() - start)
+
+            per_char = min(timings) / max(1, len(text)) * 1e9
+            baseline = baseline or per_char
+            self.stdout.write(
+                f'{len(text):>10} {min(timings) * 1000:>10.2f} {per_char:>10.0f} {per_char / baseline:>8.2f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ ns/char should stay flat as the input grows'))
@@ -0,0 +1,78 @@
+import itertools
+import os
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scan.utils.page_hash import hamming_distance, ink_hash
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.heic')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure ink-hash distances on real page photos to pick SCAN_DUPLICATE_MAX_DISTANCE '
+        '(flag) and SCAN_SKIP_DUPLICATE_MAX_DISTANCE (skip). '
+        'Name the photos <page>_<shot>.jpg, with at least two shots of some pages.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', required=True, help='Folder of page photos named <page>_<shot>.<ext>')
+        parser.add_argument('--hash-size', type=int, default=settings.SCAN_DUPLICATE_HASH_SIZE)
+
+    def handle(self, *args, **options):
+        shots = defaultdict(list)
+        for name in sorted(os.listdir(options['dir'])):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in IMAGE_EXTENSIONS or '_' not in stem:
+                continue
+            with open(os.path.join(options['dir'], name), 'rb') as f:
+                page_hash = ink_hash(f.read(), options['hash_size'])
+            if page_hash:
+                shots[stem.rsplit('_', 1)[0]].append(page_hash)
+            else:
+                self.stdout.write(self.style.WARNING(f'⚠️ {name}: no text found, left out'))
+
+        same = [
+            hamming_distance(a, b)
+            for hashes in shots.values() for a, b in itertools.combinations(hashes, 2)
+        ]
+        different = [
+            hamming_distance(a, b)
+            for page_a, page_b in itertools.combinations(shots, 2)
+            for a in shots[page_a] for b in shots[page_b]
+        ]
+        if not same or not different:
+            raise CommandError('Need at least two pages and two shots of one page')
+
+        self.stdout.write(f"{'':16} {'pairs':>6} {'min':>5} {'p5':>5} {'mean':>5} {'p95':>5} {'max':>5}")
+        for label, distances in (('same page', same), ('different pages', different)):
+            self.stdout.write(
+                f'{label:16} {len(distances):>6} {min(distances):>5} {np.percentile(distances, 5):>5.0f} '
+                f'{np.mean(distances):>5.0f} {np.percentile(distances, 95):>5.0f} {max(distances):>5}'
+            )
+
+        current = {
+            settings.SCAN_DUPLICATE_MAX_DISTANCE: ' (current flag)',
+            settings.SCAN_SKIP_DUPLICATE_MAX_DISTANCE: ' (current skip)',
+        }
+        for threshold in sorted({*current, min(different) - 1, int(np.percentile(same, 95))}):
+            missed = sum(d > threshold for d in same)
+            false = sum(d <= threshold for d in different)
+            self.stdout.write(
+                f'max distance {threshold:>3}: {missed}/{len(same)} repeats missed, '
+                f'{false}/{len(different)} different pages matched'
+                + current.get(threshold, '')
+            )
+
+        if min(different) > max(same):
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Shots separate cleanly - any max distance from {max(same)} to {min(different) - 1} works'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ Overlap: keep both max distances below {min(different)}, or set SCAN_SKIP_DUPLICATE_PAGES=False'
+            ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from scan.models import Topic
+from scan.utils.normalize import normalize_ocr_text, normalization_report
+
+
+class Command(BaseCommand):
+    help = 'Report how many prompt tokens the OCR normalizer saves on stored topics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Only topics of this course id')
+        parser.add_argument('--limit', type=int, default=0, help='Check at most N topics (0 = all)')
+        parser.add_argument('--verbose-topics', action='store_true', help='Print one line per topic')
+
+    def handle(self, *args, **options):
+        topics = Topic.objects.filter(is_deleted=False).exclude(raw_text='').order_by('id')
+        if options['course']:
+            topics = topics.filter(course_id=options['course'])
+        if options['limit']:
+            topics = topics[:options['limit']]
+
+        before = after = count = 0
+        for topic in topics.only('id', 'title', 'raw_text').iterator():
+            report = normalization_report(topic.raw_text, normalize_ocr_text(topic.raw_text))
+            before += report['tokens_before']
+            after += report['tokens_after']
+            count += 1
+            if options['verbose_topics']:
+                self.stdout.write(
+                    f"  #{topic.id} {topic.title[:40]:<40} {report['tokens_before']:>7} → "
+                    f"{report['tokens_after']:>7} (-{report['reduction_percent']}%)"
+                )
+
+        if not count:
+            self.stdout.write(self.style.WARNING('No topics with raw text'))
+            return
+
+        saved = before - after
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {count} topics: {before} → {after} estimated input tokens per refine '
+            f'(-{saved}, -{100 * saved / before:.1f}%)'
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scan.utils.health import PROBES, probe_all
+
+
+class Command(BaseCommand):
+    help = 'Probe OCR, Gemini and Groq and cache the results for ai_status / ocr_status'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--service', choices=sorted(PROBES), action='append',
+            help='Probe only this service (repeatable); default all'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep probing every --interval seconds instead of probing once'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.HEALTH_PROBE_INTERVAL,
+            help='Seconds between probe rounds with --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            results = probe_all(options['service'])
+            for service, record in sorted(results.items()):
+                icon = '✅' if record['ok'] else '❌'
+                self.stdout.write(
+                    f"{icon} {service:<7} {record['latency_ms']:>8.1f} ms "
+                    f"(avg {record['avg_latency_ms']:.1f}) {record['message']}"
+                )
+
+            if not options['loop']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                self.stdout.write('👋 Health probes stopped')
+                break
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scan.models import ScanPage
+from scan.utils.ocr_jobs import purge_old_page_images
+
+
+class Command(BaseCommand):
+    help = 'Delete stored scan page photos older than N days (batches that were never saved)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SCAN_IMAGE_RETENTION_DAYS,
+            help='Delete photos of pages uploaded more than this many days ago'
+        )
+
+    def handle(self, *args, **options):
+        days = max(0, options['days'])
+        deleted = purge_old_page_images(days)
+        left = ScanPage.objects.exclude(image='').count()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Deleted {deleted} page photo(s) older than {days} day(s); {left} still stored'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from scan.models import Topic, AIRefine
+from scan.utils.qa_parser import refresh_qa_cards
+
+
+class Command(BaseCommand):
+    help = 'Parse existing refined summaries and AI refines into QACard rows'
+
+    def handle(self, *args, **options):
+        topic_cards = 0
+        for topic in Topic.objects.filter(is_deleted=False).exclude(refined_summary='').iterator():
+            topic_cards += refresh_qa_cards(topic, topic.refined_summary)
+
+        refine_cards = 0
+        refines = AIRefine.objects.filter(status='completed').select_related('topic')
+        for refine in refines.iterator():
+            refine_cards += refresh_qa_cards(refine.topic, refine.refined_text, ai_refine=refine)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {topic_cards} summary cards, {refine_cards} AI refine cards'
+        ))
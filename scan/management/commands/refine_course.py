@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from scan.models import AIRefine, Course, Department
+from scan.utils.bulk_refine import (
+    create_refine_batch, batch_progress, expand_providers, find_refine_targets, topics_in_scope,
+)
+from scan.utils.refine_queue import claim_refine, run_refine
+
+
+class Command(BaseCommand):
+    help = 'Refine every unrefined or stale topic of a course or department'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--course', type=int, help='Course id')
+        scope.add_argument('--department', type=int, help='Department id (all of its courses)')
+        parser.add_argument(
+            '--provider', choices=['gemini', 'groq', 'both'], default='both',
+            help='Provider(s) to refine with'
+        )
+        parser.add_argument(
+            '--difficulty', choices=['easy', 'medium', 'difficult'],
+            help="Difficulty level (default: each topic's own)"
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.AI_REFINE_WORKER_CONCURRENCY,
+            help='Jobs in flight per provider'
+        )
+        parser.add_argument('--no-stale', action='store_true', help='Skip topics whose text changed')
+        parser.add_argument('--force', action='store_true', help='Re-refine everything, bypassing the cache')
+        parser.add_argument('--dry-run', action='store_true', help='List what would be refined and exit')
+        parser.add_argument(
+            '--enqueue-only', action='store_true',
+            help='Queue the jobs for run_refine_worker instead of running them here'
+        )
+
+    def handle(self, *args, **options):
+        course = department = None
+        try:
+            if options['course']:
+                course = Course.objects.get(id=options['course'], is_deleted=False)
+            else:
+                department = Department.objects.get(id=options['department'])
+        except (Course.DoesNotExist, Department.DoesNotExist):
+            raise CommandError('Course or department not found')
+
+        if options['dry_run']:
+            self._dry_run(course, department, options)
+            return
+
+        batch, targets = create_refine_batch(
+            provider=options['provider'],
+            difficulty_level=options['difficulty'],
+            course=course,
+            department=department,
+            include_stale=not options['no_stale'],
+            force=options['force'],
+        )
+        self.stdout.write(f'📚 Batch {batch.id}: {len(targets)} refine jobs for {course or department}')
+
+        if not targets:
+            self.stdout.write(self.style.SUCCESS('✅ Nothing to refine'))
+            return
+        if options['enqueue_only']:
+            self.stdout.write(self.style.SUCCESS('✅ Queued - run_refine_worker will process the batch'))
+            return
+
+        # One pool per provider: each has its own rate limit, so a slow
+        # provider never starves the other one
+        concurrency = max(1, options['concurrency'])
+        jobs = list(batch.refines.values_list('id', 'provider'))
+        pools = {provider: ThreadPoolExecutor(max_workers=concurrency) for _, provider in jobs}
+
+        try:
+            futures = [pools[provider].submit(self._process, job_id) for job_id, provider in jobs]
+            for future in as_completed(futures):
+                future.result()
+                self._report(batch)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping - unstarted jobs stay queued for run_refine_worker')
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        progress = batch_progress(batch)
+        for failure in progress['failures']:
+            self.stdout.write(self.style.ERROR(
+                f"✗ {failure['topic']} [{failure['provider']}]: {failure['error']}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Batch {batch.id} done: {progress['counts']['completed']} completed, "
+            f"{progress['counts']['failed']} failed in {progress['elapsed_seconds']:.0f}s"
+        ))
+
+    def _dry_run(self, course, department, options):
+        targets = find_refine_targets(
+            topics_in_scope(course=course, department=department),
+            expand_providers(options['provider']),
+            difficulty_level=options['difficulty'],
+            include_stale=not options['no_stale'],
+            force=options['force'],
+        )
+        for topic, provider, difficulty, reason in targets:
+            self.stdout.write(f'  {topic.title} [{provider}/{difficulty}] - {reason}')
+        self.stdout.write(f'{len(targets)} refine jobs would be queued')
+
+    def _process(self, job_id):
+        close_old_connections()
+        try:
+            # A run_refine_worker may already have picked the job up
+            if claim_refine(job_id):
+                run_refine(AIRefine.objects.select_related('topic').get(pk=job_id))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'✗ Job {job_id} crashed: {e}'))
+        finally:
+            connection.close()
+
+    def _report(self, batch):
+        progress = batch_progress(batch)
+        eta = progress['eta_seconds']
+        self.stdout.write(
+            f"[{progress['finished']}/{progress['total']}] "
+            f"{progress['counts']['failed']} failed · "
+            f"{progress['jobs_per_minute']:.1f} jobs/min · "
+            f"ETA {f'{eta}s' if eta is not None else '?'}"
+        )
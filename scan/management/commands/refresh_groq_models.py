@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scan.utils.ai import AIRefineError, get_best_groq_model, refresh_groq_model_catalog
+
+
+class Command(BaseCommand):
+    help = 'Force a refresh of the cached Groq model catalog'
+
+    def handle(self, *args, **kwargs):
+        try:
+            models = refresh_groq_model_catalog()
+        except AIRefineError as e:
+            raise CommandError(f'Refresh failed, cached catalog kept: {e}')
+
+        for model in models:
+            self.stdout.write(f'✓ {model}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Cached {len(models)} Groq models (selected: {get_best_groq_model()})'
+        ))
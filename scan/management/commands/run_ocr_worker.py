@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from scan.utils.ocr_jobs import claim_next_scan_batches, run_scan_batch
+
+
+class Command(BaseCommand):
+    help = 'OCR queued scan batches (ScanBatch rows with status=pending)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.OCR_JOB_WORKERS,
+            help='Number of batches processed in parallel'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait between queue checks when idle'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue and exit instead of polling forever'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+        once = options['once']
+
+        self.stdout.write(f'🔄 OCR worker started (concurrency={concurrency})')
+
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    in_flight = {f for f in in_flight if not f.done()}
+                    batches = claim_next_scan_batches(concurrency - len(in_flight))
+
+                    for batch in batches:
+                        self.stdout.write(f'→ Scan batch {batch.id}: {batch.page_count} page(s)')
+                        in_flight.add(pool.submit(self._process, batch))
+
+                    if once and not batches and not in_flight:
+                        break
+                    if not batches:
+                        time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping - waiting for running batches to finish...')
+
+        self.stdout.write(self.style.SUCCESS('✅ OCR worker stopped'))
+
+    def _process(self, batch):
+        close_old_connections()
+        try:
+            batch = run_scan_batch(batch)
+            if batch.status == 'completed':
+                read = batch.pages.filter(status='completed').count()
+                self.stdout.write(self.style.SUCCESS(f'✓ Scan batch {batch.id}: {read}/{batch.page_count} page(s) read'))
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ Scan batch {batch.id}: {batch.error_message}'))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'✗ Scan batch {batch.id} crashed: {e}'))
+        finally:
+            connection.close()
@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from scan.utils.refine_queue import claim_next_refines, run_refine
+
+
+class Command(BaseCommand):
+    help = 'Process queued AI refine jobs (AIRefine rows with status=pending)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.AI_REFINE_WORKER_CONCURRENCY,
+            help='Number of jobs processed in parallel'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait between queue checks when idle'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue and exit instead of polling forever'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+        once = options['once']
+
+        self.stdout.write(f'🔄 Refine worker started (concurrency={concurrency})')
+
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    in_flight = {f for f in in_flight if not f.done()}
+                    jobs = claim_next_refines(concurrency - len(in_flight))
+
+                    for job in jobs:
+                        self.stdout.write(f'→ Job {job.id}: {job.topic.title} [{job.provider}/{job.difficulty_level}]')
+                        in_flight.add(pool.submit(self._process, job))
+
+                    if once and not jobs and not in_flight:
+                        break
+                    if not jobs:
+                        time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping - waiting for running jobs to finish...')
+
+        self.stdout.write(self.style.SUCCESS('✅ Refine worker stopped'))
+
+    def _process(self, job):
+        close_old_connections()
+        try:
+            job = run_refine(job)
+            if job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Job {job.id}: {job.qa_count} Q&As in {job.processing_time:.1f}s'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ Job {job.id}: {job.error_message}'))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'✗ Job {job.id} crashed: {e}'))
+        finally:
+            connection.close()
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0002_airefine_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airefine',
+            name='bypass_cache',
+            field=models.BooleanField(default=False, help_text='Skip the AI refine cache for this job (forced regeneration)'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-17 01:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0003_airefine_bypass_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderRateLimit',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('provider', models.CharField(max_length=20)),
+                ('key_fingerprint', models.CharField(help_text='Hash prefix of the API key', max_length=16)),
+                ('request_tokens', models.FloatField(default=0, help_text='Requests left in the per-minute bucket')),
+                ('token_tokens', models.FloatField(default=0, help_text='LLM tokens left in the per-minute bucket')),
+                ('refilled_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('blocked_until', models.DateTimeField(blank=True, help_text='Set from 429 Retry-After', null=True)),
+            ],
+            options={
+                'unique_together': {('provider', 'key_fingerprint')},
+            },
+        ),
+    ]
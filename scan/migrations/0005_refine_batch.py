@@ -0,0 +1,42 @@
+# Generated by Django 5.1 on 2026-10-17 02:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0004_provider_rate_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airefine',
+            name='source_hash',
+            field=models.CharField(blank=True, help_text='Hash of the topic raw_text this refine was generated from', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='RefineBatch',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('provider', models.CharField(default='both', help_text='gemini, groq or both', max_length=20)),
+                ('difficulty_level', models.CharField(blank=True, help_text="Empty = each topic's own difficulty level", max_length=20)),
+                ('total_jobs', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='refine_batches', to='scan.course')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='refine_batches', to='scan.department')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='airefine',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='refines', to='scan.refinebatch'),
+        ),
+    ]
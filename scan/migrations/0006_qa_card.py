@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-17 02:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0005_refine_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QACard',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('ordinal', models.IntegerField(help_text='1-based position within the source text')),
+                ('question', models.TextField()),
+                ('answer', models.TextField(blank=True)),
+                ('explanation', models.TextField(blank=True)),
+                ('example', models.TextField(blank=True)),
+                ('has_table', models.BooleanField(default=False)),
+                ('source_hash', models.CharField(help_text='Hash of the text the card was parsed from', max_length=64)),
+                ('ai_refine', models.ForeignKey(blank=True, help_text="Empty = parsed from the topic's published refined summary", null=True, on_delete=django.db.models.deletion.CASCADE, related_name='qa_cards', to='scan.airefine')),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='qa_cards', to='scan.topic')),
+            ],
+            options={
+                'ordering': ['ordinal'],
+                'indexes': [models.Index(fields=['topic', 'ai_refine', 'ordinal'], name='scan_qacard_topic_i_f1f374_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0007_airefine_sections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airefine',
+            name='multi_difficulty',
+            field=models.BooleanField(default=False, help_text='Generated together with the other difficulty levels in one provider call'),
+        ),
+    ]
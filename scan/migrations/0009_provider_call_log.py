@@ -0,0 +1,41 @@
+# Generated by Django 5.1 on 2026-10-17 02:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0008_airefine_multi_difficulty'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderCallLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('provider', models.CharField(max_length=20)),
+                ('model', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('refine', 'Refine'), ('multi', 'Multi-difficulty refine'), ('stream', 'Streaming refine')], default='refine', max_length=20)),
+                ('difficulty_level', models.CharField(blank=True, help_text="'all' for multi-difficulty calls", max_length=20)),
+                ('success', models.BooleanField(default=False)),
+                ('error_message', models.TextField(blank=True)),
+                ('duration_seconds', models.FloatField(help_text='Wall-clock time including retries and backoff')),
+                ('backoff_seconds', models.FloatField(default=0, help_text='Time spent waiting for rate-limit slots / 429 backoff')),
+                ('attempts', models.IntegerField(default=0, help_text='HTTP requests sent (1 + retries)')),
+                ('status_code', models.IntegerField(blank=True, help_text='HTTP status of the last response', null=True)),
+                ('input_tokens', models.IntegerField(blank=True, null=True)),
+                ('output_tokens', models.IntegerField(blank=True, null=True)),
+                ('request_bytes', models.IntegerField(default=0)),
+                ('response_bytes', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='scan_provid_created_341c6d_idx'), models.Index(fields=['provider', 'model', 'difficulty_level'], name='scan_provid_provide_50d9c8_idx')],
+            },
+        ),
+    ]
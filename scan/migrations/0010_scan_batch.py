@@ -0,0 +1,55 @@
+# Generated by Django 5.1 on 2026-10-17 02:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0009_provider_call_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanBatch',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('page_count', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScanPage',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('page_number', models.IntegerField()),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('text', models.TextField(blank=True, help_text='OCR text with its engine/confidence line, or the error message')),
+                ('engine', models.CharField(blank=True, max_length=50)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('cached', models.BooleanField(default=False, help_text='Served from the OCR result cache')),
+                ('error_message', models.TextField(blank=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='scan.scanbatch')),
+            ],
+            options={
+                'ordering': ['batch', 'page_number'],
+                'constraints': [models.UniqueConstraint(fields=('batch', 'page_number'), name='unique_scan_page_number')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-17 02:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0010_scan_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanbatch',
+            name='topic',
+            field=models.ForeignKey(blank=True, help_text='Topic saved from this batch', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scan_batches', to='scan.topic'),
+        ),
+        migrations.AddField(
+            model_name='scanpage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the preprocessed image bytes', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='scanpage',
+            name='image',
+            field=models.FileField(blank=True, upload_to='scan_pages/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-17 02:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0011_scan_page_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanpage',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text="Earlier page of the same batch this photo repeats (not OCR'd, left out of the topic)", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='scan.scanpage'),
+        ),
+        migrations.AddField(
+            model_name='scanpage',
+            name='duplicate_topic',
+            field=models.ForeignKey(blank=True, help_text='Other topic of the same course that already has this page', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicate_scan_pages', to='scan.topic'),
+        ),
+        migrations.AddField(
+            model_name='scanpage',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, help_text='dHash of the page image - near-identical photos have close hashes (see utils/page_hash.py)', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='scanpage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('duplicate', 'Duplicate')], default='pending', max_length=20),
+        ),
+    ]
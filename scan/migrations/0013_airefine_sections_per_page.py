@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0012_scan_page_duplicates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='airefine',
+            name='sections',
+            field=models.JSONField(blank=True, default=list, help_text='Per-page hashes and output, re-used for unchanged pages on regenerate'),
+        ),
+    ]
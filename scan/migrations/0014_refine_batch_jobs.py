@@ -0,0 +1,62 @@
+# Generated by Django 5.1 on 2026-10-17 02:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_batch_links(apps, schema_editor):
+    """Turn AIRefine.batch into RefineBatchJob rows, settled with the job's current outcome."""
+    AIRefine = apps.get_model('scan', 'AIRefine')
+    RefineBatchJob = apps.get_model('scan', 'RefineBatchJob')
+    RefineBatchJob.objects.bulk_create([
+        RefineBatchJob(
+            batch_id=refine.batch_id,
+            refine_id=refine.id,
+            status=refine.status if refine.status in ('completed', 'failed') else 'pending',
+            error_message=refine.error_message if refine.status == 'failed' else '',
+            finished_at=refine.updated_at if refine.status in ('completed', 'failed') else None,
+        )
+        for refine in AIRefine.objects.exclude(batch=None)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0013_airefine_sections_per_page'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefineBatchJob',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('error_message', models.TextField(blank=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='scan.refinebatch')),
+                ('refine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_jobs', to='scan.airefine')),
+            ],
+            options={
+                'ordering': ['batch', 'id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='refinebatchjob',
+            constraint=models.UniqueConstraint(fields=('batch', 'refine'), name='unique_refine_batch_job'),
+        ),
+        migrations.RunPython(copy_batch_links, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='airefine',
+            name='batch',
+        ),
+        migrations.AddField(
+            model_name='refinebatch',
+            name='refines',
+            field=models.ManyToManyField(related_name='batches', through='scan.RefineBatchJob', to='scan.airefine'),
+        ),
+    ]
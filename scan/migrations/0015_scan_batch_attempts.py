@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0014_refine_batch_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanbatch',
+            name='attempts',
+            field=models.IntegerField(default=0, help_text='Worker runs of the current request'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def clear_dhashes(apps, schema_editor):
+    """Stored dHashes cannot be compared with ink hashes - drop them rather than match garbage."""
+    ScanPage = apps.get_model('scan', 'ScanPage')
+    ScanPage.objects.exclude(perceptual_hash='').update(perceptual_hash='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0015_scan_batch_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scanpage',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Earlier page of the same batch this photo looks like (skipped only with SCAN_SKIP_DUPLICATE_PAGES)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='scan.scanpage'),
+        ),
+        migrations.AlterField(
+            model_name='scanpage',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, help_text='Ink hash of the page image - photos of the same page have close hashes (see utils/page_hash.py)', max_length=64),
+        ),
+        migrations.RunPython(clear_dhashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0016_scanpage_ink_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='airefine',
+            name='sections',
+            field=models.JSONField(blank=True, default=list, help_text='Page hashes and output of each refined chunk, re-used while its pages are unchanged'),
+        ),
+    ]
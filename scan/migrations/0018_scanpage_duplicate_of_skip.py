@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-17 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scan', '0017_airefine_sections_per_chunk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scanpage',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Earlier page of the same batch this photo looks like (skipped if within SCAN_SKIP_DUPLICATE_MAX_DISTANCE)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='scan.scanpage'),
+        ),
+    ]
@@ -10,6 +10,13 @@ from .models_functions import (
     Course,
     Topic,
     AIRefine,
+    ProviderRateLimit,
+    RefineBatch,
+    RefineBatchJob,
+    QACard,
+    ProviderCallLog,
+    ScanBatch,
+    ScanPage,
 )
 
 __all__ = [
@@ -17,4 +24,11 @@ __all__ = [
     'Course',
     'Topic',
     'AIRefine',
+    'ProviderRateLimit',
+    'RefineBatch',
+    'RefineBatchJob',
+    'QACard',
+    'ProviderCallLog',
+    'ScanBatch',
+    'ScanPage',
 ]
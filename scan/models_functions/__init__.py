@@ -8,10 +8,22 @@ from .department_model import Department
 from .course_model import Course
 from .topic_model import Topic
 from .ai_refine_model import AIRefine
+from .rate_limit_model import ProviderRateLimit
+from .refine_batch_model import RefineBatch, RefineBatchJob
+from .qa_card_model import QACard
+from .provider_call_log_model import ProviderCallLog
+from .scan_batch_model import ScanBatch, ScanPage
 
 __all__ = [
     'Department',
     'Course',
     'Topic',
     'AIRefine',
+    'ProviderRateLimit',
+    'RefineBatch',
+    'RefineBatchJob',
+    'QACard',
+    'ProviderCallLog',
+    'ScanBatch',
+    'ScanPage',
 ]
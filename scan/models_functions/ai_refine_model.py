@@ -43,14 +43,42 @@ class AIRefine(BaseModel):
         help_text="Difficulty level used when generating this refinement"
     )
     
+    # Job queue bookkeeping - rows double as queue entries (see utils/refine_queue.py)
+    started_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    bypass_cache = models.BooleanField(
+        default=False,
+        help_text="Skip the AI refine cache for this job (forced regeneration)"
+    )
+    multi_difficulty = models.BooleanField(
+        default=False,
+        help_text="Generated together with the other difficulty levels in one provider call"
+    )
+    
+    source_hash = models.CharField(
+        max_length=64, blank=True,
+        help_text="Hash of the topic raw_text this refine was generated from"
+    )
+    sections = models.JSONField(
+        default=list, blank=True,
+        help_text="Page hashes and output of each refined chunk, re-used while its pages are unchanged"
+    )
+    
     class Meta:
         ordering = ['-created_at']
         # Updated unique_together to include difficulty
         unique_together = ['topic', 'provider', 'difficulty_level']
+        indexes = [
+            models.Index(fields=['status']),
+        ]
     
     def __str__(self):
         return f"{self.topic.title} - {self.get_provider_display()} ({self.difficulty_level}) [{self.status}]"
     
     def is_successful(self):
         return self.status == 'completed' and bool(self.refined_text)
+    
+    def is_finished(self):
+        """True once the job has left the queue (completed or failed)"""
+        return self.status in ('completed', 'failed')
 
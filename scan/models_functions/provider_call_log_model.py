@@ -0,0 +1,47 @@
+# ==================== models_functions/provider_call_log_model.py ====================
+"""
+ProviderCallLog model - Telemetry for every AI provider HTTP call
+"""
+from django.db import models
+from core.models import BaseModel
+
+
+class ProviderCallLog(BaseModel):
+    """
+    One row per provider call (retries included), written by
+    utils/telemetry.py. Aggregated into latency percentiles per
+    provider/model/difficulty for the AI metrics dashboard.
+    """
+    
+    KIND_CHOICES = [
+        ('refine', 'Refine'),
+        ('multi', 'Multi-difficulty refine'),
+        ('stream', 'Streaming refine'),
+    ]
+    
+    provider = models.CharField(max_length=20)
+    model = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='refine')
+    difficulty_level = models.CharField(max_length=20, blank=True, help_text="'all' for multi-difficulty calls")
+    success = models.BooleanField(default=False)
+    error_message = models.TextField(blank=True)
+    
+    duration_seconds = models.FloatField(help_text="Wall-clock time including retries and backoff")
+    backoff_seconds = models.FloatField(default=0, help_text="Time spent waiting for rate-limit slots / 429 backoff")
+    attempts = models.IntegerField(default=0, help_text="HTTP requests sent (1 + retries)")
+    status_code = models.IntegerField(null=True, blank=True, help_text="HTTP status of the last response")
+    input_tokens = models.IntegerField(null=True, blank=True)
+    output_tokens = models.IntegerField(null=True, blank=True)
+    request_bytes = models.IntegerField(default=0)
+    response_bytes = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['provider', 'model', 'difficulty_level']),
+        ]
+    
+    def __str__(self):
+        status = 'ok' if self.success else f'failed ({self.status_code})'
+        return f"{self.provider}/{self.model} {self.difficulty_level} {self.duration_seconds:.1f}s {status}"
@@ -0,0 +1,47 @@
+# ==================== models_functions/qa_card_model.py ====================
+"""
+QACard model - One parsed question/answer item from refined text
+"""
+from django.db import models
+from core.models import BaseModel
+from .topic_model import Topic
+from .ai_refine_model import AIRefine
+
+
+class QACard(BaseModel):
+    """
+    Flashcard parsed from Topic.refined_summary (ai_refine empty) or from
+    an AIRefine result. Rebuilt by signals whenever the source text changes
+    (see scan/signals.py), so clients can fetch single cards.
+    """
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='qa_cards')
+    ai_refine = models.ForeignKey(
+        AIRefine, null=True, blank=True, on_delete=models.CASCADE, related_name='qa_cards',
+        help_text="Empty = parsed from the topic's published refined summary"
+    )
+    ordinal = models.IntegerField(help_text="1-based position within the source text")
+    question = models.TextField()
+    answer = models.TextField(blank=True)
+    explanation = models.TextField(blank=True)
+    example = models.TextField(blank=True)
+    has_table = models.BooleanField(default=False)
+    source_hash = models.CharField(max_length=64, help_text="Hash of the text the card was parsed from")
+
+    class Meta:
+        ordering = ['ordinal']
+        indexes = [
+            models.Index(fields=['topic', 'ai_refine', 'ordinal']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic.title} - Q{self.ordinal}"
+
+    def to_dict(self):
+        return {
+            'ordinal': self.ordinal,
+            'question': self.question,
+            'answer': self.answer,
+            'explanation': self.explanation,
+            'example': self.example,
+            'has_table': self.has_table,
+        }
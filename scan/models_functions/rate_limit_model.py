@@ -0,0 +1,27 @@
+# ==================== models_functions/rate_limit_model.py ====================
+"""
+ProviderRateLimit model - Shared token buckets for LLM provider calls
+"""
+from django.db import models
+from django.utils import timezone
+from core.models import BaseModel
+
+
+class ProviderRateLimit(BaseModel):
+    """
+    One row per (provider, API key). Every worker process draws from the
+    same buckets, so backoff and throttling are coordinated across gunicorn
+    workers instead of each one stampeding the provider on its own.
+    """
+    provider = models.CharField(max_length=20)
+    key_fingerprint = models.CharField(max_length=16, help_text="Hash prefix of the API key")
+    request_tokens = models.FloatField(default=0, help_text="Requests left in the per-minute bucket")
+    token_tokens = models.FloatField(default=0, help_text="LLM tokens left in the per-minute bucket")
+    refilled_at = models.DateTimeField(default=timezone.now)
+    blocked_until = models.DateTimeField(null=True, blank=True, help_text="Set from 429 Retry-After")
+    
+    class Meta:
+        unique_together = ['provider', 'key_fingerprint']
+    
+    def __str__(self):
+        return f"{self.provider} [{self.key_fingerprint}] {self.request_tokens:.1f} req / {self.token_tokens:.0f} tok"
@@ -0,0 +1,67 @@
+# ==================== models_functions/refine_batch_model.py ====================
+"""
+RefineBatch / RefineBatchJob models - Groups the AIRefine jobs of one bulk course/department refine
+"""
+from django.db import models
+from core.models import BaseModel
+from .department_model import Department
+from .course_model import Course
+
+
+class RefineBatch(BaseModel):
+    """
+    A bulk refine request. Its jobs are ordinary AIRefine rows, linked
+    through RefineBatchJob, so they go through the normal queue. One
+    AIRefine row per (topic, provider, difficulty) is re-used by every
+    later batch, so progress is counted from the links, not the rows.
+    """
+    course = models.ForeignKey(
+        Course, null=True, blank=True, on_delete=models.SET_NULL, related_name='refine_batches'
+    )
+    department = models.ForeignKey(
+        Department, null=True, blank=True, on_delete=models.SET_NULL, related_name='refine_batches'
+    )
+    provider = models.CharField(max_length=20, default='both', help_text="gemini, groq or both")
+    difficulty_level = models.CharField(
+        max_length=20, blank=True,
+        help_text="Empty = each topic's own difficulty level"
+    )
+    total_jobs = models.IntegerField(default=0)
+    refines = models.ManyToManyField('AIRefine', through='RefineBatchJob', related_name='batches')
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        scope = self.course or self.department or 'all courses'
+        return f"Refine batch #{self.id} - {scope} ({self.total_jobs} jobs)"
+
+
+class RefineBatchJob(BaseModel):
+    """
+    One AIRefine job of a RefineBatch, with the outcome of the run the
+    batch queued. The outcome is copied from the job when it finishes
+    (utils/refine_queue.py), so a later batch re-queuing the same row does
+    not move this batch's progress backwards.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    batch = models.ForeignKey(RefineBatch, on_delete=models.CASCADE, related_name='jobs')
+    refine = models.ForeignKey('AIRefine', on_delete=models.CASCADE, related_name='batch_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error_message = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['batch', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['batch', 'refine'], name='unique_refine_batch_job'),
+        ]
+
+    def __str__(self):
+        return f"Refine batch #{self.batch_id} job #{self.refine_id} ({self.status})"
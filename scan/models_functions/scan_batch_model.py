@@ -0,0 +1,99 @@
+# ==================== models_functions/scan_batch_model.py ====================
+"""
+ScanBatch / ScanPage models - Background OCR jobs for uploaded page photos
+"""
+from django.db import models
+from core.models import BaseModel
+from .topic_model import Topic
+
+
+class ScanBatch(BaseModel):
+    """
+    One upload of page photos, queued for `manage.py run_ocr_worker` (see
+    utils/ocr_jobs.py); each page is saved as soon as its text is back,
+    so the scan page can show pages while the rest are still running.
+    The session only holds the batch id - save_topic builds the topic's
+    raw_text from the pages.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    page_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0, help_text="Worker runs of the current request")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    topic = models.ForeignKey(
+        Topic, null=True, blank=True, on_delete=models.SET_NULL, related_name='scan_batches',
+        help_text="Topic saved from this batch"
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Scan batch #{self.id} ({self.page_count} pages, {self.status})"
+
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+
+class ScanPage(BaseModel):
+    """
+    One page of a ScanBatch: the uploaded photo, replaced by the worker
+    with the preprocessed image sent to OCR (content_hash is set from
+    then on), its content hash (the OCR cache key) and the OCR result. The
+    stored image lets a single page be re-OCR'd without re-uploading the
+    batch; it is deleted once the batch is saved or fails (and by
+    `manage.py purge_scan_images` for abandoned batches).
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('duplicate', 'Duplicate'),
+    ]
+
+    batch = models.ForeignKey(ScanBatch, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.IntegerField()
+    filename = models.CharField(max_length=255, blank=True)
+    image = models.FileField(upload_to='scan_pages/%Y/%m/', blank=True)
+    content_hash = models.CharField(
+        max_length=64, blank=True, db_index=True,
+        help_text="SHA-256 of the preprocessed image bytes"
+    )
+    perceptual_hash = models.CharField(
+        max_length=64, blank=True,
+        help_text="Ink hash of the page image - photos of the same page have close hashes (see utils/page_hash.py)"
+    )
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates',
+        help_text="Earlier page of the same batch this photo looks like (skipped if within SCAN_SKIP_DUPLICATE_MAX_DISTANCE)"
+    )
+    duplicate_topic = models.ForeignKey(
+        Topic, null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicate_scan_pages',
+        help_text="Other topic of the same course that already has this page"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    text = models.TextField(blank=True, help_text="OCR text with its engine/confidence line, or the error message")
+    engine = models.CharField(max_length=50, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    cached = models.BooleanField(default=False, help_text="Served from the OCR result cache")
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['batch', 'page_number']
+        constraints = [
+            models.UniqueConstraint(fields=['batch', 'page_number'], name='unique_scan_page_number'),
+        ]
+
+    def __str__(self):
+        return f"Scan batch #{self.batch_id} page {self.page_number} ({self.status})"
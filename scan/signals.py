@@ -0,0 +1,27 @@
+# ==================== scan/signals.py ====================
+"""
+Signal handlers for the scan app.
+Keep the QACard index in step with the texts it is parsed from.
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Topic, AIRefine
+from .utils.qa_parser import refresh_qa_cards
+
+
+@receiver(post_save, sender=Topic)
+def refresh_topic_cards(sender, instance, update_fields=None, **kwargs):
+    """Re-parse the published summary (skipped when the text is unchanged)."""
+    if update_fields and 'refined_summary' not in update_fields:
+        return
+    refresh_qa_cards(instance, instance.refined_summary)
+
+
+@receiver(post_save, sender=AIRefine)
+def refresh_ai_refine_cards(sender, instance, update_fields=None, **kwargs):
+    """Re-parse a provider's result once it has completed."""
+    if update_fields and 'refined_text' not in update_fields:
+        return  # queue bookkeeping saves never touch the text
+    if instance.status == 'completed':
+        refresh_qa_cards(instance.topic, instance.refined_text, ai_refine=instance)
@@ -9,7 +9,14 @@ from .. import ai_views
 ai_urlpatterns = [
     path('topics/<int:topic_id>/ai-refine/', ai_views.ai_refine_page, name='ai_refine_page'),
     path('topics/<int:topic_id>/generate-ai/', ai_views.generate_ai_refine, name='generate_ai_refine'),
+    path('topics/<int:topic_id>/stream-ai/', ai_views.stream_ai_refine, name='stream_ai_refine'),
+    path('ai-jobs/<int:job_id>/', ai_views.ai_refine_job_status, name='ai_refine_job_status'),
+    path('course/<int:course_id>/bulk-refine/', ai_views.bulk_refine_course, name='bulk_refine_course'),
+    path('department/<int:department_id>/bulk-refine/', ai_views.bulk_refine_department, name='bulk_refine_department'),
+    path('refine-batches/<int:batch_id>/', ai_views.refine_batch_status, name='refine_batch_status'),
     path('topics/<int:topic_id>/select-ai/', ai_views.select_ai_refine, name='select_ai_refine'),
     path('ai-status/', ai_views.ai_status, name='ai_status'),
+    path('ai-metrics/', ai_views.ai_metrics_dashboard, name='ai_metrics_dashboard'),
+    path('ai-metrics/data/', ai_views.ai_metrics, name='ai_metrics'),
 ]
 
@@ -25,6 +25,8 @@ urlpatterns = [
     path('departments/<int:dept_id>/courses/', views.api_department_courses, name='api_department_courses'),
     path('courses/<int:course_id>/topics/', views.api_course_topics, name='api_course_topics'),
     path('topics/<int:topic_id>/', views.api_topic_detail, name='api_topic_detail'),
+    path('topics/<int:topic_id>/cards/', views.api_topic_cards, name='api_topic_cards'),
+    path('topics/<int:topic_id>/cards/<int:ordinal>/', views.api_topic_card, name='api_topic_card'),
 
     path('admin/bulk-download/', api_admin_bulk_download, name='api_admin_bulk_download'),
     path('admin/upload-users/', api_admin_upload_users, name='api_admin_upload_users'),
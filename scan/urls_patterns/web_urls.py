@@ -10,6 +10,9 @@ web_urlpatterns = [
     path('', views.home, name='home'),
     path('scan/', views.scan_new, name='scan_new'),
     path('upload/', views.upload_and_extract, name='upload_and_extract'),
+    path('scan-batches/<int:batch_id>/', views.scan_batch_status, name='scan_batch_status'),
+    path('scan-batches/<int:batch_id>/save-form/', views.scan_batch_save_form, name='scan_batch_save_form'),
+    path('scan-batches/<int:batch_id>/pages/<int:page_number>/rescan/', views.rescan_scan_page, name='rescan_scan_page'),
     path('save/', views.save_topic, name='save_topic'),
     path('library/', views.library, name='library'),
     path('text-input/', views.text_input_page, name='text_input'),
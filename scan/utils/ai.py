@@ -2,11 +2,23 @@
 # FILE: scan/utils/ai.py - CLEAN VERSION WITH PROMPTS MODULE
 # ============================================================================
 
+import json
 import os
+import threading
 import time
 import requests
 from django.conf import settings
-from .prompts import get_easy_prompt, get_medium_prompt, get_difficult_prompt
+from django.core.cache import caches
+from .http import get_session, get_timeout
+from .prompts import build_prompt, get_multi_difficulty_prompt, DIFFICULTY_LEVELS
+from .ai_cache import make_refine_cache_key, get_cached_refine, set_cached_refine
+from .qa_parser import count_cards
+from .telemetry import record_provider_call
+from . import rate_limit
+
+
+GEMINI_MODEL = "gemini-2.5-flash"
+MIN_QUESTIONS = 2  # fewer means the provider failed or truncated its answer
 
 
 class AIRefineError(Exception):
@@ -38,10 +50,19 @@ def get_groq_api_key():
 # GROQ MODEL DETECTION
 # ==================================================
 
-def get_available_groq_models():
+GROQ_CATALOG_CACHE_KEY = 'groq:model_catalog'
+GROQ_CATALOG_RECHECK = 60     # seconds between in-process checks of the shared cache
+GROQ_CATALOG_RETRY = 60       # seconds to wait after a failed refresh before trying again
+
+_groq_catalog = {'models': None, 'fetched_at': 0.0, 'checked_at': 0.0, 'failed_at': 0.0}
+_groq_catalog_lock = threading.Lock()
+_groq_catalog_refreshing = threading.Event()
+
+
+def fetch_groq_models():
     """
-    Fetches available Groq models dynamically.
-    Returns list of model IDs or empty list on error.
+    Fetches available Groq models from the API.
+    Raises AIRefineError on any failure.
     """
     try:
         api_key = get_groq_api_key()
@@ -52,15 +73,97 @@ def get_available_groq_models():
             "Content-Type": "application/json"
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_session('groq').get(url, headers=headers, timeout=get_timeout(10))
         response.raise_for_status()
         
         data = response.json()
-        models = [model['id'] for model in data.get('data', [])]
-        return models
+        return [model['id'] for model in data.get('data', [])]
+    except AIRefineError:
+        raise
     except Exception as e:
-        print(f"Error fetching Groq models: {e}")
-        return []
+        raise AIRefineError(f"Error fetching Groq models: {e}")
+
+
+def refresh_groq_model_catalog():
+    """
+    Fetch the model list now and publish it to this process and the shared
+    'providers' cache (so other workers pick it up on their next recheck).
+    On failure the previous catalog stays in place (stale-on-error).
+    """
+    try:
+        models = fetch_groq_models()
+    except AIRefineError:
+        with _groq_catalog_lock:
+            _groq_catalog['failed_at'] = time.time()
+        raise
+
+    now = time.time()
+    with _groq_catalog_lock:
+        _groq_catalog.update({'models': models, 'fetched_at': now, 'checked_at': now})
+
+    try:
+        caches['providers'].set(GROQ_CATALOG_CACHE_KEY, {'models': models, 'fetched_at': now}, timeout=None)
+    except Exception as e:
+        print(f"Could not store Groq model catalog: {e}")
+
+    return models
+
+
+def _refresh_groq_catalog_in_background():
+    """Refresh the catalog on a daemon thread; at most one refresh at a time."""
+    if _groq_catalog_refreshing.is_set():
+        return
+    _groq_catalog_refreshing.set()
+
+    def run():
+        try:
+            refresh_groq_model_catalog()
+        except AIRefineError as e:
+            print(f"Groq model catalog refresh failed, keeping cached list: {e}")
+        finally:
+            _groq_catalog_refreshing.clear()
+
+    threading.Thread(target=run, name='groq-model-catalog', daemon=True).start()
+
+
+def get_available_groq_models():
+    """
+    Returns available Groq model IDs from the catalog cache.
+    Only the very first call in a cold deployment touches the network;
+    afterwards stale entries are served while a background refresh runs.
+    Returns empty list if no catalog could ever be fetched.
+    """
+    now = time.time()
+    catalog = _groq_catalog
+
+    if catalog['models'] is not None and now - catalog['checked_at'] < GROQ_CATALOG_RECHECK:
+        return catalog['models']
+
+    # Pick up refreshes done by other processes / the management command
+    try:
+        shared = caches['providers'].get(GROQ_CATALOG_CACHE_KEY)
+    except Exception:
+        shared = None
+
+    with _groq_catalog_lock:
+        if shared and shared['fetched_at'] > catalog['fetched_at']:
+            catalog.update({'models': shared['models'], 'fetched_at': shared['fetched_at']})
+        catalog['checked_at'] = now
+
+    if catalog['models'] is None:
+        if now - catalog['failed_at'] < GROQ_CATALOG_RETRY:
+            return []
+        try:
+            return refresh_groq_model_catalog()
+        except AIRefineError as e:
+            print(e)
+            return []
+
+    stale = now - catalog['fetched_at'] > settings.GROQ_MODEL_CATALOG_TTL
+    if stale and now - catalog['failed_at'] > GROQ_CATALOG_RETRY:
+        _refresh_groq_catalog_in_background()
+
+    return catalog['models']
 
 
 def get_best_groq_model():
@@ -94,6 +197,11 @@ def get_best_groq_model():
 # TEXT FORMATTING CLEANER
 # ==================================================
 
+def count_questions(refined_text):
+    """Number of Q&A items in refined text (Qn: lines)."""
+    return count_cards(refined_text)
+
+
 def clean_markdown_formatting(text):
     """
     Removes markdown symbols and ensures proper spacing.
@@ -123,6 +231,122 @@ def clean_markdown_formatting(text):
     return text
 
 
+class MarkdownStreamCleaner:
+    """
+    Incremental clean_markdown_formatting() for streamed output.
+    
+    Every cleaning rule is line-local except the blank line inserted before
+    Explanation:/Example:/---, so text is released one complete line at a
+    time and the extra blank line is emitted when the following line starts.
+    """
+    
+    SECTION_STARTS = ('Explanation:', 'Example:', '---')
+    
+    def __init__(self):
+        self._pending = ''
+        self._previous_line = None  # None = nothing emitted yet
+    
+    def _clean_line(self, line):
+        cleaned = clean_markdown_formatting(line)
+        prefix = ''
+        if self._previous_line and cleaned.startswith(self.SECTION_STARTS):
+            prefix = '\n'
+        self._previous_line = cleaned
+        return prefix + cleaned
+    
+    def feed(self, chunk):
+        """Add raw model output; returns cleaned text ready to show."""
+        self._pending += chunk
+        *lines, self._pending = self._pending.split('\n')
+        return ''.join(self._clean_line(line) + '\n' for line in lines)
+    
+    def flush(self):
+        """Clean whatever is left once the stream ends."""
+        if not self._pending:
+            return ''
+        tail, self._pending = self._pending, ''
+        return self._clean_line(tail)
+
+
+# ==================================================
+# PROVIDER REQUESTS
+# ==================================================
+
+def token_usage(service, data):
+    """
+    (input_tokens, output_tokens, total_tokens) reported by a provider
+    response or stream event; missing counts are None.
+    """
+    if service == 'gemini':
+        usage = data.get("usageMetadata") or {}
+        return usage.get("promptTokenCount"), usage.get("candidatesTokenCount"), usage.get("totalTokenCount")
+    usage = data.get("usage") or (data.get("x_groq") or {}).get("usage") or {}
+    return usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("total_tokens")
+
+
+def _send(service, api_key, url, payload, prompt, read_timeout, call,
+          headers=None, max_retries=5, base_delay=3, deadline=None, stream=False):
+    """
+    Rate-limited POST that retries 429s with backoff. Attempts, backoff
+    time, status and sizes go to `call` (see utils/telemetry.py).
+    `deadline` (epoch seconds) caps both the rate-limit wait and the read timeout.
+    
+    Returns:
+        requests.Response: the first non-429 response (raise_for_status done)
+    """
+    attempt = 0
+    estimated_tokens = rate_limit.estimate_tokens(prompt)
+    request_bytes = len(json.dumps(payload))
+
+    while True:
+        # Shared across workers - waits for a slot instead of stampeding
+        with call.waiting():
+            rate_limit.acquire(service, api_key, estimated_tokens, deadline)
+        timeout = read_timeout
+        if deadline is not None:
+            # The deadline bounds the whole call, not just the wait for a slot
+            timeout = max(1, min(read_timeout, deadline - time.time()))
+        call.sent(request_bytes)
+        response = get_session(service).post(
+            url, headers=headers, json=payload, stream=stream, timeout=get_timeout(timeout)
+        )
+        call.received(response, response_bytes=0 if stream else None)
+
+        if response.status_code == 429:
+            response.close()
+            if attempt >= max_retries:
+                raise AIRefineError(f"{service.title()} rate-limited too many times")
+            
+            delay = rate_limit.retry_after_seconds(response) or base_delay * (2 ** attempt)
+            print(f"Rate limited. Blocking {service.title()} for {delay:.0f}s... (attempt {attempt + 1}/{max_retries})")
+            rate_limit.block(service, api_key, delay)
+            attempt += 1
+            continue
+
+        response.raise_for_status()
+        return response
+
+
+def _post_json_with_retries(service, api_key, url, payload, prompt, read_timeout, call,
+                            headers=None, max_retries=5, base_delay=3, deadline=None):
+    """
+    _send() for non-streaming calls: decodes the body, records token usage
+    and settles the rate-limit estimate with the real count.
+    
+    Returns:
+        dict: decoded response body
+    """
+    response = _send(
+        service, api_key, url, payload, prompt, read_timeout, call,
+        headers=headers, max_retries=max_retries, base_delay=base_delay, deadline=deadline,
+    )
+    data = response.json()
+    input_tokens, output_tokens, total_tokens = token_usage(service, data)
+    call.usage(input_tokens, output_tokens)
+    rate_limit.settle(service, api_key, rate_limit.estimate_tokens(prompt), total_tokens)
+    return data
+
+
 # ==================================================
 # GEMINI REFINER
 # ==================================================
@@ -133,6 +357,10 @@ def refine_with_gemini(
     difficulty_level: str = "medium",
     max_retries: int = 8,
     base_delay: int = 5,
+    use_cache: bool = True,
+    deadline: float = None,
+    min_questions: int = MIN_QUESTIONS,
+    questions: str = None,
 ):
     """
     Uses Gemini to generate Q&A based on difficulty level.
@@ -142,7 +370,11 @@ def refine_with_gemini(
         topic_title: Title of the topic
         difficulty_level: 'easy', 'medium', or 'difficult'
         max_retries: Maximum retry attempts for rate limiting
-        base_delay: Base delay in seconds for exponential backoff
+        base_delay: Backoff in seconds when a 429 has no Retry-After
+        use_cache: False forces a fresh generation (result is still cached)
+        deadline: Epoch seconds after which waiting for a slot or a response fails
+        min_questions: Fewer questions fail the call (chunks of a long topic pass 0)
+        questions: Question range to ask for instead of 15-20 (chunks of a long topic)
     
     Returns:
         tuple: (refined_text, processing_time, qa_count)
@@ -151,22 +383,23 @@ def refine_with_gemini(
         AIRefineError: If generation fails
     """
 
+    cache_key = make_refine_cache_key('gemini', GEMINI_MODEL, difficulty_level, topic_title, raw_text, questions)
+    if use_cache:
+        cached = get_cached_refine(cache_key)
+        if cached and cached[2] >= min_questions:
+            return cached
+
     api_key = get_gemini_api_key()
     start_time = time.time()
 
     url = (
         "https://generativelanguage.googleapis.com/v1beta/"
-        "models/gemini-2.5-flash:generateContent"
+        f"models/{GEMINI_MODEL}:generateContent"
         f"?key={api_key}"
     )
 
     # SELECT PROMPT BASED ON DIFFICULTY
-    if difficulty_level == 'easy':
-        prompt = get_easy_prompt(topic_title, raw_text)
-    elif difficulty_level == 'difficult':
-        prompt = get_difficult_prompt(topic_title, raw_text)
-    else:  # medium (default)
-        prompt = get_medium_prompt(topic_title, raw_text)
+    prompt = build_prompt(difficulty_level, topic_title, raw_text, questions)
 
     payload = {
         "contents": [{"role": "user", "parts": [{"text": prompt}]}],
@@ -178,42 +411,35 @@ def refine_with_gemini(
         }
     }
 
-    attempt = 0
-
-    while True:
-        try:
-            response = requests.post(url, json=payload, timeout=120)
-
-            if response.status_code == 429:
-                if attempt >= max_retries:
-                    raise AIRefineError("Gemini rate-limited too many times")
-                
-                delay = base_delay * (2 ** attempt)
-                print(f"Rate limited. Retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
-                time.sleep(delay)
-                attempt += 1
-                continue
-
-            response.raise_for_status()
-            data = response.json()
+    try:
+        with record_provider_call('gemini', GEMINI_MODEL, difficulty_level) as call:
+            data = _post_json_with_retries(
+                'gemini', api_key, url, payload, prompt, read_timeout=120, call=call,
+                max_retries=max_retries, base_delay=base_delay,
+                deadline=deadline or start_time + settings.AI_RATE_LIMIT_MAX_WAIT,
+            )
 
             refined_text = data["candidates"][0]["content"]["parts"][0]["text"]
             refined_text = clean_markdown_formatting(refined_text)
 
             processing_time = time.time() - start_time
-            qa_count = refined_text.count("Q") - refined_text.count("Q&A")
+            qa_count = count_questions(refined_text)
 
-            if qa_count < 2:
+            if qa_count < min_questions:
                 raise AIRefineError(f"Gemini only generated {qa_count} question(s). Content may be too complex.")
 
-            return refined_text, processing_time, qa_count
+    except rate_limit.RateLimitExceeded as e:
+        raise AIRefineError(f"Gemini rate limit: {e}")
+    except requests.exceptions.RequestException as e:
+        raise AIRefineError(f"Gemini request failed: {e}")
+    except KeyError as e:
+        raise AIRefineError(f"Unexpected Gemini response format: {e}")
+    except Exception as e:
+        raise AIRefineError(f"Gemini refine error: {e}")
 
-        except requests.exceptions.RequestException as e:
-            raise AIRefineError(f"Gemini request failed: {e}")
-        except KeyError as e:
-            raise AIRefineError(f"Unexpected Gemini response format: {e}")
-        except Exception as e:
-            raise AIRefineError(f"Gemini refine error: {e}")
+    result = (refined_text, processing_time, qa_count)
+    set_cached_refine(cache_key, result)
+    return result
 
 
 # ==================================================
@@ -226,6 +452,10 @@ def refine_with_groq(
     difficulty_level: str = "medium",
     max_retries: int = 5,
     base_delay: int = 3,
+    use_cache: bool = True,
+    deadline: float = None,
+    min_questions: int = MIN_QUESTIONS,
+    questions: str = None,
 ):
     """
     Uses Groq Llama to generate Q&A based on difficulty level.
@@ -236,7 +466,11 @@ def refine_with_groq(
         topic_title: Title of the topic
         difficulty_level: 'easy', 'medium', or 'difficult'
         max_retries: Maximum retry attempts for rate limiting
-        base_delay: Base delay in seconds for exponential backoff
+        base_delay: Backoff in seconds when a 429 has no Retry-After
+        use_cache: False forces a fresh generation (result is still cached)
+        deadline: Epoch seconds after which waiting for a slot or a response fails
+        min_questions: Fewer questions fail the call (chunks of a long topic pass 0)
+        questions: Question range to ask for instead of 15-20 (chunks of a long topic)
     
     Returns:
         tuple: (refined_text, processing_time, qa_count)
@@ -257,13 +491,14 @@ def refine_with_groq(
     # Get best available model
     model = get_best_groq_model()
 
+    cache_key = make_refine_cache_key('groq', model, difficulty_level, topic_title, raw_text, questions)
+    if use_cache:
+        cached = get_cached_refine(cache_key)
+        if cached and cached[2] >= min_questions:
+            return cached
+
     # SELECT PROMPT BASED ON DIFFICULTY
-    if difficulty_level == 'easy':
-        prompt = get_easy_prompt(topic_title, raw_text)
-    elif difficulty_level == 'difficult':
-        prompt = get_difficult_prompt(topic_title, raw_text)
-    else:  # medium (default)
-        prompt = get_medium_prompt(topic_title, raw_text)
+    prompt = build_prompt(difficulty_level, topic_title, raw_text, questions)
 
     payload = {
         "model": model,
@@ -273,42 +508,394 @@ def refine_with_groq(
         "top_p": 0.95,
     }
 
-    attempt = 0
-
-    while True:
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=90)
-
-            if response.status_code == 429:
-                if attempt >= max_retries:
-                    raise AIRefineError("Groq rate-limited too many times")
-                
-                delay = base_delay * (2 ** attempt)
-                print(f"Rate limited. Retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
-                time.sleep(delay)
-                attempt += 1
-                continue
-
-            response.raise_for_status()
-            data = response.json()
+    try:
+        with record_provider_call('groq', model, difficulty_level) as call:
+            data = _post_json_with_retries(
+                'groq', api_key, url, payload, prompt, read_timeout=90, call=call, headers=headers,
+                max_retries=max_retries, base_delay=base_delay,
+                deadline=deadline or start_time + settings.AI_RATE_LIMIT_MAX_WAIT,
+            )
 
             refined_text = data["choices"][0]["message"]["content"]
             refined_text = clean_markdown_formatting(refined_text)
 
             processing_time = time.time() - start_time
-            qa_count = refined_text.count("Q") - refined_text.count("Q&A")
+            qa_count = count_questions(refined_text)
 
-            if qa_count < 2:
+            if qa_count < min_questions:
                 raise AIRefineError(f"Groq only generated {qa_count} question(s). Response may be incomplete.")
 
-            return refined_text, processing_time, qa_count
+    except rate_limit.RateLimitExceeded as e:
+        raise AIRefineError(f"Groq rate limit: {e}")
+    except requests.exceptions.RequestException as e:
+        raise AIRefineError(f"Groq request failed: {e}")
+    except KeyError as e:
+        raise AIRefineError(f"Unexpected Groq response format: {e}")
+    except Exception as e:
+        raise AIRefineError(f"Groq refine error: {e}")
+
+    result = (refined_text, processing_time, qa_count)
+    set_cached_refine(cache_key, result)
+    return result
+
+
+# ==================================================
+# MULTI-DIFFICULTY REFINERS
+# ==================================================
+
+def _split_levels(service, text, processing_time, min_questions=MIN_QUESTIONS):
+    """
+    Split a {"easy": ..., "medium": ..., "difficult": ...} answer into
+    per-level (refined_text, processing_time, qa_count) results.
+    """
+    text = text.strip()
+    if text.startswith('```'):
+        # Some models wrap JSON mode output in a code fence anyway
+        text = text.strip('`').removeprefix('json').strip()
+
+    try:
+        levels = json.loads(text)
+    except ValueError as e:
+        raise AIRefineError(f"{service.title()} returned invalid JSON: {e}")
 
+    results = {}
+    for level in DIFFICULTY_LEVELS:
+        refined_text = clean_markdown_formatting(str(levels.get(level) or ''))
+        qa_count = count_questions(refined_text)
+        if qa_count < min_questions:
+            raise AIRefineError(f"{service.title()} only generated {qa_count} {level} question(s).")
+        results[level] = (refined_text, processing_time, qa_count)
+    return results
+
+
+def _cached_levels(cache_keys, min_questions=MIN_QUESTIONS):
+    """All three levels from the refine cache, or None if any is missing."""
+    cached = {level: get_cached_refine(key) for level, key in cache_keys.items()}
+    if all(result and result[2] >= min_questions for result in cached.values()):
+        return cached
+    return None
+
+
+def refine_multi_with_gemini(
+    raw_text: str,
+    topic_title: str = "",
+    max_retries: int = 8,
+    base_delay: int = 5,
+    use_cache: bool = True,
+    deadline: float = None,
+    min_questions: int = MIN_QUESTIONS,
+    questions: str = None,
+):
+    """
+    Uses Gemini to generate easy, medium and difficult Q&A in ONE call.
+    
+    The OCR text is sent once and a JSON response schema forces one string
+    per level, so input tokens and wall-clock time are roughly a third of
+    three refine_with_gemini() calls. Each level is cached under the same key
+    refine_with_gemini() uses, so later single-level runs hit the cache.
+    
+    Returns:
+        dict: difficulty_level -> (refined_text, processing_time, qa_count)
+    
+    Raises:
+        AIRefineError: If generation fails
+    """
+
+    cache_keys = {
+        level: make_refine_cache_key('gemini', GEMINI_MODEL, level, topic_title, raw_text, questions)
+        for level in DIFFICULTY_LEVELS
+    }
+    if use_cache:
+        cached = _cached_levels(cache_keys, min_questions)
+        if cached:
+            return cached
+
+    api_key = get_gemini_api_key()
+    start_time = time.time()
+
+    url = (
+        "https://generativelanguage.googleapis.com/v1beta/"
+        f"models/{GEMINI_MODEL}:generateContent"
+        f"?key={api_key}"
+    )
+
+    prompt = get_multi_difficulty_prompt(topic_title, raw_text, questions)
+
+    payload = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.7,
+            "maxOutputTokens": 24000,  # three single-level budgets
+            "topP": 0.95,
+            "topK": 40,
+            "responseMimeType": "application/json",
+            "responseSchema": {
+                "type": "OBJECT",
+                "properties": {level: {"type": "STRING"} for level in DIFFICULTY_LEVELS},
+                "required": list(DIFFICULTY_LEVELS),
+            },
+        }
+    }
+
+    try:
+        with record_provider_call('gemini', GEMINI_MODEL, 'all', kind='multi') as call:
+            data = _post_json_with_retries(
+                'gemini', api_key, url, payload, prompt, read_timeout=300, call=call,
+                max_retries=max_retries, base_delay=base_delay,
+                deadline=deadline or start_time + settings.AI_RATE_LIMIT_MAX_WAIT,
+            )
+            results = _split_levels(
+                'gemini', data["candidates"][0]["content"]["parts"][0]["text"], time.time() - start_time, min_questions
+            )
+    except AIRefineError:
+        raise
+    except rate_limit.RateLimitExceeded as e:
+        raise AIRefineError(f"Gemini rate limit: {e}")
+    except requests.exceptions.RequestException as e:
+        raise AIRefineError(f"Gemini request failed: {e}")
+    except KeyError as e:
+        raise AIRefineError(f"Unexpected Gemini response format: {e}")
+    except Exception as e:
+        raise AIRefineError(f"Gemini refine error: {e}")
+
+    for level, result in results.items():
+        set_cached_refine(cache_keys[level], result)
+    return results
+
+
+def refine_multi_with_groq(
+    raw_text: str,
+    topic_title: str = "",
+    max_retries: int = 5,
+    base_delay: int = 3,
+    use_cache: bool = True,
+    deadline: float = None,
+    min_questions: int = MIN_QUESTIONS,
+    questions: str = None,
+):
+    """
+    Uses Groq to generate easy, medium and difficult Q&A in ONE call
+    (JSON mode). See refine_multi_with_gemini().
+    
+    Returns:
+        dict: difficulty_level -> (refined_text, processing_time, qa_count)
+    
+    Raises:
+        AIRefineError: If generation fails
+    """
+
+    api_key = get_groq_api_key()
+    start_time = time.time()
+
+    url = "https://api.groq.com/openai/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+    model = get_best_groq_model()
+
+    cache_keys = {
+        level: make_refine_cache_key('groq', model, level, topic_title, raw_text, questions)
+        for level in DIFFICULTY_LEVELS
+    }
+    if use_cache:
+        cached = _cached_levels(cache_keys, min_questions)
+        if cached:
+            return cached
+
+    prompt = get_multi_difficulty_prompt(topic_title, raw_text, questions)
+
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "max_tokens": 16000,
+        "top_p": 0.95,
+        "response_format": {"type": "json_object"},
+    }
+
+    try:
+        with record_provider_call('groq', model, 'all', kind='multi') as call:
+            data = _post_json_with_retries(
+                'groq', api_key, url, payload, prompt, read_timeout=240, call=call, headers=headers,
+                max_retries=max_retries, base_delay=base_delay,
+                deadline=deadline or start_time + settings.AI_RATE_LIMIT_MAX_WAIT,
+            )
+            results = _split_levels(
+                'groq', data["choices"][0]["message"]["content"], time.time() - start_time, min_questions
+            )
+    except AIRefineError:
+        raise
+    except rate_limit.RateLimitExceeded as e:
+        raise AIRefineError(f"Groq rate limit: {e}")
+    except requests.exceptions.RequestException as e:
+        raise AIRefineError(f"Groq request failed: {e}")
+    except KeyError as e:
+        raise AIRefineError(f"Unexpected Groq response format: {e}")
+    except Exception as e:
+        raise AIRefineError(f"Groq refine error: {e}")
+
+    for level, result in results.items():
+        set_cached_refine(cache_keys[level], result)
+    return results
+
+
+# ==================================================
+# STREAMING REFINERS
+# ==================================================
+
+def _iter_sse_data(response):
+    """Yield the payload of each `data:` line of a server-sent event stream."""
+    for line in response.iter_lines(decode_unicode=True):
+        if line and line.startswith('data:'):
+            yield line[5:].strip()
+
+
+def _open_stream(service, api_key, url, payload, prompt, call, headers=None, max_retries=3, base_delay=3):
+    """POST a streaming request, retrying 429s before any output is produced."""
+    try:
+        return _send(
+            service, api_key, url, payload, prompt, read_timeout=120, call=call, headers=headers,
+            max_retries=max_retries, base_delay=base_delay,
+            deadline=time.time() + settings.AI_RATE_LIMIT_MAX_WAIT, stream=True,
+        )
+    except rate_limit.RateLimitExceeded as e:
+        raise AIRefineError(f"{service.title()} rate limit: {e}")
+
+
+def _stream_events(service, response, call):
+    """Decoded SSE events; counts streamed bytes and the latest token usage on `call`."""
+    for data in _iter_sse_data(response):
+        call.response_bytes += len(data)
+        if data == '[DONE]':
+            return
+        event = json.loads(data)
+        input_tokens, output_tokens, _ = token_usage(service, event)
+        if output_tokens is not None:
+            call.usage(input_tokens, output_tokens)
+        yield event
+
+
+def _gemini_stream_chunks(prompt, call):
+    api_key = get_gemini_api_key()
+    url = (
+        "https://generativelanguage.googleapis.com/v1beta/"
+        f"models/{GEMINI_MODEL}:streamGenerateContent"
+        f"?alt=sse&key={api_key}"
+    )
+    payload = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.7,
+            "maxOutputTokens": 8000,
+            "topP": 0.95,
+            "topK": 40
+        }
+    }
+
+    response = _open_stream('gemini', api_key, url, payload, prompt, call)
+    try:
+        for event in _stream_events('gemini', response, call):
+            for candidate in event.get("candidates", []):
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+    finally:
+        response.close()
+
+
+def _groq_stream_chunks(prompt, model, call):
+    api_key = get_groq_api_key()
+    url = "https://api.groq.com/openai/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "max_tokens": 6000,
+        "top_p": 0.95,
+        "stream": True,
+    }
+
+    response = _open_stream('groq', api_key, url, payload, prompt, call, headers=headers)
+    try:
+        for event in _stream_events('groq', response, call):
+            for choice in event.get("choices", []):
+                content = choice.get("delta", {}).get("content")
+                if content:
+                    yield content
+    finally:
+        response.close()
+
+
+def stream_refine(
+    provider: str,
+    raw_text: str,
+    topic_title: str = "",
+    difficulty_level: str = "medium",
+    use_cache: bool = True,
+    min_questions: int = MIN_QUESTIONS,
+    questions: str = None,
+):
+    """
+    Streaming variant of refine_with_gemini / refine_with_groq.
+    
+    Yields cleaned text fragments as the provider produces them. The full
+    text is cached on success exactly like the non-streaming refiners.
+    
+    Raises:
+        AIRefineError: If the provider fails or the output is unusable
+    """
+    if provider == 'gemini':
+        model = GEMINI_MODEL
+    elif provider == 'groq':
+        model = get_best_groq_model()
+    else:
+        raise AIRefineError(f"Unknown provider: {provider}")
+
+    cache_key = make_refine_cache_key(provider, model, difficulty_level, topic_title, raw_text, questions)
+    if use_cache:
+        cached = get_cached_refine(cache_key)
+        if cached and cached[2] >= min_questions:
+            yield cached[0]
+            return
+
+    start_time = time.time()
+    prompt = build_prompt(difficulty_level, topic_title, raw_text, questions)
+
+    with record_provider_call(provider, model, difficulty_level, kind='stream') as call:
+        if provider == 'gemini':
+            chunks = _gemini_stream_chunks(prompt, call)
+        else:
+            chunks = _groq_stream_chunks(prompt, model, call)
+
+        cleaner = MarkdownStreamCleaner()
+        parts = []
+        try:
+            for chunk in chunks:
+                cleaned = cleaner.feed(chunk)
+                if cleaned:
+                    parts.append(cleaned)
+                    yield cleaned
+            tail = cleaner.flush()
+            if tail:
+                parts.append(tail)
+                yield tail
         except requests.exceptions.RequestException as e:
-            raise AIRefineError(f"Groq request failed: {e}")
-        except KeyError as e:
-            raise AIRefineError(f"Unexpected Groq response format: {e}")
-        except Exception as e:
-            raise AIRefineError(f"Groq refine error: {e}")
+            raise AIRefineError(f"{provider.title()} stream failed: {e}")
+        except (KeyError, ValueError) as e:
+            raise AIRefineError(f"Unexpected {provider.title()} stream format: {e}")
+
+        refined_text = ''.join(parts)
+        qa_count = count_questions(refined_text)
+        if qa_count < min_questions:
+            raise AIRefineError(f"{provider.title()} only generated {qa_count} question(s). Response may be incomplete.")
+
+    set_cached_refine(cache_key, (refined_text, time.time() - start_time, qa_count))
 
 
 # ==================================================
@@ -316,22 +903,17 @@ def refine_with_groq(
 # ==================================================
 
 def test_gemini_connection():
-    """Test Gemini API connection."""
+    """
+    Test Gemini API connection.
+    Reads the model's metadata - proves key and endpoint work without paying
+    for a generation.
+    """
     try:
         api_key = get_gemini_api_key()
-        url = (
-            "https://generativelanguage.googleapis.com/v1beta/"
-            "models/gemini-2.5-flash:generateContent"
-            f"?key={api_key}"
-        )
-        
-        payload = {
-            "contents": [
-                {"role": "user", "parts": [{"text": "Reply OK"}]}
-            ]
-        }
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}"
         
-        response = requests.post(url, json=payload, timeout=15)
+        # Key in a header so error messages (shown by ai_status) never contain it
+        response = get_session('gemini').get(url, headers={"x-goog-api-key": api_key}, timeout=get_timeout(15))
         response.raise_for_status()
         return True, "Gemini connection successful"
     
@@ -340,26 +922,14 @@ def test_gemini_connection():
 
 
 def test_groq_connection():
-    """Test Groq API connection."""
+    """
+    Test Groq API connection.
+    Lists the models (no chat completion) and refreshes the model catalog
+    on the way.
+    """
     try:
-        api_key = get_groq_api_key()
-        model = get_best_groq_model()
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": model,
-            "messages": [{"role": "user", "content": "Reply OK"}],
-            "max_tokens": 10,
-        }
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        return True, f"Groq connection successful (using {model})"
+        models = refresh_groq_model_catalog()
+        return True, f"Groq connection successful (using {get_best_groq_model()}, {len(models)} models)"
     
     except Exception as e:
-        return False, f"Groq error: {e}"
\ No newline at end of file
+        return False, f"Groq error: {e}"
@@ -0,0 +1,64 @@
+# ============================================================================
+# FILE: scan/utils/ai_cache.py - CONTENT-ADDRESSED CACHE FOR AI REFINES
+# ============================================================================
+
+"""
+Caches (refined_text, processing_time, qa_count) keyed by a hash of
+everything that determines the LLM output:
+
+    provider, model, prompt version, difficulty, title, normalized raw_text
+
+Stored in the 'ai_refine' cache alias (file based, shared by all workers).
+Age eviction = the alias TIMEOUT, size eviction = OPTIONS['MAX_ENTRIES'].
+"""
+
+import hashlib
+import json
+
+from django.core.cache import caches
+
+from .prompts import PROMPT_VERSION
+
+
+CACHE_ALIAS = 'ai_refine'
+
+
+def normalize_raw_text(raw_text: str) -> str:
+    """Collapse whitespace so re-saved text with different spacing still hits."""
+    return ' '.join((raw_text or '').split())
+
+
+def source_hash(raw_text: str) -> str:
+    """Fingerprint of a topic's raw text, stored on AIRefine to detect stale refines."""
+    return hashlib.sha256(normalize_raw_text(raw_text).encode('utf-8')).hexdigest()
+
+
+def make_refine_cache_key(provider, model, difficulty_level, topic_title, raw_text, questions=None) -> str:
+    """Stable cache key for one refine request (`questions`: a chunk's question range)."""
+    payload = json.dumps([
+        provider,
+        model,
+        PROMPT_VERSION,
+        difficulty_level,
+        (topic_title or '').strip(),
+        normalize_raw_text(raw_text),
+    ] + ([questions] if questions else []), ensure_ascii=False)
+    return 'refine:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_refine(cache_key):
+    """Return the cached (refined_text, processing_time, qa_count) or None."""
+    try:
+        cached = caches[CACHE_ALIAS].get(cache_key)
+    except Exception as e:
+        print(f"AI refine cache read failed: {e}")
+        return None
+    return tuple(cached) if cached else None
+
+
+def set_cached_refine(cache_key, result):
+    """Store a successful refine result. Cache failures never break a refine."""
+    try:
+        caches[CACHE_ALIAS].set(cache_key, list(result))
+    except Exception as e:
+        print(f"AI refine cache write failed: {e}")
@@ -0,0 +1,183 @@
+# ============================================================================
+# FILE: scan/utils/bulk_refine.py - COURSE / DEPARTMENT BULK REFINE
+# ============================================================================
+
+"""
+Refine every topic of a course (or of all courses in a department) in one go.
+
+Topics that have no completed refine, whose last refine failed, or whose
+raw_text changed since the refine was generated (source_hash mismatch) are
+queued as ordinary AIRefine jobs linked to a RefineBatch (RefineBatchJob).
+The jobs run through the normal queue (run_refine_worker or `manage.py
+refine_course`), and batch_progress() reports throughput, ETA and failures
+from the links, which keep each batch's own outcome when a later batch
+re-queues the same job.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Topic, AIRefine, RefineBatch
+from .ai_cache import source_hash
+from .refine_queue import REFINERS, enqueue_refine
+
+
+# ==================================================
+# TARGET SELECTION
+# ==================================================
+
+def expand_providers(provider):
+    """'both' -> every configured provider, otherwise a single provider list."""
+    if provider == 'both':
+        return list(REFINERS)
+    if provider not in REFINERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    return [provider]
+
+
+def topics_in_scope(course=None, department=None):
+    """Live topics with OCR text in a course, or in every course of a department."""
+    topics = Topic.objects.filter(is_deleted=False, course__is_deleted=False).exclude(raw_text='')
+    if course is not None:
+        topics = topics.filter(course=course)
+    if department is not None:
+        topics = topics.filter(course__departments=department)
+    return topics.select_related('course').distinct().order_by('course_id', 'order', 'created_at')
+
+
+def find_refine_targets(topics, providers, difficulty_level=None, include_stale=True, force=False):
+    """
+    Decide which (topic, provider, difficulty) combinations need a refine.
+
+    Args:
+        difficulty_level: None = each topic's own difficulty level
+        include_stale: Re-refine completed rows whose source text changed
+        force: Re-refine everything that is not already queued
+
+    Returns:
+        list: (topic, provider, difficulty_level, reason) tuples,
+              reason is 'missing', 'failed', 'stale' or 'forced'
+    """
+    topics = list(topics)
+    existing = {
+        (r.topic_id, r.provider, r.difficulty_level): r
+        for r in AIRefine.objects.filter(topic__in=topics, provider__in=providers).only(
+            'topic_id', 'provider', 'difficulty_level', 'status', 'source_hash'
+        )
+    }
+
+    targets = []
+    for topic in topics:
+        difficulty = difficulty_level or topic.difficulty_level or 'medium'
+        current_hash = source_hash(topic.raw_text)
+
+        for provider in providers:
+            refine = existing.get((topic.id, provider, difficulty))
+
+            if refine is None:
+                reason = 'missing'
+            elif refine.status in ('pending', 'processing'):
+                continue  # already queued - the worker will get to it
+            elif refine.status == 'failed':
+                reason = 'failed'
+            elif include_stale and refine.source_hash and refine.source_hash != current_hash:
+                # Rows from before source_hash existed have no hash; treat them as fresh
+                reason = 'stale'
+            elif force:
+                reason = 'forced'
+            else:
+                continue
+
+            targets.append((topic, provider, difficulty, reason))
+
+    return targets
+
+
+# ==================================================
+# BATCHES
+# ==================================================
+
+def create_refine_batch(provider='both', difficulty_level=None, course=None, department=None,
+                        include_stale=True, force=False):
+    """
+    Queue every refine a course/department needs under one RefineBatch.
+
+    Returns:
+        tuple: (batch, targets) - targets as returned by find_refine_targets
+    """
+    providers = expand_providers(provider)
+    targets = find_refine_targets(
+        topics_in_scope(course=course, department=department),
+        providers,
+        difficulty_level=difficulty_level,
+        include_stale=include_stale,
+        force=force,
+    )
+
+    with transaction.atomic():
+        batch = RefineBatch.objects.create(
+            course=course,
+            department=department,
+            provider=provider,
+            difficulty_level=difficulty_level or '',
+            total_jobs=len(targets),
+        )
+        for topic, target_provider, difficulty, reason in targets:
+            # Changed text gets a new cache key anyway; only forced runs skip the cache
+            enqueue_refine(topic, target_provider, difficulty, bypass_cache=force, batch=batch)
+
+    return batch, targets
+
+
+def batch_progress(batch):
+    """
+    Progress snapshot for a batch: status counts, throughput, ETA, failures.
+    Throughput is finished jobs per minute since the batch was created.
+    """
+    jobs = batch.jobs.select_related('refine__topic').defer(
+        'refine__refined_text', 'refine__sections', 'refine__topic__raw_text', 'refine__topic__refined_summary'
+    )
+    counts = {status: 0 for status, _ in AIRefine.STATUS_CHOICES}
+    failures = []
+    last_finished = None
+
+    for job in jobs:
+        refine = job.refine
+        # Unfinished links show the job's live state (pending / processing)
+        status = refine.status if job.status == 'pending' else job.status
+        counts[status] = counts.get(status, 0) + 1
+        if job.finished_at and (last_finished is None or job.finished_at > last_finished):
+            last_finished = job.finished_at
+        if job.status == 'failed':
+            failures.append({
+                'job_id': refine.id,
+                'topic_id': refine.topic_id,
+                'topic': refine.topic.title,
+                'provider': refine.provider,
+                'error': job.error_message,
+            })
+
+    finished = counts['completed'] + counts['failed']
+    remaining = max(0, batch.total_jobs - finished)
+
+    # A finished batch stops the clock at its last job, not at "now"
+    end = timezone.now() if remaining or last_finished is None else last_finished
+    elapsed = max(0.0, (end - batch.created_at).total_seconds())
+    per_minute = finished / elapsed * 60 if elapsed and finished else 0.0
+    eta = remaining / per_minute * 60 if per_minute and remaining else (0 if not remaining else None)
+
+    return {
+        'batch_id': batch.id,
+        'course': batch.course.name if batch.course else None,
+        'department': batch.department.name if batch.department else None,
+        'provider': batch.provider,
+        'total': batch.total_jobs,
+        'counts': counts,
+        'finished': finished,
+        'remaining': remaining,
+        'done': remaining == 0,
+        'elapsed_seconds': round(elapsed, 1),
+        'jobs_per_minute': round(per_minute, 2),
+        'eta_seconds': round(eta) if eta is not None else None,
+        'failures': failures,
+    }
@@ -0,0 +1,520 @@
+# ============================================================================
+# FILE: scan/utils/chunking.py - MAP-REDUCE REFINEMENT FOR LONG TOPICS
+# ============================================================================
+
+"""
+Multi-page scans are split into page blocks on the `--- Page N ---`
+markers written by upload_and_extract (pages over the chunk budget are
+broken on blank lines / a character budget). Consecutive pages are packed
+into chunks of at most AI_CHUNK_MAX_TOKENS, each refined in its own call
+with the end of the page before and the start of the page after sent
+along as context only, and the outputs are merged with the questions
+renumbered Q1..Qn across the whole topic. A topic within the budget is
+one call, exactly as before chunking.
+
+Each chunk asks for its share of the topic's 15-20 questions
+(prompts.question_range), so a long topic does not get 15-20 per chunk.
+
+Each chunk's output is kept as a section {'pages': [block hashes], 'text'}
+on the AIRefine row. On regenerate, a section whose pages all still hash
+the same re-uses its text; only the runs of pages between re-used
+sections are packed again and sent to the provider.
+
+Multi-difficulty refines run the same plan once for all three levels; a
+section is re-used only when every level still has it.
+
+The streaming endpoint goes through the same plan (SectionStream), so long
+topics are not truncated there either and unchanged pages are re-used.
+"""
+
+import hashlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .ai import AIRefineError, MIN_QUESTIONS, count_questions, stream_refine
+from .ai_cache import normalize_raw_text
+from .normalize import log_normalization
+from .prompts import PROMPT_VERSION, DIFFICULTY_LEVELS, question_range
+
+
+PAGE_MARKER = re.compile(r'^--- Page \d+ ---[ \t]*$', re.MULTILINE)
+QUESTION_LINE = re.compile(r'^Q\d+:', re.MULTILINE)
+TRAILING_SEPARATOR = re.compile(r'\n*-{3,}\s*$')
+
+CHARS_PER_TOKEN = 4  # rough average for English OCR text
+
+
+def chunk_char_budget():
+    """Maximum characters of raw text sent to the provider in one call."""
+    return settings.AI_CHUNK_MAX_TOKENS * CHARS_PER_TOKEN
+
+
+# ==================================================
+# SPLITTING
+# ==================================================
+
+def split_pages(raw_text: str) -> list:
+    """
+    Split raw text into page blocks, keeping each page's marker line.
+    Text before the first marker (e.g. a source header) stays with page 1.
+    """
+    starts = [m.start() for m in PAGE_MARKER.finditer(raw_text)]
+    if not starts:
+        return [raw_text] if raw_text.strip() else []
+
+    starts[0] = 0
+    bounds = starts + [len(raw_text)]
+    pages = [raw_text[bounds[i]:bounds[i + 1]] for i in range(len(starts))]
+    return [page for page in pages if page.strip()]
+
+
+def _split_oversized(block: str, budget: int) -> list:
+    """Break one block larger than the budget on blank lines, then hard-wrap."""
+    pieces = []
+    current = ''
+    for paragraph in re.split(r'(\n\s*\n)', block):
+        if len(current) + len(paragraph) <= budget:
+            current += paragraph
+            continue
+        if current.strip():
+            pieces.append(current)
+        current = paragraph
+        while len(current) > budget:
+            pieces.append(current[:budget])
+            current = current[budget:]
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def split_blocks(raw_text: str, budget: int) -> list:
+    """Page blocks, with pages larger than the budget broken up."""
+    blocks = []
+    for page in split_pages(raw_text):
+        blocks.extend(_split_oversized(page, budget) if len(page) > budget else [page])
+    return blocks
+
+
+def chunk_with_context(blocks: list, start: int, end: int) -> str:
+    """
+    The text sent for blocks[start:end]: the chunk between the last
+    AI_SECTION_CONTEXT_CHARS of the page before and the first ones of the
+    page after, so a chunk that starts or ends mid-sentence still reads
+    right. Only the chunk itself should get questions.
+    """
+    text = ''.join(blocks[start:end])
+    size = settings.AI_SECTION_CONTEXT_CHARS
+    if size <= 0:
+        return text
+
+    before = PAGE_MARKER.sub('', blocks[start - 1])[-size:].strip() if start > 0 else ''
+    after = PAGE_MARKER.sub('', blocks[end])[:size].strip() if end < len(blocks) else ''
+
+    if before:
+        text = f"[Context - end of the previous page, do not write questions about it]\n{before}\n[End of context]\n\n{text}"
+    if after:
+        text = f"{text.rstrip()}\n\n[Context - start of the next page, do not write questions about it]\n{after}\n[End of context]\n"
+    return text
+
+
+def block_hash(block: str) -> str:
+    """Fingerprint of one page block; changes with the prompt version too."""
+    payload = PROMPT_VERSION + '\n' + normalize_raw_text(block)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def chunk_questions(blocks: list, start: int, end: int) -> str:
+    """The question range for blocks[start:end]: its share of the topic's."""
+    total = sum(len(block) for block in blocks)
+    return question_range(sum(len(block) for block in blocks[start:end]) / max(1, total))
+
+
+def section_pages(blocks: list, start: int, end: int) -> list:
+    """The block hashes a section of blocks[start:end] is stored under."""
+    return [block_hash(block) for block in blocks[start:end]]
+
+
+def whole_text_sections(raw_text: str, refined_text: str) -> list:
+    """Sections for a refine produced in one call (a topic within the budget)."""
+    blocks = split_blocks(raw_text, chunk_char_budget())
+    if not blocks:
+        return []
+    return [{'pages': [block_hash(block) for block in blocks], 'text': refined_text}]
+
+
+def _pack(blocks: list, start: int, end: int, budget: int) -> list:
+    """Pack blocks[start:end] into (start, end) chunks of at most `budget` characters."""
+    chunks = []
+    size = 0
+    for index in range(start, end):
+        if index > start and size + len(blocks[index]) > budget:
+            chunks.append((start, index))
+            start, size = index, 0
+        size += len(blocks[index])
+    if end > start:
+        chunks.append((start, end))
+    return chunks
+
+
+def plan_sections(blocks: list, previous_sections: list, budget: int = None) -> list:
+    """
+    Match blocks against previous sections and pack the rest into chunks.
+
+    Returns:
+        list: in text order, ('reuse', section) for runs of blocks whose
+              hashes equal a previous section, ('refine', (start, end)) for
+              each chunk of changed blocks that needs a provider call
+    """
+    budget = budget or chunk_char_budget()
+    hashes = [block_hash(block) for block in blocks]
+
+    by_first_page = {}
+    for section in previous_sections or []:
+        if section.get('pages') and section.get('text'):
+            by_first_page.setdefault(section['pages'][0], []).append(section)
+
+    plan = []
+    changed = 0  # first block of the current run of changed blocks
+    i = 0
+    while i < len(blocks):
+        match = next((
+            section for section in by_first_page.get(hashes[i], [])
+            if section['pages'] == hashes[i:i + len(section['pages'])]
+        ), None)
+        if match:
+            plan.extend(('refine', chunk) for chunk in _pack(blocks, changed, i, budget))
+            plan.append(('reuse', match))
+            i += len(match['pages'])
+            changed = i
+        else:
+            i += 1
+    plan.extend(('refine', chunk) for chunk in _pack(blocks, changed, len(blocks), budget))
+    return plan
+
+
+def _is_whole_text(plan: list, blocks: list) -> bool:
+    """True when the plan is one call for the whole text (nothing to re-use or split)."""
+    return not plan or plan == [('refine', (0, len(blocks)))]
+
+
+# ==================================================
+# MERGING
+# ==================================================
+
+SECTION_SEPARATOR = '\n\n---\n\n'
+
+def merge_refined_chunks(refined_chunks: list) -> tuple:
+    """
+    Join refined chunk outputs and renumber questions globally.
+
+    Returns:
+        tuple: (merged_text, question_count)
+    """
+    counter = 0
+
+    def renumber(match):
+        nonlocal counter
+        counter += 1
+        return f"Q{counter}:"
+
+    parts = [QUESTION_LINE.sub(renumber, text.strip()) for text in refined_chunks if text.strip()]
+    merged = SECTION_SEPARATOR.join(TRAILING_SEPARATOR.sub('', part) for part in parts)
+    return merged, counter
+
+
+class QuestionRenumberer:
+    """
+    merge_refined_chunks() numbering for text that arrives in fragments:
+    only whole lines are renumbered and returned, the rest waits for
+    the next feed() or flush().
+    """
+
+    def __init__(self):
+        self.counter = 0
+        self.pending = ''
+
+    def _renumber(self, text):
+        def renumber(match):
+            self.counter += 1
+            return f"Q{self.counter}:"
+
+        return QUESTION_LINE.sub(renumber, text)
+
+    def feed(self, text):
+        head, newline, self.pending = (self.pending + text).rpartition('\n')
+        return self._renumber(head + newline)
+
+    def flush(self):
+        text, self.pending = self.pending, ''
+        return self._renumber(text)
+
+
+# ==================================================
+# MAP-REDUCE REFINE
+# ==================================================
+
+def _run_chunk(call, *args, **kwargs):
+    """
+    Run one chunk's provider call on a pool thread. The refiners record
+    telemetry in the DB, so the thread's connection is closed afterwards
+    instead of being left open until the server reaps it.
+    """
+    close_old_connections()
+    try:
+        return call(*args, **kwargs)
+    finally:
+        connection.close()
+
+
+def _check_merged(qa_count, level=None):
+    """
+    A chunk may legitimately yield no questions (a contents page, a page
+    of figures), so chunks are refined with min_questions=0 and the merged
+    topic is held to MIN_QUESTIONS instead.
+    """
+    if qa_count < MIN_QUESTIONS:
+        level = f" {level}" if level else ''
+        raise AIRefineError(f"Only {qa_count}{level} question(s) generated across all sections.")
+
+
+def refine_sections(
+    refiner,
+    raw_text: str,
+    topic_title: str = "",
+    difficulty_level: str = "medium",
+    use_cache: bool = True,
+    deadline: float = None,
+    previous_sections: list = None,
+):
+    """
+    Refine text of any length with `refiner` (refine_with_gemini / refine_with_groq),
+    re-using `previous_sections` for pages that did not change.
+
+    Text within the chunk budget goes straight to the refiner. Otherwise
+    each chunk of changed pages is refined with its neighbours as context
+    (chunk_with_context) and its share of the questions, with at most
+    AI_CHUNK_CONCURRENCY calls in flight, and merged. Any failed chunk
+    fails the whole refine (AIRefineError), as does a merged result with
+    fewer than MIN_QUESTIONS questions.
+
+    Returns:
+        tuple: (refined_text, processing_time, qa_count, sections)
+    """
+    log_normalization(raw_text)
+    blocks = split_blocks(raw_text, chunk_char_budget())
+    plan = plan_sections(blocks, previous_sections)
+
+    if _is_whole_text(plan, blocks):
+        result = refiner(
+            raw_text, topic_title, difficulty_level=difficulty_level, use_cache=use_cache, deadline=deadline
+        )
+        return (*result, whole_text_sections(raw_text, result[0]))
+
+    start_time = time.time()
+
+    def refine_chunk(chunk):
+        refined_text, _, _ = _run_chunk(
+            refiner, chunk_with_context(blocks, *chunk), topic_title, difficulty_level=difficulty_level,
+            use_cache=use_cache, deadline=deadline, min_questions=0, questions=chunk_questions(blocks, *chunk),
+        )
+        return refined_text
+
+    to_refine = [chunk for action, chunk in plan if action == 'refine']
+    if to_refine:
+        workers = max(1, min(settings.AI_CHUNK_CONCURRENCY, len(to_refine)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            refined_chunks = iter(list(pool.map(refine_chunk, to_refine)))
+
+    sections = []
+    for action, item in plan:
+        if action == 'reuse':
+            sections.append(item)
+        else:
+            sections.append({'pages': section_pages(blocks, *item), 'text': next(refined_chunks)})
+
+    print(f"♻️ Re-used {len(plan) - len(to_refine)}/{len(plan)} sections, refined {len(to_refine)} chunk(s)")
+
+    refined_text, qa_count = merge_refined_chunks([section['text'] for section in sections])
+    _check_merged(qa_count)
+    return refined_text, time.time() - start_time, qa_count, sections
+
+
+class SectionStream:
+    """
+    refine_sections() for the streaming endpoint. Iterating yields text as
+    it is produced, section by section in topic order with questions
+    renumbered; afterwards refined_text, qa_count and sections hold what
+    refine_sections() would have returned.
+
+    Re-used sections are sent at once. The first chunk that needs a
+    provider call is streamed while the later ones are refined in parallel
+    (non-streaming, with `refiner`) and sent whole when their turn comes.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        refiner,
+        raw_text: str,
+        topic_title: str = "",
+        difficulty_level: str = "medium",
+        use_cache: bool = True,
+        previous_sections: list = None,
+    ):
+        self.provider = provider
+        self.refiner = refiner
+        self.raw_text = raw_text
+        self.topic_title = topic_title
+        self.difficulty_level = difficulty_level
+        self.use_cache = use_cache
+        self.previous_sections = previous_sections
+        self.refined_text = ''
+        self.qa_count = 0
+        self.sections = []
+
+    def _stream(self, text, min_questions=MIN_QUESTIONS, questions=None):
+        return stream_refine(
+            self.provider, text, self.topic_title, difficulty_level=self.difficulty_level,
+            use_cache=self.use_cache, min_questions=min_questions, questions=questions,
+        )
+
+    def __iter__(self):
+        log_normalization(self.raw_text)
+        blocks = split_blocks(self.raw_text, chunk_char_budget())
+        plan = plan_sections(blocks, self.previous_sections)
+
+        if _is_whole_text(plan, blocks):
+            parts = []
+            for text in self._stream(self.raw_text):
+                parts.append(text)
+                yield text
+            self.refined_text = ''.join(parts)
+            self.qa_count = count_questions(self.refined_text)
+            self.sections = whole_text_sections(self.raw_text, self.refined_text)
+            return
+
+        to_refine = [chunk for action, chunk in plan if action == 'refine']
+        pool = ThreadPoolExecutor(max_workers=max(1, min(settings.AI_CHUNK_CONCURRENCY, len(to_refine))))
+        try:
+            # The first chunk is streamed below; the rest start now
+            later = iter([
+                pool.submit(
+                    _run_chunk, self.refiner, chunk_with_context(blocks, *chunk), self.topic_title,
+                    difficulty_level=self.difficulty_level, use_cache=self.use_cache, min_questions=0,
+                    questions=chunk_questions(blocks, *chunk),
+                )
+                for chunk in to_refine[1:]
+            ])
+            renumberer = QuestionRenumberer()
+            streamed = False
+
+            for number, (action, item) in enumerate(plan):
+                if number:
+                    yield SECTION_SEPARATOR
+                if action == 'reuse':
+                    self.sections.append(item)
+                    yield renumberer.feed(item['text']) + renumberer.flush()
+                    continue
+
+                if not streamed:
+                    streamed = True
+                    parts = []
+                    stream = self._stream(
+                        chunk_with_context(blocks, *item), min_questions=0, questions=chunk_questions(blocks, *item)
+                    )
+                    for text in stream:
+                        parts.append(text)
+                        lines = renumberer.feed(text)
+                        if lines:
+                            yield lines
+                    text = ''.join(parts)
+                else:
+                    text, _, _ = next(later).result()
+                    yield renumberer.feed(text)
+                yield renumberer.flush()
+                self.sections.append({'pages': section_pages(blocks, *item), 'text': text})
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        print(f"♻️ Re-used {len(plan) - len(to_refine)}/{len(plan)} sections, refined {len(to_refine)} chunk(s) (streamed)")
+
+        self.refined_text, self.qa_count = merge_refined_chunks([section['text'] for section in self.sections])
+        _check_merged(self.qa_count)
+
+
+def refine_multi_sections(
+    multi_refiner,
+    raw_text: str,
+    topic_title: str = "",
+    use_cache: bool = True,
+    deadline: float = None,
+    previous_sections: dict = None,
+):
+    """
+    refine_sections() for refine_multi_with_gemini / refine_multi_with_groq:
+    every provider call returns all three levels for its chunk.
+
+    Args:
+        previous_sections: difficulty_level -> sections of that level's last refine
+
+    Returns:
+        dict: difficulty_level -> (refined_text, processing_time, qa_count, sections)
+    """
+    log_normalization(raw_text)
+    blocks = split_blocks(raw_text, chunk_char_budget())
+
+    # Sections that every level can re-use, keyed by their block hashes
+    shared = {}
+    for level in DIFFICULTY_LEVELS:
+        for section in (previous_sections or {}).get(level) or []:
+            if section.get('pages') and section.get('text'):
+                shared.setdefault(tuple(section['pages']), {})[level] = section
+    shared = {pages: by_level for pages, by_level in shared.items() if len(by_level) == len(DIFFICULTY_LEVELS)}
+
+    plan = plan_sections(blocks, [by_level[DIFFICULTY_LEVELS[0]] for by_level in shared.values()])
+
+    if _is_whole_text(plan, blocks):
+        results = multi_refiner(raw_text, topic_title, use_cache=use_cache, deadline=deadline)
+        return {
+            level: (*result, whole_text_sections(raw_text, result[0]))
+            for level, result in results.items()
+        }
+
+    start_time = time.time()
+
+    def refine_chunk(chunk):
+        return _run_chunk(
+            multi_refiner, chunk_with_context(blocks, *chunk), topic_title, use_cache=use_cache,
+            deadline=deadline, min_questions=0, questions=chunk_questions(blocks, *chunk),
+        )
+
+    to_refine = [chunk for action, chunk in plan if action == 'refine']
+    if to_refine:
+        workers = max(1, min(settings.AI_CHUNK_CONCURRENCY, len(to_refine)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            refined_chunks = iter(list(pool.map(refine_chunk, to_refine)))
+
+    sections = {level: [] for level in DIFFICULTY_LEVELS}
+    for action, item in plan:
+        if action == 'reuse':
+            for level in DIFFICULTY_LEVELS:
+                sections[level].append(shared[tuple(item['pages'])][level])
+        else:
+            pages = section_pages(blocks, *item)
+            chunk_results = next(refined_chunks)
+            for level in DIFFICULTY_LEVELS:
+                sections[level].append({'pages': pages, 'text': chunk_results[level][0]})
+
+    print(f"♻️ Re-used {len(plan) - len(to_refine)}/{len(plan)} sections for all levels, refined {len(to_refine)} chunk(s)")
+
+    processing_time = time.time() - start_time
+    results = {}
+    for level in DIFFICULTY_LEVELS:
+        refined_text, qa_count = merge_refined_chunks([section['text'] for section in sections[level]])
+        _check_merged(qa_count, level)
+        results[level] = (refined_text, processing_time, qa_count, sections[level])
+    return results
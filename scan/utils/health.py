@@ -0,0 +1,179 @@
+# ============================================================================
+# FILE: scan/utils/health.py - CACHED HEALTH PROBES FOR OCR AND AI
+# ============================================================================
+
+"""
+ai_status and ocr_status used to call the providers on every hit, and
+frontends poll them. Now probes run on a schedule (`manage.py
+probe_health --loop`) or in the background when a result goes stale, and
+the status views only read the shared 'providers' cache.
+
+Each service has one cache entry:
+
+    {'ok', 'message', 'checked_at', 'latency_ms', 'latencies' (last N),
+     'avg_latency_ms', 'consecutive_failures'}
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .ai import test_gemini_connection, test_groq_connection
+from .ocr import test_ocr_connection
+
+
+PROBES = {
+    'ocr': test_ocr_connection,
+    'gemini': test_gemini_connection,
+    'groq': test_groq_connection,
+}
+
+CACHE_ALIAS = 'providers'
+LATENCY_WINDOW = 20    # probes kept for the rolling latency
+PROBE_LOCK_TIMEOUT = 60  # seconds one worker may hold a service's probe slot
+
+_probing = set()
+_probing_lock = threading.Lock()
+
+
+def _cache_key(service):
+    return f'health:{service}'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+# ==================================================
+# PROBING
+# ==================================================
+
+def probe(service):
+    """
+    Run one service's probe now and store the result.
+
+    Returns:
+        dict: the updated health record
+    """
+    start = time.time()
+    try:
+        ok, message = PROBES[service]()
+    except Exception as e:
+        ok, message = False, f"Probe failed: {e}"
+    latency_ms = round((time.time() - start) * 1000, 1)
+
+    previous = read_health(service) or {}
+    latencies = (previous.get('latencies') or [])[-(LATENCY_WINDOW - 1):] + [latency_ms]
+    record = {
+        'ok': ok,
+        'message': message,
+        'checked_at': time.time(),
+        'latency_ms': latency_ms,
+        'latencies': latencies,
+        'avg_latency_ms': round(sum(latencies) / len(latencies), 1),
+        'consecutive_failures': 0 if ok else previous.get('consecutive_failures', 0) + 1,
+    }
+
+    try:
+        _cache().set(_cache_key(service), record, timeout=None)
+    except Exception as e:
+        print(f"Could not store {service} health: {e}")
+    return record
+
+
+def probe_all(services=None):
+    """Probe every service (or the given ones) in parallel threads."""
+    services = list(services or PROBES)
+    results = {}
+
+    def run(service):
+        results[service] = probe(service)
+
+    threads = [threading.Thread(target=run, args=(service,), daemon=True) for service in services]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _probe_in_background(service):
+    """
+    Refresh a stale result on a daemon thread. At most one probe per service
+    runs in this process, and the cache lock keeps other workers out too.
+    """
+    with _probing_lock:
+        if service in _probing:
+            return
+        _probing.add(service)
+
+    try:
+        acquired = _cache().add(f'health:probing:{service}', 1, timeout=PROBE_LOCK_TIMEOUT)
+    except Exception:
+        acquired = True  # cache down - probing anyway beats never refreshing
+    if not acquired:
+        with _probing_lock:
+            _probing.discard(service)
+        return
+
+    def run():
+        try:
+            probe(service)
+        finally:
+            try:
+                _cache().delete(f'health:probing:{service}')
+            except Exception:
+                pass
+            with _probing_lock:
+                _probing.discard(service)
+
+    threading.Thread(target=run, name=f'health-{service}', daemon=True).start()
+
+
+# ==================================================
+# READING
+# ==================================================
+
+def read_health(service):
+    """Cached record for a service, or None if it was never probed."""
+    try:
+        return _cache().get(_cache_key(service))
+    except Exception as e:
+        print(f"Could not read {service} health: {e}")
+        return None
+
+
+def get_health(service, refresh=False):
+    """
+    Health of a service for status endpoints - never blocks on the network
+    unless refresh=True. A missing or stale result is re-probed in the
+    background; the caller gets what the cache holds now.
+
+    Returns:
+        dict: health record plus 'age_seconds' and 'stale'
+    """
+    if refresh:
+        record = probe(service)
+    else:
+        record = read_health(service)
+        if record is None or time.time() - record['checked_at'] > settings.HEALTH_PROBE_INTERVAL:
+            _probe_in_background(service)
+
+    if record is None:
+        return {
+            'ok': None,
+            'message': 'Not checked yet - probe running',
+            'checked_at': None,
+            'age_seconds': None,
+            'stale': True,
+        }
+
+    age = time.time() - record['checked_at']
+    return {
+        **{key: value for key, value in record.items() if key != 'latencies'},
+        'age_seconds': round(age, 1),
+        'stale': age > settings.HEALTH_PROBE_INTERVAL,
+    }
+
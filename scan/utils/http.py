@@ -0,0 +1,62 @@
+# ============================================================================
+# FILE: scan/utils/http.py - POOLED HTTP SESSIONS FOR OUTBOUND CALLS
+# ============================================================================
+
+"""
+One keep-alive requests.Session per upstream service and process, so
+Gemini, Groq and OCR calls re-use TCP+TLS connections instead of paying a
+fresh handshake on every request.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+_sessions = {}
+_sessions_pid = None
+_lock = threading.Lock()
+
+
+def _build_session():
+    """Session with a sized connection pool. Retries stay in the callers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        max_retries=0,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(service):
+    """
+    Return the shared session for a service ('gemini', 'groq', 'ocr').
+    Sessions are rebuilt after a fork so workers never share sockets.
+    """
+    global _sessions_pid
+
+    with _lock:
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+
+        session = _sessions.get(service)
+        if session is None:
+            session = _build_session()
+            _sessions[service] = session
+
+    return session
+
+
+def get_timeout(read_timeout):
+    """
+    (connect, read) timeout tuple.
+    Connect fails fast on a dead host; read allows slow LLM/OCR responses.
+    """
+    return (settings.HTTP_CONNECT_TIMEOUT, read_timeout)
@@ -0,0 +1,161 @@
+# ============================================================================
+# FILE: scan/utils/local_ocr.py - LOCAL TESSERACT OCR FALLBACK
+# ============================================================================
+
+"""
+When the Colab OCR engine is unreachable (or its health probe says it is
+down), ocr.py sends pages here instead of failing the scan. Pages are
+binarized with OpenCV and read by Tesseract (pytesseract), one page per
+worker process, in a pool sized to the CPU count.
+
+Workers only get bytes and plain options, never Django settings, so the
+pool can use the spawn start method. Tesseract itself is held to one
+thread per process (OMP_THREAD_LIMIT=1) - the pool is the parallelism.
+
+Results have the engine's shape ({'text', 'engine_used', 'confidence'}) so
+ocr.py treats them like remote pages.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+
+ENGINE_NAME = 'Tesseract (local)'
+
+_pool = None
+_pool_lock = threading.Lock()
+_available = None
+
+
+# ==================================================
+# WORKER (runs in the pool processes)
+# ==================================================
+
+def _init_worker():
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def tesseract_page(data, lang='eng'):
+    """
+    OCR one page image.
+
+    Returns:
+        tuple: ({'text', 'engine_used', 'confidence'} or None, error message, seconds)
+    """
+    import cv2
+    import numpy as np
+    import pytesseract
+
+    start = time.time()
+    try:
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return None, "Not an image", time.time() - start
+        # Otsu binarization copes with uneven phone-photo lighting better than raw gray
+        _, image = cv2.threshold(cv2.GaussianBlur(image, (3, 3), 0), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+        words = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    except Exception as e:
+        return None, str(e), time.time() - start
+
+    lines = {}
+    confidences = []
+    for idx, word in enumerate(words['text']):
+        if not word.strip():
+            continue
+        key = (words['block_num'][idx], words['par_num'][idx], words['line_num'][idx])
+        lines.setdefault(key, []).append(word)
+        if float(words['conf'][idx]) >= 0:
+            confidences.append(float(words['conf'][idx]))
+
+    text = '\n'.join(' '.join(line) for _, line in sorted(lines.items()))
+    return {
+        'text': text,
+        'engine_used': ENGINE_NAME,
+        'confidence': sum(confidences) / len(confidences) if confidences else 0,
+    }, '', time.time() - start
+
+
+# ==================================================
+# POOL
+# ==================================================
+
+def _workers():
+    return max(1, settings.OCR_LOCAL_WORKERS or os.cpu_count() or 1)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def local_ocr_available():
+    """True if the fallback is enabled and pytesseract finds a Tesseract binary."""
+    global _available
+    if not settings.OCR_LOCAL_FALLBACK:
+        return False
+    if _available is None:
+        try:
+            import cv2  # noqa: F401
+            import pytesseract
+            pytesseract.get_tesseract_version()
+            _available = True
+        except Exception as e:
+            print(f"Local OCR fallback unavailable: {e}")
+            _available = False
+    return _available
+
+
+def ocr_images_locally(images):
+    """
+    OCR page images (bytes) with Tesseract, in parallel across CPU cores.
+
+    Returns:
+        List of (item or None, error message) in input order
+    """
+    if not images:
+        return []
+
+    start = time.time()
+    lang = settings.OCR_LOCAL_LANG
+    workers = min(_workers(), len(images))
+    results = None
+    if workers > 1:
+        try:
+            results = list(_get_pool().map(tesseract_page, images, [lang] * len(images)))
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Local OCR pool failed ({e}), running in-process")
+            _reset_pool()
+            workers = 1
+    if results is None:
+        results = [tesseract_page(data, lang) for data in images]
+
+    elapsed = time.time() - start
+    cpu_seconds = sum(seconds for _, _, seconds in results)
+    pages_per_second = len(images) / elapsed if elapsed else 0
+    print(
+        f"🖥️ Local OCR: {len(images)} page(s) in {elapsed:.1f}s on {workers} core(s) - "
+        f"{pages_per_second / workers:.2f} pages/s/core, {cpu_seconds / len(images):.1f}s per page"
+    )
+    return [(item, error) for item, error, _ in results]
@@ -0,0 +1,134 @@
+# ============================================================================
+# FILE: scan/utils/multipart.py - STREAMING MULTIPART/FORM-DATA ENCODER
+# ============================================================================
+
+"""
+`requests.post(files=...)` reads every file into one bytes body before
+sending. MultipartEncoder instead yields the body piece by piece straight
+from the file objects (e.g. Django UploadedFile), and reports its length
+so requests sends Content-Length instead of chunked encoding:
+
+    body = MultipartEncoder([('file1', 'page1.jpg', upload, 'image/jpeg')])
+    session.post(url, data=body, headers={'Content-Type': body.content_type})
+
+Nothing is copied to disk. For a retry, rewind() seeks the files back to
+the start; only a non-seekable source is teed into a spooled temp file
+while it streams, so it can be sent again.
+"""
+
+import mimetypes
+import os
+import tempfile
+import uuid
+
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024  # spool copies of non-seekable parts go to disk past this
+
+
+def _file_size(fileobj):
+    """Byte size of a file object without reading it."""
+    size = getattr(fileobj, 'size', None)  # Django UploadedFile
+    if size is not None:
+        return size
+    if hasattr(fileobj, 'fileno'):
+        try:
+            return os.fstat(fileobj.fileno()).st_size - fileobj.tell()
+        except (OSError, ValueError):
+            pass
+    if seekable(fileobj):
+        position = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell() - position
+        fileobj.seek(position)
+        return size
+    raise ValueError(f"Cannot determine the size of {fileobj!r}")
+
+
+def seekable(fileobj):
+    try:
+        return fileobj.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+class _Part:
+    """One file field: its header bytes and the file it streams from."""
+
+    def __init__(self, boundary, name, filename, fileobj, content_type=None):
+        content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        filename = filename.replace('"', '%22').replace('\r', '').replace('\n', '')
+        self.header = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        self.fileobj = fileobj
+        self.size = _file_size(fileobj)
+        self.start = fileobj.tell() if seekable(fileobj) else None
+        self.spool = None
+
+    def __len__(self):
+        return len(self.header) + self.size + 2  # trailing CRLF
+
+    def __iter__(self):
+        yield self.header
+        if self.start is None:
+            # Not seekable: keep a copy as it streams so rewind() can replay it
+            self.spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        for chunk in iter(lambda: self.fileobj.read(CHUNK_SIZE), b''):
+            if self.start is None:
+                self.spool.write(chunk)
+            yield chunk
+        yield b'\r\n'
+
+    def rewind(self):
+        if self.start is not None:
+            self.fileobj.seek(self.start)
+        elif self.spool is not None:
+            # An attempt that broke off mid-part left the rest unread
+            for chunk in iter(lambda: self.fileobj.read(CHUNK_SIZE), b''):
+                self.spool.write(chunk)
+            self.spool.seek(0)
+            self.fileobj = self.spool
+            self.start = 0
+
+    def close(self):
+        if self.spool is not None:
+            self.spool.close()
+
+
+class MultipartEncoder:
+    """
+    Iterable multipart/form-data body over file fields.
+
+    Args:
+        fields: [(field_name, filename, fileobj, content_type or None), ...]
+    """
+
+    def __init__(self, fields):
+        self.boundary = uuid.uuid4().hex
+        self.parts = [_Part(self.boundary, *field) for field in fields]
+        self.trailer = f'--{self.boundary}--\r\n'.encode('utf-8')
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return sum(len(part) for part in self.parts) + len(self.trailer)
+
+    def __iter__(self):
+        for part in self.parts:
+            yield from part
+        yield self.trailer
+
+    def rewind(self):
+        """Prepare to send the same body again (retry)."""
+        for part in self.parts:
+            part.rewind()
+
+    def close(self):
+        """Drop spool copies; the caller's file objects stay open."""
+        for part in self.parts:
+            part.close()
@@ -0,0 +1,164 @@
+# ============================================================================
+# FILE: scan/utils/normalize.py - OCR TEXT NORMALIZER FOR PROMPTS
+# ============================================================================
+
+"""
+Topic.raw_text keeps everything upload_and_extract wrote - OCR metadata
+lines, `--- Page N ---` separators, line-break hyphens, ragged spacing and
+the running header/footer printed on every page. None of it helps the
+model, so build_prompt() sends normalize_ocr_text(raw_text) instead.
+
+raw_text itself is never modified: chunking still splits on the page
+markers, and the AI refine cache keys stay on the stored text.
+"""
+
+import re
+
+from .rate_limit import estimate_tokens
+
+
+OCR_METADATA = re.compile(r'^[ \t]*\[(?:OCR Engine:[^\]\n]*|No text detected)\][ \t]*$', re.MULTILINE)
+PAGE_MARKER = re.compile(r'^[ \t]*--- Page \d+ ---[ \t]*$', re.MULTILINE)
+LINE_BREAK_HYPHEN = re.compile(r'(\w+)-[ \t]*\n[ \t]*([a-z]\w*)')
+WORD = re.compile(r'\w+')
+SPACE_RUN = re.compile(r'[^\S\n]+')
+BLANK_LINE_RUN = re.compile(r'\n{3,}')
+DIGITS = re.compile(r'\d+')
+# Captions and numbered items repeat in shape ("Figure 1", "Figure 2") but are content
+NUMBERED_CONTENT = re.compile(
+    r'^\W*(?:fig(?:ure)?|table|exercise|example|equation|eq|problem|question|activity|step)\b', re.IGNORECASE
+)
+PAGE_NUMBER = re.compile(r'^\W*(?:page\s*)?\d+(?:\s*(?:/|of)\s*\d+)?\W*$', re.IGNORECASE)
+
+EDGE_LINES = 2        # lines at the top and bottom of a page checked for running headers
+MAX_HEADER_WORDS = 8  # longer lines are content, even if they repeat
+MIN_PAGES = 3         # fewer pages cannot show a repeating header
+MIN_SHARE = 0.5       # a header must appear on at least half of the pages
+
+
+# ==================================================
+# RUNNING HEADERS / FOOTERS
+# ==================================================
+
+def _header_key(line: str) -> str:
+    """Compare lines ignoring case, spacing and page numbers ("Page 3" == "Page 4")."""
+    return DIGITS.sub('#', ' '.join(line.lower().split()))
+
+
+def _may_be_header(line: str) -> bool:
+    """
+    Short, mostly non-digit lines that are not captions - or a bare page
+    number. Digits are masked in _header_key, so without this "Table 2"
+    on one page and "Table 3" on the next would count as a running header.
+    """
+    if len(line.split()) > MAX_HEADER_WORDS or NUMBERED_CONTENT.match(line):
+        return False
+    if PAGE_NUMBER.match(line):
+        return True
+    digits = sum(ch.isdigit() for ch in line)
+    return digits * 2 < sum(ch.isalnum() for ch in line)
+
+
+def _edge_indexes(lines: list) -> list:
+    """Indexes of header-like lines among the first and last EDGE_LINES non-empty lines of a page."""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    edges = set(filled[:EDGE_LINES] + filled[-EDGE_LINES:])
+    return sorted(i for i in edges if _may_be_header(lines[i]))
+
+
+def strip_running_headers(pages: list) -> list:
+    """
+    Remove lines that repeat at the top or bottom of most pages
+    (book title, chapter name, page numbers). Pages are lists of lines.
+    """
+    if len(pages) < MIN_PAGES:
+        return pages
+
+    seen_on = {}
+    for number, lines in enumerate(pages):
+        for i in _edge_indexes(lines):
+            seen_on.setdefault(_header_key(lines[i]), set()).add(number)
+
+    repeated = {
+        key for key, page_numbers in seen_on.items()
+        if len(page_numbers) >= max(MIN_PAGES - 1, len(pages) * MIN_SHARE)
+    }
+    if not repeated:
+        return pages
+
+    cleaned = []
+    for lines in pages:
+        drop = {i for i in _edge_indexes(lines) if _header_key(lines[i]) in repeated}
+        cleaned.append([line for i, line in enumerate(lines) if i not in drop])
+    return cleaned
+
+
+# ==================================================
+# LINE-BREAK HYPHENS
+# ==================================================
+
+def join_line_break_hyphens(text: str) -> str:
+    """
+    Re-join a word hyphenated across a line break only if the joined word
+    occurs elsewhere in the text ("photo-\\nsynthesis" when "photosynthesis"
+    does). Otherwise it may be a real compound ("well-\\nknown"), so only
+    the line break is dropped and the hyphen kept.
+    """
+    vocabulary = {word.lower() for word in WORD.findall(LINE_BREAK_HYPHEN.sub(' ', text))}
+
+    def join(match):
+        head, tail = match.groups()
+        if (head + tail).lower() in vocabulary:
+            return head + tail
+        return f"{head}-{tail}"
+
+    return LINE_BREAK_HYPHEN.sub(join, text)
+
+
+# ==================================================
+# NORMALIZER
+# ==================================================
+
+def normalize_ocr_text(raw_text: str) -> str:
+    """
+    Prompt-ready OCR text:
+    - drops [OCR Engine: ... | Confidence: ...] and [No text detected] lines
+    - removes repeated running headers/footers, then the page markers
+    - re-joins words hyphenated across a line break (see join_line_break_hyphens)
+    - collapses runs of spaces and blank lines
+    """
+    text = OCR_METADATA.sub('', (raw_text or '').replace('\r\n', '\n'))
+
+    pages = [page.split('\n') for page in PAGE_MARKER.split(text)]
+    pages = strip_running_headers([lines for lines in pages if any(line.strip() for line in lines)])
+    text = '\n\n'.join('\n'.join(lines) for lines in pages)
+
+    text = join_line_break_hyphens(text)
+    text = '\n'.join(SPACE_RUN.sub(' ', line).strip() for line in text.split('\n'))
+    return BLANK_LINE_RUN.sub('\n\n', text).strip()
+
+
+def normalization_report(raw_text: str, normalized_text: str) -> dict:
+    """Estimated prompt tokens before/after normalization."""
+    before = estimate_tokens(raw_text or '')
+    after = estimate_tokens(normalized_text or '')
+    return {
+        'tokens_before': before,
+        'tokens_after': after,
+        'tokens_saved': before - after,
+        'reduction_percent': round(100 * (before - after) / before, 1) if before else 0.0,
+    }
+
+
+def log_normalization(raw_text: str):
+    """
+    Log the estimated token reduction for a topic's text. Called once per
+    refine (chunking.py) - prompts are built per chunk and per level, and
+    each would log again.
+    """
+    report = normalization_report(raw_text, normalize_ocr_text(raw_text))
+    if report['tokens_saved'] > 0:
+        print(
+            f"📉 OCR normalizer: {report['tokens_before']} → {report['tokens_after']} tokens "
+            f"(-{report['reduction_percent']}%)"
+        )
@@ -1,131 +1,484 @@
 # scan/utils/ocr.py
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
 import requests
 from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .http import get_session, get_timeout
+from .multipart import MultipartEncoder, seekable
+from .ocr_cache import get_cached_page, image_hash, set_cached_page
+from .local_ocr import local_ocr_available, ocr_images_locally
 
 # Your Colab OCR Engine URL (from ngrok)
 COLAB_OCR_URL = getattr(settings, 'COLAB_OCR_URL', None)
 
-def extract_text_from_image(image_path):
-    """
-    Extract text by calling Colab OCR Engine API (single image)
+# Gateway errors while the Colab runtime / ngrok tunnel restarts
+RETRY_STATUSES = (502, 503, 504)
+
+PAGE_LONG_SIDE_INCHES = 11.7  # A4 height; Letter is 11in
+UPLOAD_EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp'}
+
+_preprocess_pool = None
+_preprocess_pool_lock = threading.Lock()
+
+
+# ==================================================
+# PREPROCESSING
+# ==================================================
+
+def preprocess_image(source, max_side, image_format='JPEG', quality=85):
     """
-    if not COLAB_OCR_URL:
-        return "[Error: COLAB_OCR_URL not configured in settings]"
+    Shrink one page photo for OCR: EXIF rotation, grayscale, downscale so
+    the long side is at most `max_side` px, re-encode.
+    
+    Runs in a worker process, so everything it needs comes in as arguments.
+    `source` is the image's path on disk, or its bytes for uploads that
+    only exist in memory - the photo itself is never sent to the pool.
     
+    Returns:
+        tuple: (bytes to upload or None, stats dict). None means keep the
+               original: it is not an image or re-encoding would not shrink it.
+    """
+    start = time.time()
+    size = os.path.getsize(source) if isinstance(source, str) else len(source)
+    stats = {'original_bytes': size, 'bytes': size, 'seconds': 0.0, 'preprocessed': False}
+    data = None
     try:
-        # Open image file
-        with open(image_path, 'rb') as f:
-            files = {'file': f}
-            
-            # Call Colab API
-            response = requests.post(
-                f"{COLAB_OCR_URL}/extract-text",
-                files=files,
-                timeout=60  # 60 seconds timeout
+        with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as img:
+            page = ImageOps.exif_transpose(img).convert('L')
+            page.thumbnail((max_side, max_side), Image.LANCZOS)
+            out = io.BytesIO()
+            page.save(out, image_format, quality=quality, optimize=True)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        stats['error'] = str(e)
+    else:
+        if out.tell() < size:
+            data = out.getvalue()
+            stats.update({'bytes': len(data), 'preprocessed': True, 'size': page.size})
+    stats['seconds'] = round(time.time() - start, 3)
+    return data, stats
+
+
+def _get_preprocess_pool():
+    """Shared process pool (spawned, so workers never inherit server threads)."""
+    global _preprocess_pool
+    with _preprocess_pool_lock:
+        if _preprocess_pool is None:
+            _preprocess_pool = ProcessPoolExecutor(
+                max_workers=settings.OCR_PREPROCESS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
             )
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('success'):
-                text = result.get('text', '')
-                engine = result.get('engine_used', 'unknown')
-                confidence = result.get('confidence', 0)
-                
-                # Add metadata comment at top
-                metadata = f"[OCR Engine: {engine} | Confidence: {confidence:.1f}%]\n\n"
-                return metadata + text if text else "[No text detected]"
-            else:
-                return "[OCR processing failed]"
+        return _preprocess_pool
+
+
+def _reset_preprocess_pool():
+    global _preprocess_pool
+    with _preprocess_pool_lock:
+        if _preprocess_pool is not None:
+            _preprocess_pool.shutdown(wait=False, cancel_futures=True)
+        _preprocess_pool = None
+
+
+def _upload_name(filename, image_format):
+    return os.path.splitext(filename)[0] + UPLOAD_EXTENSIONS.get(image_format.upper(), '')
+
+
+def _local_path(fileobj):
+    """
+    Absolute path of a file object stored on local disk (a spooled upload,
+    a FileSystemStorage FieldFile, an open file), or None.
+    """
+    if hasattr(fileobj, 'temporary_file_path'):
+        return fileobj.temporary_file_path()
+    try:
+        path = fileobj.path
+    except (AttributeError, NotImplementedError, ValueError):
+        path = getattr(fileobj, 'name', None)
+    return path if isinstance(path, str) and os.path.isabs(path) and os.path.isfile(path) else None
+
+
+def preprocess_uploads(uploads):
+    """
+    Preprocess page images in parallel before they go to the OCR engine.
+    
+    Files on disk go to the pool by path; only in-memory uploads (at most
+    FILE_UPLOAD_MAX_MEMORY_SIZE each) are read here. Only the shrunk
+    images come back, so memory grows with their size, not the photos'.
+    
+    Args:
+        uploads: List of (filename, file object) pairs
+    
+    Returns:
+        List of (filename, file object) pairs ready for upload, same order.
+        Pages that were not shrunk keep their name and file object.
+    """
+    if not settings.OCR_PREPROCESS or not uploads:
+        return uploads
+    
+    start = time.time()
+    options = (
+        round(PAGE_LONG_SIDE_INCHES * settings.OCR_TARGET_DPI),
+        settings.OCR_UPLOAD_FORMAT.upper(),
+        settings.OCR_UPLOAD_QUALITY,
+    )
+    starts = [fileobj.tell() if seekable(fileobj) else None for _, fileobj in uploads]
+    sources = [_local_path(fileobj) or fileobj.read() for _, fileobj in uploads]
+    
+    results = None
+    if len(sources) > 1 and settings.OCR_PREPROCESS_WORKERS > 1:
+        try:
+            pool = _get_preprocess_pool()
+            results = list(pool.map(preprocess_image, sources, *[[option] * len(sources) for option in options]))
+        except (BrokenProcessPool, OSError) as e:
+            print(f"OCR preprocess pool failed ({e}), preprocessing in-process")
+            _reset_preprocess_pool()
+    if results is None:
+        results = [preprocess_image(source, *options) for source in sources]
+    
+    prepared = []
+    for (filename, fileobj), start_pos, source, (data, stats) in zip(uploads, starts, sources, results):
+        if stats['preprocessed']:
+            prepared.append((_upload_name(filename, options[1]), io.BytesIO(data)))
+        elif isinstance(source, bytes) and start_pos is None:
+            prepared.append((filename, io.BytesIO(source)))  # a stream that was read and cannot rewind
         else:
-            return f"[OCR API Error {response.status_code}]"
-            
-    except requests.exceptions.Timeout:
+            if isinstance(source, bytes):
+                fileobj.seek(start_pos)
+            prepared.append((filename, fileobj))
+    
+    original = sum(stats['original_bytes'] for _, stats in results)
+    final = sum(stats['bytes'] for _, stats in results)
+    page_seconds = sum(stats['seconds'] for _, stats in results) / len(results)
+    saved = 100 * (original - final) / original if original else 0
+    print(
+        f"🗜️ OCR preprocess: {len(results)} page(s) {original / 1e6:.2f} MB → {final / 1e6:.2f} MB "
+        f"(-{saved:.0f}%) in {time.time() - start:.2f}s ({page_seconds:.2f}s/page)"
+    )
+    return prepared
+
+
+# ==================================================
+# OCR REQUESTS
+# ==================================================
+
+class OCRError(Exception):
+    """The OCR engine answered, but without usable text. str() is the page message."""
+
+
+def _page_text(item):
+    """OCR text with the engine/confidence metadata line the prompts expect."""
+    text = item.get('text', '')
+    engine = item.get('engine_used', 'unknown')
+    confidence = item.get('confidence', 0)
+    
+    # Add metadata comment at top
+    metadata = f"[OCR Engine: {engine} | Confidence: {confidence:.1f}%]\n\n"
+    return metadata + text if text else "[No text detected]"
+
+
+def _error_message(error, batch=False):
+    """The bracketed text a failed page gets in place of its OCR text."""
+    if isinstance(error, OCRError):
+        return str(error)
+    if isinstance(error, requests.exceptions.Timeout):
+        if batch:
+            return "[OCR timeout - batch too large or connection slow]"
         return "[OCR timeout - image might be too large or connection slow]"
-    except requests.exceptions.ConnectionError:
+    if isinstance(error, requests.exceptions.ConnectionError):
         return "[Cannot connect to OCR engine - is Colab running?]"
-    except Exception as e:
-        return f"[OCR Error: {str(e)}]"
+    return f"[OCR Error: {str(error)}]"
 
 
-def extract_text_from_images_batch(image_paths):
+def _page_result(page, item, attempts):
+    return {
+        'page': page,
+        'text': _page_text(item),
+        'engine': item.get('engine_used', 'unknown'),
+        'confidence': item.get('confidence', 0),
+        'success': True,
+        'attempts': attempts,
+        'error': '',
+        'cached': False,
+    }
+
+
+def _failed_page(page, message, attempts):
+    return {
+        'page': page,
+        'text': message,
+        'engine': 'error',
+        'confidence': 0,
+        'success': False,
+        'attempts': attempts,
+        'error': message,
+        'cached': False,
+    }
+
+
+def _post_files(endpoint, fields, read_timeout, retries=None):
+    """
+    Stream file fields to the OCR engine as multipart/form-data.
+    
+    Uploads are read chunk by chunk into the request - no temp copies.
+    A dropped connection or gateway error re-sends the same body after
+    rewinding the files (OCR_UPLOAD_RETRIES times unless `retries` is given).
+    """
+    body = MultipartEncoder(fields)
+    retries = settings.OCR_UPLOAD_RETRIES if retries is None else retries
+    try:
+        for attempt in range(retries + 1):
+            if attempt:
+                body.rewind()
+                time.sleep(attempt)
+            try:
+                response = get_session('ocr').post(
+                    f"{COLAB_OCR_URL}{endpoint}",
+                    data=body,
+                    headers={'Content-Type': body.content_type},
+                    timeout=get_timeout(read_timeout),
+                )
+            except requests.exceptions.ConnectionError:
+                if attempt >= retries:
+                    raise
+                print(f"OCR upload dropped, retrying ({attempt + 1}/{retries})")
+                continue
+            
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                print(f"OCR engine returned {response.status_code}, retrying ({attempt + 1}/{retries})")
+                continue
+            return response
+    finally:
+        body.close()
+
+
+def _post_ocr(endpoint, fields, read_timeout, retries=None, failure_message="[OCR processing failed]"):
+    """_post_files() returning the engine's JSON, or raising OCRError for a non-200 or unsuccessful answer."""
+    response = _post_files(endpoint, fields, read_timeout, retries)
+    if response.status_code != 200:
+        raise OCRError(f"[OCR API Error {response.status_code}]")
+    result = response.json()
+    if not result.get('success'):
+        raise OCRError(failure_message)
+    return result
+
+
+def _ocr_page(page, filename, fileobj, attempts=0):
+    """
+    OCR one page on /extract-text, retrying it on its own with exponential
+    backoff (OCR_PAGE_RETRIES). `attempts` counts tries already spent on the
+    page, e.g. in a failed sub-batch.
+    
+    Returns:
+        dict: page result (see extract_text_from_uploads_batch)
+    """
+    start = fileobj.tell() if seekable(fileobj) else None
+    retries = settings.OCR_PAGE_RETRIES if start is not None else 0
+    message = ''
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(settings.OCR_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+        if start is not None:
+            fileobj.seek(start)
+        try:
+            result = _post_ocr('/extract-text', [('file', filename, fileobj, None)], read_timeout=60, retries=0)
+            return _page_result(page, result, attempts + attempt + 1)
+        except (requests.exceptions.RequestException, OCRError, ValueError) as e:
+            message = _error_message(e)
+            print(f"OCR page {page} failed (attempt {attempt + 1}/{retries + 1}): {message}")
+    return _failed_page(page, message, attempts + retries + 1)
+
+
+def _ocr_sub_batch(pages):
+    """
+    OCR consecutive pages [(page, filename, fileobj), ...] in one
+    /extract-text-batch call. Pages the batch could not read - or all of
+    them if the call failed - are retried one by one.
+    """
+    if len(pages) == 1:
+        return [_ocr_page(*pages[0])]
+    
+    starts = [fileobj.tell() if seekable(fileobj) else None for _, _, fileobj in pages]
+    try:
+        fields = [(f'file{idx}', filename, fileobj, None) for idx, (_, filename, fileobj) in enumerate(pages, 1)]
+        # 2 minutes per sub-batch
+        items = _post_ocr('/extract-text-batch', fields, read_timeout=120,
+                          failure_message="[Batch OCR processing failed]").get('results', [])
+    except (requests.exceptions.RequestException, OCRError, ValueError) as e:
+        print(f"OCR pages {pages[0][0]}-{pages[-1][0]} failed as a batch ({_error_message(e, batch=True)}), retrying each page")
+        items = []
+    
+    results = []
+    for idx, (page, filename, fileobj) in enumerate(pages):
+        item = items[idx] if idx < len(items) else None
+        if item is not None and item.get('success', True) and item.get('text') is not None:
+            results.append(_page_result(page, item, 1))
+        elif starts[idx] is None:
+            # Already streamed and cannot be re-read
+            results.append(_failed_page(page, "[Batch OCR processing failed]", 1))
+        else:
+            fileobj.seek(starts[idx])
+            results.append(_ocr_page(page, filename, fileobj, attempts=1))
+    return results
+
+
+def _remote_ocr_down():
+    """True if the cached health probe says the OCR engine is down (never blocks)."""
+    from .health import get_health  # health imports this module
+    return get_health('ocr')['ok'] is False
+
+
+def _ocr_locally(pages, starts, remote_results):
+    """
+    Local Tesseract results for pages the OCR engine did not (or could not) read.
+    A page that fails locally too keeps its remote error, if it has one.
+    Local text is not cached - the engine's result is worth another try later.
+    """
+    if not pages:
+        return []
+    images = []
+    for idx, _, fileobj in pages:
+        if starts[idx] is not None:
+            fileobj.seek(starts[idx])
+        images.append(fileobj.read())
+    
+    results = []
+    for (idx, _, _), (item, error) in zip(pages, ocr_images_locally(images)):
+        remote = remote_results.get(idx)
+        attempts = (remote['attempts'] if remote else 0) + 1
+        if item is not None:
+            results.append(_page_result(idx, item, attempts))
+        else:
+            results.append(remote or _failed_page(idx, f"[Local OCR Error: {error}]", attempts))
+    return results
+
+
+def extract_text_from_upload(fileobj, filename='page.jpg'):
+    """
+    Extract text by calling Colab OCR Engine API (single image).
+    `fileobj` is any readable file object, e.g. a Django UploadedFile.
+    """
+    if not COLAB_OCR_URL:
+        return "[Error: COLAB_OCR_URL not configured in settings]"
+    
+    return extract_text_from_uploads_batch([(filename, fileobj)])[0]['text']
+
+
+def extract_text_from_uploads_batch(uploads, on_page=None, preprocess=True, use_cache=True):
     """
     Extract text from multiple images using batch processing (FASTER)
     
+    Pages go out in sub-batches of OCR_SUB_BATCH_SIZE, up to
+    OCR_BATCH_CONCURRENCY at a time. A page that fails is retried on its
+    own, so one bad page or tunnel hiccup no longer fails the whole scan.
+    Pages the engine still cannot read - or all pages, when its health
+    probe says it is down - go to local Tesseract (local_ocr.py).
+    Pages already OCR'd (same image bytes) come from the OCR cache and are
+    not sent at all.
+    
     Args:
-        image_paths: List of image file paths
+        uploads: List of (filename, file object) pairs, e.g. Django UploadedFiles
+        on_page: Optional callable, called with each page result as soon as
+                 it is ready (cache hits first, then as sub-batches finish)
+        preprocess: False if the uploads already went through preprocess_uploads()
+        use_cache: False to OCR every page again (results are still cached)
         
     Returns:
-        List of dicts with format:
+        List of dicts in page order:
         [
-            {'page': 1, 'text': '...', 'engine': 'EasyOCR', 'confidence': 85.5},
-            {'page': 2, 'text': '...', 'engine': 'Tesseract', 'confidence': 88.0},
+            {'page': 1, 'text': '...', 'engine': 'EasyOCR', 'confidence': 85.5,
+             'success': True, 'attempts': 1, 'error': '', 'cached': False},
+            {'page': 2, 'text': '[OCR timeout - ...]', 'engine': 'error', 'confidence': 0,
+             'success': False, 'attempts': 3, 'error': '[OCR timeout - ...]', 'cached': False},
             ...
         ]
     """
-    if not COLAB_OCR_URL:
-        return [{"page": i+1, "text": "[Error: COLAB_OCR_URL not configured]", "engine": "error", "confidence": 0} 
-                for i in range(len(image_paths))]
+    if not COLAB_OCR_URL and not local_ocr_available():
+        return [_failed_page(idx, "[Error: COLAB_OCR_URL not configured]", 0) for idx in range(1, len(uploads) + 1)]
     
     try:
-        # Open all images and prepare for batch upload
-        files = {}
-        file_handles = []
-        
-        for idx, img_path in enumerate(image_paths):
-            f = open(img_path, 'rb')
-            file_handles.append(f)
-            files[f'file{idx+1}'] = f
-        
-        try:
-            # Call batch API endpoint
-            response = requests.post(
-                f"{COLAB_OCR_URL}/extract-text-batch",
-                files=files,
-                timeout=120  # 2 minutes for batch
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    results = []
-                    for idx, item in enumerate(result.get('results', []), 1):
-                        text = item.get('text', '')
-                        engine = item.get('engine_used', 'unknown')
-                        confidence = item.get('confidence', 0)
-                        
-                        # Add metadata
-                        metadata = f"[OCR Engine: {engine} | Confidence: {confidence:.1f}%]\n\n"
-                        
-                        results.append({
-                            'page': idx,
-                            'text': metadata + text if text else "[No text detected]",
-                            'engine': engine,
-                            'confidence': confidence
-                        })
-                    
-                    return results
-                else:
-                    # Batch failed, return error for all
-                    return [{"page": i+1, "text": "[Batch OCR processing failed]", "engine": "error", "confidence": 0} 
-                            for i in range(len(image_paths))]
-            else:
-                return [{"page": i+1, "text": f"[OCR API Error {response.status_code}]", "engine": "error", "confidence": 0} 
-                        for i in range(len(image_paths))]
-        
-        finally:
-            # Close all file handles
-            for f in file_handles:
-                f.close()
-                
-    except requests.exceptions.Timeout:
-        return [{"page": i+1, "text": "[OCR timeout - batch too large or connection slow]", "engine": "error", "confidence": 0} 
-                for i in range(len(image_paths))]
-    except requests.exceptions.ConnectionError:
-        return [{"page": i+1, "text": "[Cannot connect to OCR engine - is Colab running?]", "engine": "error", "confidence": 0} 
-                for i in range(len(image_paths))]
+        if preprocess:
+            uploads = preprocess_uploads(uploads)
     except Exception as e:
-        return [{"page": i+1, "text": f"[OCR Error: {str(e)}]", "engine": "error", "confidence": 0} 
-                for i in range(len(image_paths))]
+        return [_failed_page(idx, f"[OCR Error: {str(e)}]", 0) for idx in range(1, len(uploads) + 1)]
+    
+    results = {}
+    hashes = {}
+    pages = []
+    for idx, (filename, fileobj) in enumerate(uploads, 1):
+        hashes[idx] = image_hash(fileobj)
+        cached = get_cached_page(hashes[idx]) if use_cache else None
+        if cached:
+            results[idx] = {**cached, 'page': idx, 'success': True, 'attempts': 0, 'error': '', 'cached': True}
+            if on_page:
+                on_page(results[idx])
+        else:
+            pages.append((idx, filename, fileobj))
+    starts = {idx: fileobj.tell() if seekable(fileobj) else None for idx, _, fileobj in pages}
+    
+    local = local_ocr_available()
+    if pages and COLAB_OCR_URL and local and _remote_ocr_down():
+        print("OCR engine reported down - using local Tesseract")
+        remote_pages = []
+    else:
+        remote_pages = pages if COLAB_OCR_URL else []
+    fallback = [page for page in pages if page not in remote_pages]
+    
+    size = max(1, settings.OCR_SUB_BATCH_SIZE)
+    sub_batches = [remote_pages[i:i + size] for i in range(0, len(remote_pages), size)]
+    
+    start = time.time()
+    if sub_batches:
+        workers = max(1, min(settings.OCR_BATCH_CONCURRENCY, len(sub_batches)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_ocr_sub_batch, batch) for batch in sub_batches]
+            for future in as_completed(futures):
+                for result in future.result():
+                    results[result['page']] = result
+                    if result['success'] and result['text'] != "[No text detected]":
+                        set_cached_page(hashes[result['page']], result)
+                    if not result['success'] and local and starts[result['page']] is not None:
+                        fallback.append(next(page for page in pages if page[0] == result['page']))
+                    elif on_page:
+                        on_page(result)
+    
+    for result in _ocr_locally(fallback, starts, results):
+        results[result['page']] = result
+        if on_page:
+            on_page(result)
+    
+    results = [results[idx] for idx in sorted(results)]
+    failed = [result['page'] for result in results if not result['success']]
+    print(
+        f"OCR: {len(results) - len(failed)}/{len(results)} pages ({len(results) - len(pages)} cached) "
+        f"in {len(sub_batches)} sub-batch(es) in {time.time() - start:.1f}s"
+        + (f", failed pages: {failed}" if failed else "")
+    )
+    return results
+
+
+def extract_text_from_image(image_path):
+    """extract_text_from_upload() for an image file on disk."""
+    with open(image_path, 'rb') as f:
+        return extract_text_from_upload(f, os.path.basename(image_path))
+
+
+def extract_text_from_images_batch(image_paths):
+    """extract_text_from_uploads_batch() for image files on disk."""
+    handles = [open(path, 'rb') for path in image_paths]
+    try:
+        return extract_text_from_uploads_batch([
+            (os.path.basename(path), f) for path, f in zip(image_paths, handles)
+        ])
+    finally:
+        for f in handles:
+            f.close()
 
 
 def test_ocr_connection():
@@ -134,7 +487,7 @@ def test_ocr_connection():
         return False, "COLAB_OCR_URL not configured"
     
     try:
-        response = requests.get(f"{COLAB_OCR_URL}/health", timeout=5)
+        response = get_session('ocr').get(f"{COLAB_OCR_URL}/health", timeout=get_timeout(5))
         if response.status_code == 200:
             data = response.json()
             batch_support = data.get('batch_support', False)
@@ -0,0 +1,119 @@
+# ============================================================================
+# FILE: scan/utils/ocr_cache.py - CONTENT-ADDRESSED CACHE FOR PAGE OCR
+# ============================================================================
+
+"""
+Caches per-page OCR results {'text', 'engine', 'confidence'} keyed by the
+SHA-256 of the image bytes sent to the OCR engine - i.e. after
+preprocessing, so the same photo re-uploaded after a failed save or an
+expired session hits even though the upload itself is a new file.
+
+Stored in the 'ocr' cache alias (LRUFileBasedCache, shared by all workers).
+Age eviction = the alias TIMEOUT, size eviction = OPTIONS['MAX_ENTRIES'],
+least recently used pages first.
+"""
+
+import hashlib
+import os
+
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+from .multipart import CHUNK_SIZE, seekable
+
+
+CACHE_ALIAS = 'ocr'
+
+
+# ==================================================
+# BACKEND
+# ==================================================
+
+class LRUFileBasedCache(FileBasedCache):
+    """
+    FileBasedCache that culls expired entries first, then the least
+    recently used ones, instead of a random sample. A hit bumps the
+    file's mtime, which is what "recently used" is measured by.
+    """
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = super().get(key, missing, version)
+        if value is missing:
+            return default
+        try:
+            os.utime(self._key_to_file(key, version))
+        except OSError:
+            pass  # removed by another process meanwhile
+        return value
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+
+        live = []
+        for fname in filelist:
+            try:
+                with open(fname, 'rb') as f:
+                    expired = self._is_expired(f)  # deletes the file if so
+                if not expired:
+                    live.append((os.path.getmtime(fname), fname))
+            except OSError:
+                pass
+        if len(live) < self._max_entries:
+            return
+
+        live.sort()
+        for _, fname in live[:len(live) // self._cull_frequency]:
+            self._delete(fname)
+
+
+# ==================================================
+# PAGE RESULTS
+# ==================================================
+
+def image_hash(fileobj):
+    """
+    SHA-256 of a page image's bytes, read from the current position and
+    rewound afterwards. None for a non-seekable file (it is not cached).
+    """
+    if not seekable(fileobj):
+        return None
+    start = fileobj.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    fileobj.seek(start)
+    return digest.hexdigest()
+
+
+def make_ocr_cache_key(content_hash) -> str:
+    return 'ocr:' + content_hash
+
+
+def get_cached_page(content_hash):
+    """Return the cached {'text', 'engine', 'confidence'} of a page or None."""
+    if not content_hash:
+        return None
+    try:
+        return caches[CACHE_ALIAS].get(make_ocr_cache_key(content_hash))
+    except Exception as e:
+        print(f"OCR cache read failed: {e}")
+        return None
+
+
+def set_cached_page(content_hash, result):
+    """Store a successful page result. Cache failures never break a scan."""
+    if not content_hash:
+        return
+    try:
+        caches[CACHE_ALIAS].set(make_ocr_cache_key(content_hash), {
+            'text': result['text'],
+            'engine': result['engine'],
+            'confidence': result['confidence'],
+        })
+    except Exception as e:
+        print(f"OCR cache write failed: {e}")
@@ -0,0 +1,478 @@
+# ============================================================================
+# FILE: scan/utils/ocr_jobs.py - DB-BACKED OCR JOB QUEUE FOR SCAN BATCHES
+# ============================================================================
+
+"""
+upload_and_extract used to hold the request (and a worker) for the whole
+OCR batch. Now start_scan_batch() stores each uploaded photo on a pending
+ScanPage of a new ScanBatch and returns at once; `manage.py run_ocr_worker`
+claims pending batches and OCRs them:
+
+    pending -> processing -> completed (at least one page read) / failed
+
+As with the AI refine queue (refine_queue.py), the rows are the queue:
+claiming is a conditional UPDATE, so several worker processes can share
+it, and a restarted web process loses nothing. A batch whose worker died
+goes back in the queue after OCR_JOB_TIMEOUT (at most OCR_JOB_MAX_ATTEMPTS
+runs); one that no worker picked up by then is failed on the next poll.
+
+Stored photos are only kept while a page may still be re-OCR'd: they are
+deleted when the batch is saved as a topic or fails, and
+`manage.py purge_scan_images` removes those of abandoned batches after
+SCAN_IMAGE_RETENTION_DAYS.
+
+Deployments without a worker still OCR: with OCR_JOB_IN_PROCESS, a batch
+no worker has claimed OCR_JOB_IN_PROCESS_AFTER seconds after it was
+queued is claimed - by the same conditional UPDATE - and run on a thread
+of the web process that queued it (run_unclaimed_in_process).
+
+The worker first replaces each stored photo by its preprocessed image and
+records its content hash, a sub-batch at a time, then saves every page as
+soon as its OCR result arrives, so the scan page can poll
+scan_batch_status and show pages while others are running. Only pending
+pages are OCR'd, so a re-run carries on where the last one stopped. A
+single page can be re-OCR'd from its stored image (start_page_rescan): it
+goes back to pending and its batch back in the queue. Pages that look
+like an earlier photo of the same upload (page_hash.py) are flagged with
+duplicate_of; near-exact repeats (SCAN_SKIP_DUPLICATE_MAX_DISTANCE) are
+also marked 'duplicate' and not OCR'd unless SCAN_SKIP_DUPLICATE_PAGES is
+off.
+"""
+
+import os
+import threading
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import ScanBatch, ScanPage, Topic
+from .ocr import extract_text_from_uploads_batch, preprocess_uploads
+from .ocr_cache import image_hash
+from .page_hash import closest_match, ink_hash
+
+
+# ==================================================
+# ENQUEUE / CLAIM
+# ==================================================
+
+def start_scan_batch(uploads):
+    """
+    Queue uploaded photos as a ScanBatch for run_ocr_worker. Each photo is
+    written to its ScanPage.image straight from the upload (in chunks), so
+    no page is held in memory.
+
+    Args:
+        uploads: Django UploadedFiles, in page order
+
+    Returns:
+        ScanBatch: the new batch (status 'pending')
+    """
+    with transaction.atomic():
+        batch = ScanBatch.objects.create(page_count=len(uploads))
+        pages = []
+        for idx, upload in enumerate(uploads, 1):
+            page = ScanPage(batch=batch, page_number=idx, filename=upload.name[:255])
+            page.image.save(os.path.basename(upload.name), upload, save=False)
+            pages.append(page)
+        ScanPage.objects.bulk_create(pages)
+    return batch
+
+
+def start_page_rescan(page):
+    """
+    Re-OCR one page from its stored image, skipping the OCR cache. The page
+    goes back to 'pending' and its batch back in the queue until the new
+    result is in. This is also how a page wrongly skipped as a duplicate is
+    brought back.
+
+    Returns:
+        bool: False if the page has no stored image
+    """
+    if not page.image:
+        return False
+    now = timezone.now()
+    with transaction.atomic():
+        # A rescanned duplicate is wanted after all - it joins the topic like any other page
+        ScanPage.objects.filter(id=page.id).update(
+            status='pending', error_message='', duplicate_of=None, updated_at=now
+        )
+        ScanBatch.objects.filter(id=page.batch_id).update(
+            status='pending', error_message='', started_at=None, finished_at=None, attempts=0, updated_at=now
+        )
+    return True
+
+
+def claim_scan_batch(batch_id):
+    """
+    Atomically move a pending batch to processing.
+    Returns True if this caller owns the batch now.
+    """
+    now = timezone.now()
+    claimed = ScanBatch.objects.filter(id=batch_id, status='pending').update(
+        status='processing',
+        started_at=now,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return claimed == 1
+
+
+def requeue_stale_scan_batches():
+    """
+    Put batches whose worker died mid-run back in the queue; fail those
+    that already had OCR_JOB_MAX_ATTEMPTS runs.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.OCR_JOB_TIMEOUT)
+    stale = ScanBatch.objects.filter(status='processing', started_at__lt=cutoff)
+    for batch_id in stale.filter(attempts__gte=settings.OCR_JOB_MAX_ATTEMPTS).values_list('id', flat=True):
+        fail_scan_batch(batch_id, "OCR job stopped before finishing - please upload the pages again")
+    return stale.update(status='pending', started_at=None, updated_at=timezone.now())
+
+
+def claim_next_scan_batches(limit):
+    """Claim up to `limit` pending batches, oldest first."""
+    if limit <= 0:
+        return []
+
+    requeue_stale_scan_batches()
+
+    candidates = ScanBatch.objects.filter(status='pending', is_deleted=False).order_by(
+        'updated_at'
+    ).values_list('id', flat=True)[:limit * 2]
+
+    claimed = []
+    for batch_id in candidates:
+        if claim_scan_batch(batch_id):
+            claimed.append(batch_id)
+        if len(claimed) >= limit:
+            break
+
+    return list(ScanBatch.objects.filter(id__in=claimed))
+
+
+def run_unclaimed_in_process(batch_id):
+    """
+    Fallback for deployments without run_ocr_worker: wait
+    OCR_JOB_IN_PROCESS_AFTER seconds on a background thread, then OCR the
+    batch here if no worker has claimed it. Does nothing when
+    OCR_JOB_IN_PROCESS is off.
+    """
+    if not settings.OCR_JOB_IN_PROCESS:
+        return
+
+    def run():
+        time.sleep(settings.OCR_JOB_IN_PROCESS_AFTER)
+        close_old_connections()
+        try:
+            if claim_scan_batch(batch_id):
+                print(f"Scan batch {batch_id}: no OCR worker took it - running it in the web process")
+                run_scan_batch(ScanBatch.objects.get(id=batch_id))
+        except Exception as e:
+            print(f"Scan batch {batch_id}: in-process OCR failed: {e}")
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name=f'scan-batch-{batch_id}', daemon=True).start()
+
+
+# ==================================================
+# RUN
+# ==================================================
+
+def _save_page(page, result):
+    """Persist one page result from extract_text_from_uploads_batch."""
+    ScanPage.objects.filter(id=page.id).update(
+        status='completed' if result['success'] else 'failed',
+        text=result['text'],
+        engine=result['engine'],
+        confidence=result['confidence'],
+        attempts=result['attempts'],
+        cached=result['cached'],
+        error_message=result['error'],
+        updated_at=timezone.now(),
+    )
+
+
+def _prepare_pages(batch):
+    """
+    Replace each new page's stored photo with its preprocessed image and
+    record its content hash and ink hash, OCR_SUB_BATCH_SIZE pages at a
+    time. A page whose ink hash matches an earlier page of the batch gets
+    duplicate_of; it is marked 'duplicate' (and not OCR'd) only when it
+    is within SCAN_SKIP_DUPLICATE_MAX_DISTANCE and SCAN_SKIP_DUPLICATE_PAGES
+    is on.
+
+    Returns:
+        tuple: ({page_number: earlier page_number} for the matched pages,
+                page numbers skipped as duplicates)
+    """
+    pages = batch.pages.filter(is_deleted=False)
+    by_number = {page.page_number: page for page in pages}
+    kept = [
+        (page.page_number, page.perceptual_hash)
+        for page in by_number.values() if page.perceptual_hash and page.status != 'duplicate'
+    ]
+    new_pages = [page for page in by_number.values() if page.status == 'pending' and not page.content_hash]
+
+    duplicates = {}
+    skipped = []
+    size = max(1, settings.OCR_SUB_BATCH_SIZE)
+    for start in range(0, len(new_pages), size):
+        group = new_pages[start:start + size]
+        with ExitStack() as stack:
+            originals = [stack.enter_context(page.image.open('rb')) for page in group]
+            photos = preprocess_uploads([(page.filename or page.image.name, f) for page, f in zip(group, originals)])
+
+            for page, original, (filename, fileobj) in zip(group, originals, photos):
+                page.content_hash = image_hash(fileobj) or ''
+                start_pos = fileobj.tell()
+                data = fileobj.read()
+                fileobj.seek(start_pos)
+                page.perceptual_hash = ink_hash(data, settings.SCAN_DUPLICATE_HASH_SIZE)
+
+                old_name = None
+                if fileobj is not original:
+                    # Keep only what OCR sees - it is also what a re-OCR sends
+                    old_name = page.image.name
+                    page.image.save(os.path.basename(filename), ContentFile(data), save=False)
+
+                match, distance = closest_match(page.perceptual_hash, kept, settings.SCAN_DUPLICATE_MAX_DISTANCE)
+                page.duplicate_of = by_number[match] if match else None
+                if match:
+                    duplicates[page.page_number] = match
+                # Looser matches are only flagged - the save form shows them for review
+                if match and settings.SCAN_SKIP_DUPLICATE_PAGES and distance <= settings.SCAN_SKIP_DUPLICATE_MAX_DISTANCE:
+                    page.status = 'duplicate'
+                    page.text = f"[Duplicate of page {match}]"
+                    skipped.append(page.page_number)
+                else:
+                    kept.append((page.page_number, page.perceptual_hash))
+                page.save(update_fields=[
+                    'image', 'content_hash', 'perceptual_hash', 'status', 'duplicate_of', 'text', 'updated_at',
+                ])
+                if old_name:
+                    page.image.storage.delete(old_name)
+    return duplicates, skipped
+
+
+def _ocr_pages(pages, use_cache):
+    """OCR stored page images, saving each page as its result arrives."""
+    with ExitStack() as stack:
+        photos = [
+            (os.path.basename(page.image.name), stack.enter_context(page.image.open('rb')))
+            for page in pages
+        ]
+        saved = set()
+
+        # OCR results are numbered within the pages sent - map them back to the pages
+        def on_page(result):
+            _save_page(pages[result['page'] - 1], result)
+            saved.add(result['page'])
+
+        results = extract_text_from_uploads_batch(photos, on_page=on_page, preprocess=False, use_cache=use_cache)
+        for result in results:
+            if result['page'] not in saved:
+                # Early failures (e.g. OCR not configured) skip the callback
+                _save_page(pages[result['page'] - 1], result)
+
+
+def run_scan_batch(batch):
+    """
+    OCR the pending pages of a claimed batch and store the outcome.
+    Never raises - a crash fails the batch. Returns the refreshed batch.
+    """
+    try:
+        duplicates, skipped = _prepare_pages(batch)
+        if duplicates:
+            print(
+                f"Scan batch {batch.id}: page(s) {sorted(duplicates)} look like earlier pages "
+                f"(skipped: {sorted(skipped) or 'none'})"
+            )
+
+        pending = list(batch.pages.filter(status='pending', is_deleted=False))
+        fresh = [page for page in pending if not page.attempts]
+        retried = [page for page in pending if page.attempts]  # re-OCR requests skip the cache
+        if fresh:
+            _ocr_pages(fresh, use_cache=True)
+        if retried:
+            _ocr_pages(retried, use_cache=False)
+
+        pages = batch.pages.filter(is_deleted=False)
+        succeeded = pages.filter(status='completed').exists()
+        error = '' if succeeded else (
+            pages.filter(status='failed').values_list('error_message', flat=True).first() or 'No pages'
+        )
+        ScanBatch.objects.filter(id=batch.id, status='processing').update(
+            status='completed' if succeeded else 'failed',
+            error_message=error,
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if not succeeded:
+            delete_page_images(ScanPage.objects.filter(batch_id=batch.id))
+    except Exception as e:
+        print(f"Scan batch {batch.id} crashed: {e}")
+        fail_scan_batch(batch.id, f"OCR job crashed: {e}")
+
+    batch.refresh_from_db()
+    return batch
+
+
+def fail_scan_batch(batch_id, error_message):
+    """Mark a batch and its unfinished pages failed and delete its stored photos."""
+    now = timezone.now()
+    ScanPage.objects.filter(batch_id=batch_id, status='pending').update(
+        status='failed', text=f"[{error_message}]", error_message=error_message, updated_at=now
+    )
+    failed = ScanBatch.objects.filter(id=batch_id).exclude(status__in=['completed', 'failed']).update(
+        status='failed', error_message=error_message, finished_at=now, updated_at=now
+    )
+    if failed:
+        delete_page_images(ScanPage.objects.filter(batch_id=batch_id))
+
+
+def delete_page_images(pages):
+    """
+    Delete the stored photos of `pages` (a ScanPage queryset) and clear
+    their image field. A page without a photo can no longer be re-OCR'd.
+
+    Returns:
+        int: photos deleted
+    """
+    cleared = []
+    for page in pages.exclude(image='').only('id', 'image'):
+        try:
+            page.image.storage.delete(page.image.name)
+        except OSError as e:
+            print(f"Could not delete {page.image.name}: {e}")
+            continue
+        cleared.append(page.id)
+    ScanPage.objects.filter(id__in=cleared).update(image='', updated_at=timezone.now())
+    return len(cleared)
+
+
+def purge_old_page_images(days):
+    """
+    Delete the photos of pages uploaded more than `days` ago whose batch is
+    not being OCR'd - batches that were never saved or failed keep them
+    otherwise.
+
+    Returns:
+        int: photos deleted
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    return delete_page_images(
+        ScanPage.objects.filter(created_at__lt=cutoff).exclude(batch__status__in=['pending', 'processing'])
+    )
+
+
+def expire_stale_scan_batch(batch):
+    """
+    Fail a batch no OCR worker picked up within OCR_JOB_TIMEOUT. Refreshes
+    it in place. With no worker running, nothing else re-queues a batch
+    whose in-process run died, so a stale 'processing' batch is re-queued
+    (or failed after OCR_JOB_MAX_ATTEMPTS) and run here again.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.OCR_JOB_TIMEOUT)
+    if batch.status == 'processing' and batch.started_at and batch.started_at < cutoff:
+        requeue_stale_scan_batches()
+        batch.refresh_from_db()
+        if batch.status == 'pending':
+            run_unclaimed_in_process(batch.id)
+        return batch
+    if batch.status != 'pending' or batch.updated_at >= cutoff:
+        return batch
+    fail_scan_batch(batch.id, "No OCR worker picked up the scan - please try again later")
+    batch.refresh_from_db()
+    return batch
+
+
+# ==================================================
+# RESULTS
+# ==================================================
+
+def assemble_batch_text(batch):
+    """
+    The batch's pages as one raw_text, in the `--- Page N ---` format topics
+    use. Duplicate pages are left out, so their text is not sent to the LLM twice.
+    """
+    return ''.join(
+        f"--- Page {page.page_number} ---\n{page.text}\n\n"
+        for page in batch.pages.filter(is_deleted=False).exclude(status='duplicate')
+    )
+
+
+def flag_course_duplicates(batch):
+    """
+    Flag pages of a saved batch that were already scanned into another
+    topic of the same course (ScanPage.duplicate_topic). Pages are kept -
+    overlapping topics can be intended - but the admin is told.
+
+    Returns:
+        dict: {page_number: Topic} for the flagged pages
+    """
+    if not batch.topic_id:
+        return {}
+    known = list(
+        ScanPage.objects.filter(
+            batch__topic__course_id=batch.topic.course_id, batch__topic__is_deleted=False, is_deleted=False
+        )
+        .exclude(batch__topic_id=batch.topic_id)
+        .exclude(perceptual_hash='')
+        .exclude(status='duplicate')
+        .values_list('batch__topic_id', 'perceptual_hash')
+    )
+    if not known:
+        return {}
+
+    flagged = {}
+    for page in batch.pages.filter(is_deleted=False).exclude(status='duplicate').exclude(perceptual_hash=''):
+        topic_id, _ = closest_match(page.perceptual_hash, known, settings.SCAN_DUPLICATE_MAX_DISTANCE)
+        if topic_id:
+            page.duplicate_topic_id = topic_id
+            page.save(update_fields=['duplicate_topic', 'updated_at'])
+            flagged[page.page_number] = topic_id
+
+    topics = Topic.objects.in_bulk(set(flagged.values()))
+    return {page_number: topics[topic_id] for page_number, topic_id in flagged.items()}
+
+
+def serialize_scan_batch(batch):
+    """JSON-friendly batch progress used by the poll endpoint."""
+    pages = list(batch.pages.filter(is_deleted=False).select_related('duplicate_of', 'duplicate_topic'))
+    return {
+        'batch_id': batch.id,
+        'status': batch.status,
+        'page_count': batch.page_count,
+        'pages_done': sum(1 for page in pages if page.status != 'pending'),
+        'failed_pages': [page.page_number for page in pages if page.status == 'failed'],
+        'duplicate_pages': [page.page_number for page in pages if page.status == 'duplicate'],
+        'similar_pages': [
+            page.page_number for page in pages if page.duplicate_of and page.status != 'duplicate'
+        ],
+        'topic_id': batch.topic_id,
+        'error': batch.error_message,
+        'pages': [
+            {
+                'page': page.page_number,
+                'status': page.status,
+                'text': page.text if page.status != 'pending' else '',
+                'engine': page.engine,
+                'confidence': page.confidence,
+                'cached': page.cached,
+                'content_hash': page.content_hash,
+                'duplicate_of': page.duplicate_of.page_number if page.duplicate_of else None,
+                'duplicate_topic': (
+                    {'id': page.duplicate_topic.id, 'title': page.duplicate_topic.title}
+                    if page.duplicate_topic else None
+                ),
+            }
+            for page in pages
+        ],
+    }
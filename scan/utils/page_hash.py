@@ -0,0 +1,154 @@
+# ============================================================================
+# FILE: scan/utils/page_hash.py - PERCEPTUAL HASHES FOR DUPLICATE PAGES
+# ============================================================================
+
+"""
+The OCR cache (ocr_cache.py) only catches byte-identical images. The same
+page photographed twice gives different bytes, so it was OCR'd twice and
+its text sent to the LLM twice.
+
+A plain dHash of the photo is dominated by lighting: a shadow or a
+brighter corner is the biggest gradient on a page of small text, so
+different pages shot under one lamp hashed a few bits apart and re-shots
+of one page did not match. ink_hash() hashes where the text is instead:
+
+    grayscale -> background (closing wider than a text stroke) ->
+    ink = how much darker than its own background each pixel is ->
+    deskew -> crop to the inked area -> size x size grid of ink density ->
+    1 bit per "cell is inked", compared by Hamming distance
+
+Measured at 16x16 (256 bits) on rendered text pages, each shot three
+times with a different lamp gradient, shadow, tilt (up to 3 degrees),
+framing, noise and JPEG quality: re-shots of a page were 8 bits apart on
+average (95% within 19, worst 41); different pages were 89 apart on
+average and never closer than 37, also when shot under the same light.
+SCAN_DUPLICATE_MAX_DISTANCE (24) matched 61 of 64 re-shots with no false
+match in 360 pairs of different pages.
+
+`manage.py calibrate_page_hash` on a second synthetic set (6 pages, 3
+shots each) gave the same picture: repeats 1-23 bits apart (mean 9),
+different pages 48-123. Pages within SCAN_SKIP_DUPLICATE_MAX_DISTANCE
+(12, under a third of the closest different pages seen) are skipped by
+default - 13 of the 18 repeats there; looser matches up to
+SCAN_DUPLICATE_MAX_DISTANCE are only flagged for review. Re-run the command on real photos before raising
+either threshold.
+"""
+
+import io
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+WORK_SIZE = 512            # px, longest side the page is analysed at
+BACKGROUND_SIZE = 9        # px at WORK_SIZE; wider than a text stroke, narrower than a shadow
+INK_CONTRAST = 0.12        # darker than the local background by this share counts as ink
+SKEW_ANGLES = np.arange(-4, 4.01, 0.5)
+
+
+# ==================================================
+# INK MAP
+# ==================================================
+
+def _load(data):
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft('L', (WORK_SIZE * 2, WORK_SIZE * 2))  # JPEG: decode at reduced scale
+        img = ImageOps.exif_transpose(img).convert('L')
+        img.thumbnail((WORK_SIZE, WORK_SIZE), Image.BILINEAR)
+        return img
+
+
+def _rank_filter(pixels, reduce):
+    """Square max/min filter of BACKGROUND_SIZE, one axis at a time."""
+    radius = BACKGROUND_SIZE // 2
+    for axis in (0, 1):
+        pad = [(radius, radius) if i == axis else (0, 0) for i in (0, 1)]
+        pixels = reduce(sliding_window_view(np.pad(pixels, pad, mode='edge'), BACKGROUND_SIZE, axis=axis), axis=-1)
+    return pixels
+
+
+def _ink_mask(img):
+    """1.0 where a pixel is clearly darker than the paper around it."""
+    gray = np.asarray(img, dtype=np.float32)
+    # Closing (max then min) erases thin dark strokes and keeps the lighting
+    paper = _rank_filter(_rank_filter(gray, np.max), np.min)
+    mask = ((paper - gray) / np.maximum(paper, 1) > INK_CONTRAST).astype(np.float32)
+
+    # Page and photo edges read as ink against the padded background
+    k = BACKGROUND_SIZE
+    mask[:k] = mask[-k:] = 0
+    mask[:, :k] = mask[:, -k:] = 0
+    return mask
+
+
+def _deskew(mask):
+    """Rotate the text lines level: the angle whose row sums vary most."""
+    img = Image.fromarray((mask * 255).astype(np.uint8))
+    angle = max(
+        SKEW_ANGLES,
+        key=lambda a: np.var(np.asarray(img.rotate(a, resample=Image.NEAREST)).sum(axis=1, dtype=np.float64))
+    )
+    return np.asarray(img.rotate(angle, resample=Image.BILINEAR), dtype=np.float32) / 255
+
+
+def _crop_to_ink(mask, margin=0.02):
+    """The box holding all but `margin` of the ink on each side, so framing does not matter."""
+    inked = mask > 0.5
+    rows = np.cumsum(inked.sum(axis=1))
+    cols = np.cumsum(inked.sum(axis=0))
+    if not rows.size or rows[-1] == 0:
+        return None
+    top, bottom = np.searchsorted(rows, rows[-1] * margin), np.searchsorted(rows, rows[-1] * (1 - margin))
+    left, right = np.searchsorted(cols, cols[-1] * margin), np.searchsorted(cols, cols[-1] * (1 - margin))
+    return mask[top:bottom + 1, left:right + 1]
+
+
+# ==================================================
+# HASHING
+# ==================================================
+
+def ink_hash(data, hash_size=16):
+    """
+    Text-density hash of a page photo as a hex string ('' if it is not an
+    image or has no text to compare).
+    """
+    try:
+        img = _load(data)
+    except (UnidentifiedImageError, OSError, ValueError):
+        return ''
+    if min(img.size) <= 2 * BACKGROUND_SIZE:
+        return ''
+
+    mask = _crop_to_ink(_deskew(_ink_mask(img)))
+    if mask is None:
+        return ''
+    cells = np.asarray(Image.fromarray(mask, 'F').resize((hash_size, hash_size), Image.BOX))
+    # Relative to the densest cells, so faint and bold print hash alike
+    return np.packbits(cells > 0.5 * np.percentile(cells, 90)).tobytes().hex()
+
+
+def hamming_distance(hash_a, hash_b):
+    """Differing bits between two hashes, or None if they are not comparable."""
+    if not hash_a or not hash_b or len(hash_a) != len(hash_b):
+        return None
+    return (int(hash_a, 16) ^ int(hash_b, 16)).bit_count()
+
+
+def closest_match(page_hash, candidates, max_distance):
+    """
+    The candidate key whose hash is nearest to `page_hash`, if within
+    max_distance bits.
+
+    Args:
+        candidates: iterable of (key, hash)
+
+    Returns:
+        tuple: (key, distance) or (None, None)
+    """
+    best = (None, None)
+    for key, other in candidates:
+        distance = hamming_distance(page_hash, other)
+        if distance is not None and distance <= max_distance and (best[1] is None or distance < best[1]):
+            best = (key, distance)
+    return best
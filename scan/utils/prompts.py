@@ -3,9 +3,43 @@
 # ============================================================================
 
 from .table import detect_table_candidates, generate_table_instruction
+from .normalize import normalize_ocr_text
 
 
-def get_easy_prompt(topic_title: str, raw_text: str) -> str:
+# Bump whenever prompt wording or the normalizer's output (normalize.py) changes - part of the AI refine cache key
+PROMPT_VERSION = "2026.03"
+
+DIFFICULTY_LEVELS = ('easy', 'medium', 'difficult')
+
+QUESTIONS_PER_TOPIC = (15, 20)
+
+
+def question_range(share: float = 1.0) -> str:
+    """
+    How many questions to ask for, as the prompts word it ("15-20"). A
+    chunk of a long topic (see utils/chunking.py) asks for its `share` of
+    the topic's questions, so the merged topic still has about 15-20.
+    """
+    low = max(1, round(QUESTIONS_PER_TOPIC[0] * share))
+    high = max(low, round(QUESTIONS_PER_TOPIC[1] * share))
+    return f"{low}-{high}" if high > low else str(low)
+
+
+def build_prompt(difficulty_level: str, topic_title: str, raw_text: str, questions: str = None) -> str:
+    """
+    Select the prompt template for a difficulty level (medium is the default).
+    The OCR text is normalized first (see utils/normalize.py).
+    """
+    raw_text = normalize_ocr_text(raw_text)
+    questions = questions or question_range()
+    if difficulty_level == 'easy':
+        return get_easy_prompt(topic_title, raw_text, questions)
+    if difficulty_level == 'difficult':
+        return get_difficult_prompt(topic_title, raw_text, questions)
+    return get_medium_prompt(topic_title, raw_text, questions)
+
+
+def get_easy_prompt(topic_title: str, raw_text: str, questions: str = "15-20") -> str:
     """
     EASY LEVEL: Quick recognition, basic facts, simple local references
     Cognitive Goal: Student can RECOGNIZE concept
@@ -101,7 +135,7 @@ YOUR TASK
 ═══════════════════════════════════════════════════════════════════
 
 1. Read ALL OCR text
-2. Create 15-20 questions covering all important material
+2. Create {questions} questions covering all important material
 3. For EACH question:
    • Clear question
    • Answer (4-6 words)
@@ -132,7 +166,7 @@ Begin now:"""
     return base_prompt
 
 
-def get_medium_prompt(topic_title: str, raw_text: str) -> str:
+def get_medium_prompt(topic_title: str, raw_text: str, questions: str = "15-20") -> str:
     """
     MEDIUM LEVEL: Show mechanisms, specific context, concrete details
     Cognitive Goal: Student can UNDERSTAND and EXPLAIN concept
@@ -228,7 +262,7 @@ YOUR TASK
 ═══════════════════════════════════════════════════════════════════
 
 1. Read ALL OCR text
-2. Create 15-20 questions covering all important material
+2. Create {questions} questions covering all important material
 3. For EACH question:
    • Clear question
    • Answer (4-6 words)
@@ -263,7 +297,7 @@ Begin now:"""
     return base_prompt
 
 
-def get_difficult_prompt(topic_title: str, raw_text: str) -> str:
+def get_difficult_prompt(topic_title: str, raw_text: str, questions: str = "15-20") -> str:
     """
     DIFFICULT LEVEL: Complete cause-and-effect, rich scenarios, deep context
     Cognitive Goal: Student can APPLY and USE concept in new situations
@@ -359,7 +393,7 @@ YOUR TASK
 ═══════════════════════════════════════════════════════════════════
 
 1. Read ALL OCR text
-2. Create 15-20 questions covering all important material
+2. Create {questions} questions covering all important material
 3. For EACH question:
    • Clear question
    • Answer (4-6 words)
@@ -391,4 +425,55 @@ Begin now:"""
         table_instruction = generate_table_instruction(table_hints, 'difficult')
         base_prompt += "\n" + table_instruction
     
-    return base_prompt
\ No newline at end of file
+    return base_prompt
+
+
+def _level_rules(difficulty_level: str, topic_title: str, questions: str = None) -> str:
+    """
+    Goal line plus everything after the OCR text of a single-level prompt,
+    so the multi-difficulty prompt re-uses the exact same rules.
+    """
+    marker = "\x00OCR TEXT\x00"
+    head, rules = build_prompt(difficulty_level, topic_title, marker, questions).split(marker, 1)
+    goal = next((line for line in head.splitlines() if 'LEVEL GOAL:' in line), '')
+    return goal + "\n" + rules.replace("Begin now:", "").strip()
+
+
+def get_multi_difficulty_prompt(topic_title: str, raw_text: str, questions: str = None) -> str:
+    """
+    ALL LEVELS: easy, medium and difficult sets from one upload of the OCR text.
+    The provider answers with a JSON object keyed by difficulty level.
+    """
+    raw_text = normalize_ocr_text(raw_text)
+    
+    # Detect if content should have tables (once, for all three levels)
+    table_hints = detect_table_candidates(raw_text)
+    
+    level_rules = "\n\n".join(_level_rules(level, topic_title, questions) for level in DIFFICULTY_LEVELS)
+    
+    base_prompt = f"""You are creating study flashcards for community college students in Monrovia, Liberia at THREE difficulty levels: EASY, MEDIUM and DIFFICULT.
+
+Topic: {topic_title}
+
+OCR TEXT:
+{raw_text}
+
+Write three complete, independent flashcard sets from this OCR text, one per level. Each set follows its own level's rules below.
+
+{level_rules}
+
+═══════════════════════════════════════════════════════════════════
+OUTPUT
+═══════════════════════════════════════════════════════════════════
+
+Respond with ONLY a JSON object with the keys "easy", "medium" and "difficult".
+Each value is that level's complete flashcard text in its FORMAT above, numbered from Q1.
+
+Begin now:"""
+
+    # Add table-specific instruction if detected
+    if table_hints['has_tables']:
+        table_instruction = generate_table_instruction(table_hints, 'medium')
+        base_prompt += "\n" + table_instruction
+    
+    return base_prompt
@@ -0,0 +1,125 @@
+# ============================================================================
+# FILE: scan/utils/qa_parser.py - STRUCTURED Q&A CARDS FROM REFINED TEXT
+# ============================================================================
+
+"""
+Turns refined summaries into flashcard rows. The prompts produce:
+
+    Q1: question
+    Answer: ...
+
+    Explanation: ...
+
+    Example: ...
+
+    ---
+
+Table questions carry a markdown table as the answer and no
+Explanation/Example. Lines without a label continue the previous field.
+"""
+
+import hashlib
+import re
+
+from django.db import transaction
+
+from ..models import QACard
+
+
+QUESTION_START = re.compile(r'^\s*(?:#+\s*)?\**Q(\d+)[:.]\**\s*(.*)$')
+FIELD_START = re.compile(r'^\s*\**(Answer|Explanation|Example)\s*:\**\s*(.*)$', re.IGNORECASE)
+SEPARATOR = re.compile(r'^\s*-{3,}\s*$')
+TABLE_ROW = re.compile(r'^\s*\|.*\|\s*$')
+
+
+def text_hash(text: str) -> str:
+    """Fingerprint of the text a set of cards was parsed from."""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def _finish(card):
+    """Join collected lines and derive the table flag."""
+    lines = {key: '\n'.join(value).strip() for key, value in card['lines'].items()}
+    return {
+        'ordinal': card['ordinal'],
+        'question': lines['question'],
+        'answer': lines['answer'],
+        'explanation': lines['explanation'],
+        'example': lines['example'],
+        'has_table': any(TABLE_ROW.match(line) for line in card['lines']['answer']),
+    }
+
+
+def parse_qa_cards(refined_text: str) -> list:
+    """
+    Parse refined text into card dicts.
+
+    Returns:
+        list: dicts with ordinal, question, answer, explanation, example,
+              has_table. Ordinals are 1..n in text order, independent of
+              the Q numbers the model wrote.
+    """
+    cards = []
+    card = None
+    field = None
+
+    for line in (refined_text or '').splitlines():
+        question = QUESTION_START.match(line)
+        if question:
+            if card:
+                cards.append(_finish(card))
+            card = {
+                'ordinal': len(cards) + 1,
+                'lines': {'question': [question.group(2)], 'answer': [], 'explanation': [], 'example': []},
+            }
+            field = 'question'
+            continue
+
+        if card is None or SEPARATOR.match(line):
+            continue  # preamble before Q1, or a card separator
+
+        label = FIELD_START.match(line)
+        if label:
+            field = label.group(1).lower()
+            card['lines'][field].append(label.group(2))
+        else:
+            card['lines'][field].append(line)
+
+    if card:
+        cards.append(_finish(card))
+
+    return [c for c in cards if c['question']]
+
+
+def count_cards(refined_text: str) -> int:
+    """Number of Q&A items - lines starting with Qn:, not every capital Q."""
+    return sum(1 for line in (refined_text or '').splitlines() if QUESTION_START.match(line))
+
+
+# ==================================================
+# PERSISTENCE
+# ==================================================
+
+def refresh_qa_cards(topic, refined_text, ai_refine=None):
+    """
+    Replace the cards of one source (topic summary or one AIRefine) with
+    cards parsed from `refined_text`. A no-op when the text is unchanged.
+
+    Returns:
+        int: number of cards now stored for the source
+    """
+    cards = QACard.objects.filter(topic=topic, ai_refine=ai_refine)
+    new_hash = text_hash(refined_text)
+
+    stored_hash = cards.values_list('source_hash', flat=True).first()
+    if stored_hash == new_hash:
+        return cards.count()
+
+    parsed = parse_qa_cards(refined_text)
+    with transaction.atomic():
+        cards.delete()
+        QACard.objects.bulk_create([
+            QACard(topic=topic, ai_refine=ai_refine, source_hash=new_hash, **card)
+            for card in parsed
+        ])
+    return len(parsed)
@@ -0,0 +1,139 @@
+# ============================================================================
+# FILE: scan/utils/rate_limit.py - CROSS-WORKER TOKEN BUCKETS FOR LLM CALLS
+# ============================================================================
+
+"""
+Requests/minute and tokens/minute buckets per (provider, API key), stored
+in ProviderRateLimit rows and updated under a row lock so every worker
+process shares them. A 429 with Retry-After blocks the bucket for all
+workers until the provider is ready again.
+"""
+
+import hashlib
+import time
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import ProviderRateLimit
+
+
+CHARS_PER_TOKEN = 4
+MAX_SLEEP = 10  # re-check the shared bucket at least this often while waiting
+
+
+class RateLimitExceeded(Exception):
+    """No slot will free up before the caller's deadline."""
+    pass
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting before the provider reports usage."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _fingerprint(api_key):
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+def _limits(provider):
+    limits = settings.AI_RATE_LIMITS.get(provider, {})
+    return float(limits.get('rpm', 60)), float(limits.get('tpm', 1_000_000))
+
+
+def _locked_bucket(provider, api_key):
+    """Fetch (or create full) the bucket row with a row lock. Call inside atomic()."""
+    rpm, tpm = _limits(provider)
+    bucket, _ = ProviderRateLimit.objects.select_for_update().get_or_create(
+        provider=provider,
+        key_fingerprint=_fingerprint(api_key),
+        defaults={'request_tokens': rpm, 'token_tokens': tpm}
+    )
+
+    # Refill both buckets for the time elapsed since the last update
+    now = timezone.now()
+    elapsed = max(0.0, (now - bucket.refilled_at).total_seconds())
+    bucket.request_tokens = min(rpm, bucket.request_tokens + elapsed * rpm / 60)
+    bucket.token_tokens = min(tpm, bucket.token_tokens + elapsed * tpm / 60)
+    bucket.refilled_at = now
+    return bucket, rpm, tpm
+
+
+def _try_acquire(provider, api_key, tokens):
+    """Take one request + `tokens` if available. Returns seconds to wait (0 = acquired)."""
+    with transaction.atomic():
+        bucket, rpm, tpm = _locked_bucket(provider, api_key)
+        now = bucket.refilled_at
+        tokens = min(tokens, tpm)  # a single huge prompt must still be able to go
+
+        if bucket.blocked_until and bucket.blocked_until > now:
+            wait = (bucket.blocked_until - now).total_seconds()
+        elif bucket.request_tokens >= 1 and bucket.token_tokens >= tokens:
+            bucket.request_tokens -= 1
+            bucket.token_tokens -= tokens
+            wait = 0
+        else:
+            wait = max(
+                (1 - bucket.request_tokens) * 60 / rpm,
+                (tokens - bucket.token_tokens) * 60 / tpm,
+            )
+
+        bucket.save()
+        return wait
+
+
+def acquire(provider, api_key, tokens, deadline):
+    """
+    Wait for a request slot with `tokens` of budget.
+
+    Args:
+        deadline: epoch seconds after which the caller would rather fail
+
+    Raises:
+        RateLimitExceeded: If the slot cannot be had before the deadline
+    """
+    while True:
+        wait = _try_acquire(provider, api_key, tokens)
+        if wait <= 0:
+            return
+        if time.time() + wait > deadline:
+            raise RateLimitExceeded(f"{provider} rate limit needs {wait:.0f}s, past request deadline")
+        time.sleep(min(wait, MAX_SLEEP))
+
+
+def block(provider, api_key, seconds):
+    """Stop every worker from calling the provider for `seconds` (429 handling)."""
+    with transaction.atomic():
+        bucket, _, _ = _locked_bucket(provider, api_key)
+        until = bucket.refilled_at + timedelta(seconds=seconds)
+        if not bucket.blocked_until or bucket.blocked_until < until:
+            bucket.blocked_until = until
+        bucket.save()
+
+
+def settle(provider, api_key, estimated_tokens, actual_tokens):
+    """Correct the token bucket once the provider reports real usage."""
+    if not actual_tokens:
+        return
+    with transaction.atomic():
+        bucket, _, _ = _locked_bucket(provider, api_key)
+        bucket.token_tokens -= actual_tokens - estimated_tokens
+        bucket.save()
+
+
+def retry_after_seconds(response):
+    """Parse a Retry-After header (seconds or HTTP date). None if absent."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - timezone.now()).total_seconds())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,434 @@
+# ============================================================================
+# FILE: scan/utils/refine_queue.py - DB-BACKED AI REFINE JOB QUEUE
+# ============================================================================
+
+"""
+AIRefine rows double as queue entries:
+
+    pending -> processing -> completed / failed
+
+Views enqueue rows and return immediately; `manage.py run_refine_worker`
+claims pending rows and calls the providers. Claiming is a single
+conditional UPDATE, so several worker processes can share one queue.
+
+Requests are single-flight: enqueueing a (topic, provider, difficulty)
+that is already pending or processing attaches to that job instead of
+starting a second provider call. The check is a conditional UPDATE, so
+it holds across gunicorn workers.
+
+Multi-difficulty jobs are three rows (easy/medium/difficult) flagged
+multi_difficulty. They are claimed together in one UPDATE - the shared
+started_at marks the group - and filled from a single provider call.
+
+Bulk batches link jobs through RefineBatchJob; a finished job settles its
+pending links, so each batch keeps the outcome of the run it asked for.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import AIRefine, RefineBatchJob
+from .ai import (
+    refine_with_gemini, refine_with_groq, refine_multi_with_gemini, refine_multi_with_groq, AIRefineError
+)
+from .chunking import refine_sections, refine_multi_sections, whole_text_sections
+from .prompts import DIFFICULTY_LEVELS
+from .ai_cache import source_hash
+
+
+REFINERS = {
+    'gemini': refine_with_gemini,
+    'groq': refine_with_groq,
+}
+
+MULTI_REFINERS = {
+    'gemini': refine_multi_with_gemini,
+    'groq': refine_multi_with_groq,
+}
+
+
+# ==================================================
+# ENQUEUE / CLAIM
+# ==================================================
+
+def enqueue_refine(topic, provider, difficulty_level, bypass_cache=False, batch=None, multi_difficulty=False):
+    """
+    Queue a refine for (topic, provider, difficulty).
+    Re-uses the existing AIRefine row for that combination; if that row is
+    already pending or processing, the caller attaches to it (single flight).
+    bypass_cache=True forces a fresh LLM call even if the input is unchanged.
+    batch links the job to a bulk RefineBatch for progress reporting.
+    multi_difficulty=True lets the job share one call with the other levels.
+    """
+    refine, created = AIRefine.objects.get_or_create(
+        topic=topic,
+        provider=provider,
+        difficulty_level=difficulty_level,
+        defaults={'status': 'pending'}
+    )
+
+    if batch is not None:
+        # Linked before queueing, so a job that finishes right away still settles it
+        RefineBatchJob.objects.get_or_create(batch=batch, refine=refine)
+
+    fields = {
+        'status': 'pending',
+        'error_message': '',
+        'started_at': None,
+        'bypass_cache': bypass_cache,
+        'multi_difficulty': multi_difficulty,
+        'updated_at': timezone.now(),
+    }
+
+    rows = AIRefine.objects.filter(pk=refine.pk)
+    if not created:
+        rows = rows.exclude(in_flight_q())
+    if not rows.update(**fields):
+        # Already queued or running - share that job's result
+        print(f"🔗 Attached to in-flight refine #{refine.pk} ({provider}, {difficulty_level})")
+        if bypass_cache:
+            # Not started yet, so the forced regeneration can still apply
+            AIRefine.objects.filter(pk=refine.pk, status='pending').update(bypass_cache=True)
+
+    refine.refresh_from_db()
+    return refine
+
+
+def in_flight_q():
+    """Jobs that will produce a result without a new request: pending, or processing and not stuck."""
+    cutoff = timezone.now() - timedelta(seconds=settings.AI_REFINE_JOB_TIMEOUT)
+    return Q(status='pending') | Q(status='processing', started_at__gte=cutoff)
+
+
+def enqueue_multi_difficulty(topic, provider, bypass_cache=False, batch=None):
+    """
+    Queue easy, medium and difficult for (topic, provider) as one
+    multi-difficulty job. Returns the three rows in DIFFICULTY_LEVELS order.
+    """
+    return [
+        enqueue_refine(topic, provider, level, bypass_cache=bypass_cache, batch=batch, multi_difficulty=True)
+        for level in DIFFICULTY_LEVELS
+    ]
+
+
+def claim_refine(refine_id):
+    """
+    Atomically move a pending job to processing.
+    Returns True if this caller owns the job now.
+    """
+    now = timezone.now()
+    claimed = AIRefine.objects.filter(pk=refine_id, status='pending').update(
+        status='processing',
+        started_at=now,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return claimed == 1
+
+
+def claim_refines(refine_ids):
+    """
+    Atomically move several pending jobs to processing in one UPDATE.
+    Returns the ids this caller got, sorted; they share one started_at.
+    """
+    now = timezone.now()
+    AIRefine.objects.filter(pk__in=refine_ids, status='pending').update(
+        status='processing',
+        started_at=now,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return sorted(AIRefine.objects.filter(
+        pk__in=refine_ids, status='processing', started_at=now
+    ).values_list('id', flat=True))
+
+
+def claim_multi_difficulty(refine):
+    """
+    Claim every pending level of refine's multi-difficulty job.
+    Returns the id of the row to run (the group is found from it), or None.
+    """
+    group_ids = AIRefine.objects.filter(
+        topic_id=refine.topic_id, provider=refine.provider, multi_difficulty=True, status='pending'
+    ).values_list('id', flat=True)
+    claimed = claim_refines(list(group_ids))
+    return claimed[0] if claimed else None
+
+
+def requeue_stale_refines():
+    """Put jobs whose worker died mid-run back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=settings.AI_REFINE_JOB_TIMEOUT)
+    return AIRefine.objects.filter(status='processing', started_at__lt=cutoff).update(
+        status='pending',
+        started_at=None,
+        updated_at=timezone.now(),
+    )
+
+
+def claim_next_refines(limit):
+    """Claim up to `limit` pending jobs, oldest first."""
+    if limit <= 0:
+        return []
+
+    requeue_stale_refines()
+
+    candidates = AIRefine.objects.filter(status='pending').order_by(
+        'updated_at'
+    ).only('id', 'topic_id', 'provider', 'multi_difficulty')[:limit * 2]
+
+    claimed = []
+    for candidate in candidates:
+        if candidate.multi_difficulty:
+            # One slot runs the whole group - a single provider call
+            lead_id = claim_multi_difficulty(candidate)
+            if lead_id:
+                claimed.append(lead_id)
+        elif claim_refine(candidate.id):
+            claimed.append(candidate.id)
+        if len(claimed) >= limit:
+            break
+
+    return list(AIRefine.objects.filter(id__in=claimed).select_related('topic'))
+
+
+# ==================================================
+# RUN
+# ==================================================
+
+def start_refine_now(topic, provider, difficulty_level, bypass_cache=False):
+    """
+    Take a job straight to processing for callers that run the provider
+    themselves (e.g. streaming). Returns None if a worker got it first.
+    """
+    refine = enqueue_refine(topic, provider, difficulty_level, bypass_cache=bypass_cache)
+    if not claim_refine(refine.id):
+        return None
+    refine.refresh_from_db()
+    return refine
+
+
+def complete_refine(refine, refined_text, processing_time, qa_count, sections=None):
+    """
+    Store a successful result on the job row.
+    `sections` defaults to one section covering the whole text.
+    """
+    if sections is None:
+        sections = whole_text_sections(refine.topic.raw_text, refined_text)
+    refine.refined_text = refined_text
+    refine.sections = sections
+    refine.processing_time = processing_time
+    refine.qa_count = qa_count
+    refine.source_hash = source_hash(refine.topic.raw_text)
+    refine.status = 'completed'
+    refine.error_message = ''
+    refine.save()
+    settle_batch_jobs(refine)
+    return refine
+
+
+def fail_refine(refine, error_message):
+    """Mark the job as failed, keeping any previous refined text."""
+    refine.status = 'failed'
+    refine.error_message = error_message
+    refine.save()
+    settle_batch_jobs(refine)
+    return refine
+
+
+def settle_batch_jobs(refine):
+    """Copy a finished job's outcome onto the batch links still waiting for it."""
+    now = timezone.now()
+    return RefineBatchJob.objects.filter(refine=refine, status='pending').update(
+        status=refine.status,
+        error_message=refine.error_message,
+        finished_at=now,
+        updated_at=now,
+    )
+
+
+def run_refine(refine, deadline=None):
+    """
+    Call the provider for a claimed job and store the outcome.
+    Never raises AIRefineError - failures are recorded on the row.
+    `deadline` (epoch seconds) bounds the provider calls (rate-limit waits
+    and responses), so a sync caller's threads end when it gives up.
+    """
+    if refine.multi_difficulty:
+        group = multi_difficulty_group(refine)
+        if len(group) > 1:
+            return run_multi_difficulty(refine, group, deadline=deadline)
+
+    topic = refine.topic
+    refiner = REFINERS.get(refine.provider)
+
+    try:
+        if refiner is None:
+            raise AIRefineError(f"Unknown provider: {refine.provider}")
+
+        # Long topics are packed into page chunks refined in parallel;
+        # chunks whose pages are unchanged re-use their output unless forced
+        refined_text, proc_time, qa_count, sections = refine_sections(
+            refiner,
+            topic.raw_text,
+            topic.title,
+            difficulty_level=refine.difficulty_level,
+            use_cache=not refine.bypass_cache,
+            deadline=deadline,
+            previous_sections=None if refine.bypass_cache else refine.sections,
+        )
+    except AIRefineError as e:
+        return fail_refine(refine, str(e))
+
+    return complete_refine(refine, refined_text, proc_time, qa_count, sections)
+
+
+def multi_difficulty_group(refine):
+    """Rows claimed together with `refine` (same topic, provider and started_at)."""
+    return list(AIRefine.objects.filter(
+        topic_id=refine.topic_id,
+        provider=refine.provider,
+        multi_difficulty=True,
+        status='processing',
+        started_at=refine.started_at,
+    ).select_related('topic'))
+
+
+def run_multi_difficulty(refine, group, deadline=None):
+    """
+    Fill every row of a claimed multi-difficulty group from one provider
+    call per chunk. Returns `refine`, refreshed with its outcome.
+    """
+    topic = refine.topic
+    multi_refiner = MULTI_REFINERS.get(refine.provider)
+
+    try:
+        if multi_refiner is None:
+            raise AIRefineError(f"Unknown provider: {refine.provider}")
+
+        results = refine_multi_sections(
+            multi_refiner,
+            topic.raw_text,
+            topic.title,
+            use_cache=not refine.bypass_cache,
+            deadline=deadline,
+            previous_sections=None if refine.bypass_cache else {row.difficulty_level: row.sections for row in group},
+        )
+    except AIRefineError as e:
+        for row in group:
+            fail_refine(row, str(e))
+    else:
+        for row in group:
+            complete_refine(row, *results[row.difficulty_level])
+
+    refine.refresh_from_db()
+    return refine
+
+
+def wait_for_refines(refines, deadline, interval=1.0):
+    """
+    Poll jobs owned by another request or worker until they finish or
+    `deadline` (epoch seconds) passes. Refreshes the given rows in place.
+    """
+    pending_ids = {refine.id for refine in refines if not refine.is_finished()}
+    while pending_ids and time.time() < deadline:
+        time.sleep(interval)
+        finished = AIRefine.objects.filter(
+            id__in=pending_ids, status__in=['completed', 'failed']
+        ).values_list('id', flat=True)
+        pending_ids -= set(finished)
+
+    for refine in refines:
+        refine.refresh_from_db()
+    return refines
+
+
+def _run_refine_in_thread(refine_id, deadline):
+    """run_refine wrapper that owns its own DB connection and row instance."""
+    close_old_connections()
+    try:
+        return run_refine(AIRefine.objects.select_related('topic').get(pk=refine_id), deadline=deadline)
+    finally:
+        connection.close()
+
+
+def release_refines(refines):
+    """Hand claimed jobs that never started back to the queue (run_refine_worker)."""
+    released = 0
+    for refine in refines:
+        # started_at identifies the claim - a multi-difficulty group goes back whole
+        released += AIRefine.objects.filter(
+            topic_id=refine.topic_id,
+            provider=refine.provider,
+            status='processing',
+            started_at=refine.started_at,
+        ).update(status='pending', started_at=None, updated_at=timezone.now())
+    return released
+
+
+def run_refines_concurrently(refines, deadline=None):
+    """
+    Run several claimed jobs in parallel (e.g. Gemini + Groq for provider='both').
+    
+    Each row is saved independently as its provider finishes, so wall-clock
+    time is the slowest provider rather than the sum. Provider calls share
+    the `deadline` (seconds), so running jobs complete or fail by then; jobs
+    that had not started are released to the worker and can be polled by id.
+    No thread outlives the call.
+    """
+    if deadline is None:
+        deadline = settings.AI_REFINE_SYNC_DEADLINE
+
+    # Callers waiting on the response should not wait past it for the providers
+    call_deadline = time.time() + deadline
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(refines), len(REFINERS))))
+    futures = {pool.submit(_run_refine_in_thread, refine.id, call_deadline): refine for refine in refines}
+    wait(futures, timeout=deadline)
+    # Running calls are bounded by call_deadline; queued ones are dropped
+    pool.shutdown(wait=True, cancel_futures=True)
+
+    cancelled = [refine for future, refine in futures.items() if future.cancelled()]
+    if cancelled:
+        release_refines(cancelled)
+        print(f"⏱️ Deadline passed - {len(cancelled)} refine job(s) left to the worker")
+
+    for refine in refines:
+        refine.refresh_from_db()
+    return refines
+
+
+# ==================================================
+# SERIALIZATION
+# ==================================================
+
+def serialize_refine(refine):
+    """JSON-friendly job state used by the generate and poll endpoints."""
+    data = {
+        'job_id': refine.id,
+        'provider': refine.provider,
+        'status': refine.status,
+        'difficulty': refine.difficulty_level,
+        'multi_difficulty': refine.multi_difficulty,
+    }
+
+    if refine.status == 'completed':
+        text = refine.refined_text
+        data.update({
+            'success': True,
+            'qa_count': refine.qa_count,
+            'processing_time': round(refine.processing_time or 0, 2),
+            'preview': text[:300] + '...' if len(text) > 300 else text,
+        })
+    elif refine.status == 'failed':
+        data.update({
+            'success': False,
+            'error': refine.error_message,
+        })
+
+    return data
@@ -5,6 +5,140 @@
 import re
 
 
+# ===== SINGLE-PASS SCANNER =====
+# One finditer() over the lowercased text finds every trigger. Each
+# alternative starts with a literal, so the regex engine skips straight to
+# candidate first characters, and consumes only the trigger word; the rest
+# of the phrase sits in a lookahead, so triggers inside it are still seen.
+# The lookahead's last word is captured to get the span the old
+# one-findall-per-pattern code would have consumed, which keeps the counts
+# identical (findall never counted overlapping matches of one pattern).
+
+CATEGORY_WORDS = (
+    'types', 'kinds', 'categories', 'classification', 'branches', 'divisions',
+    'classes', 'forms', 'stages', 'phases', 'levels',
+)
+PROPERTY_WORDS = ('properties', 'characteristics', 'features', 'attributes')
+ATTRIBUTE_KEYWORDS = (
+    'caused by', 'transmitted', 'treated', 'prevented', 'symptoms',
+    'example', 'definition', 'formula', 'purpose', 'function',
+)
+COMPARISON_KINDS = ('vs', 'versus', 'difference', 'compare')
+
+# The old ^\s* could start a numbered match on a blank line above the item;
+# it counts exactly when the item's own line start does, so only that is tried
+NUMBERED_GROUP = 1    # "1. item" / "a) item"
+STRUCTURED_GROUP = 2  # whole line of a candidate "Item: description" line
+
+# Alternatives, in order, and the original pattern each one replaces:
+#
+#   \n(?=...)           start of a line; its two lookaheads are
+#                         NUMBERED_GROUP   PATTERN 4 ^\s*[\d\w][\.)]\s+ (MULTILINE)
+#                         STRUCTURED_GROUP PATTERN 3 lines with ':' and ^\w+[\w\s]*:
+#                       (LINE_SCANNER does the same for the first line, which has no \n)
+#   <word>(?= of\s+(\w+))    PATTERN 1 '<word> of\s+\w+', one per CATEGORY_WORDS
+#   <word>(?=\s+of\s+\w)     PATTERN 4 (properties|characteristics|...)\s+of\s+\w+
+#   difference(?=...)        PATTERN 2 difference[s]?\s+between\s+(\w+)\s+and\s+(\w+)
+#   compar(?=...)            PATTERN 2 compar(e|ing|ison)\s+(\w+)\s+(and|with)\s+(\w+)
+#   v(?<=\sv)(?:s\.?|ersus)  PATTERN 2 (\w+)\s+vs\.?\s+(\w+) and (\w+)\s+versus\s+(\w+);
+#                            the word before is checked in _scan_table_signals
+#   <keyword>                PATTERN 5 re.findall(keyword), one per ATTRIBUTE_KEYWORDS
+#
+# take() replays findall's "next match starts after the last one ended"
+# per original pattern, keyed by the trigger (or 'numbered', 'difference',
+# 'compare', 'vs', 'versus'). One known difference: for "types of of" the
+# old code took the keyword from match.split('of')[-1] and got '', while
+# the captured word here gives 'of'.
+TABLE_SCANNER = re.compile('|'.join(
+    [r'\n(?:(?=([^\S\n]*\w[.)]\s+))|(?=[^\S\n]*\w[^\n:]*:)(?=([^\n]*)))']
+    + [word + r'(?= of\s+(\w+))' for word in CATEGORY_WORDS]
+    + [word + r'(?=\s+of\s+\w)' for word in PROPERTY_WORDS]
+    + [r'difference(?=s?\s+between\s+\w+\s+and\s+(\w+))']
+    + [r'compar(?=(?:e|ing|ison)\s+\w+\s+(?:and|with)\s+(\w+))']
+    + [r'v(?<=\sv)(?:s\.?|ersus)(?=\s+(\w+))']
+    + [re.escape(keyword) for keyword in ATTRIBUTE_KEYWORDS]
+))
+LINE_SCANNER = re.compile(r'(?=([^\S\n]*\w[.)]\s+))|(?=[^\S\n]*\w[^\n:]*:)(?=([^\n]*))')
+STRUCTURED_ITEM = re.compile(r'\w+[\w\s]*:')
+WORD_CHAR = re.compile(r'\w')
+
+
+def _scan_table_signals(text_lower: str) -> dict:
+    """
+    Walk the text once and collect everything detect_table_candidates needs.
+    """
+    signals = {
+        'categories': {word: [] for word in CATEGORY_WORDS},  # word -> [(match, topic)]
+        'comparisons': dict.fromkeys(COMPARISON_KINDS, 0),
+        'attributes': dict.fromkeys(ATTRIBUTE_KEYWORDS, 0),
+        'structured_lines': 0,
+        'numbered_items': 0,
+        'has_properties': False,
+    }
+    categories = signals['categories']
+    comparisons = signals['comparisons']
+    attributes = signals['attributes']
+    last_end = {}  # original pattern -> end of its last counted match
+
+    def take(key, start, end):
+        """findall() semantics: a match only counts if it starts after the previous one."""
+        if start < last_end.get(key, 0):
+            return False
+        last_end[key] = end
+        return True
+
+    def line_detectors(match):
+        if match.group(NUMBERED_GROUP) is not None:
+            if take('numbered', match.start(NUMBERED_GROUP), match.end(NUMBERED_GROUP)):
+                signals['numbered_items'] += 1
+        else:
+            line = match.group(STRUCTURED_GROUP)
+            if len(line) < 200 and STRUCTURED_ITEM.match(line.strip()):
+                signals['structured_lines'] += 1
+
+    first_line = LINE_SCANNER.match(text_lower)
+    if first_line:
+        line_detectors(first_line)
+
+    for match in TABLE_SCANNER.finditer(text_lower):
+        trigger = match.group()
+        start = match.start()
+
+        if trigger == '\n':
+            line_detectors(match)
+
+        elif trigger in attributes:
+            if take(trigger, start, match.end()):
+                attributes[trigger] += 1
+
+        elif trigger in categories:
+            end = match.end(match.lastindex)
+            if take(trigger, start, end):
+                categories[trigger].append((text_lower[start:end], match.group(match.lastindex)))
+
+        elif trigger in PROPERTY_WORDS:
+            signals['has_properties'] = True
+
+        elif trigger == 'difference' or trigger == 'compar':
+            kind = 'difference' if trigger == 'difference' else 'compare'
+            if take(kind, start, match.end(match.lastindex)):
+                comparisons[kind] += 1
+
+        else:
+            # "vs" / "versus": the old pattern was (\w+)\s+vs\s+(\w+), so
+            # find the end of the word before the whitespace and make sure
+            # it is not the last word of the previous comparison
+            kind = 'versus' if trigger == 'versus' else 'vs'
+            word_end = start
+            while word_end > 0 and text_lower[word_end - 1].isspace():
+                word_end -= 1
+            if word_end and WORD_CHAR.match(text_lower, word_end - 1) and word_end > last_end.get(kind, -1):
+                last_end[kind] = match.end(match.lastindex)
+                comparisons[kind] += 1
+
+    return signals
+
+
 def detect_table_candidates(raw_text: str) -> dict:
     """
     Analyzes raw OCR text to detect content that should be presented as tables.
@@ -21,94 +155,43 @@ def detect_table_candidates(raw_text: str) -> dict:
         'suggestion': ''
     }
     
-    # Convert to lowercase for analysis
-    text_lower = raw_text.lower()
+    signals = _scan_table_signals(raw_text.lower())
+    topics = {}    # dicts keep first-seen order and give set-speed dedup
+    keywords = {}
     
     # ===== PATTERN 1: Explicit categorization keywords =====
-    # These almost always benefit from tables
-    strong_table_indicators = [
-        r'types of\s+\w+',
-        r'kinds of\s+\w+',
-        r'categories of\s+\w+',
-        r'classification of\s+\w+',
-        r'branches of\s+\w+',
-        r'divisions of\s+\w+',
-        r'classes of\s+\w+',
-        r'forms of\s+\w+',
-        r'stages of\s+\w+',
-        r'phases of\s+\w+',
-        r'levels of\s+\w+',
-    ]
-    
-    for pattern in strong_table_indicators:
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            table_hints['has_tables'] = True
-            for match in matches:
-                # Extract the topic (e.g., "types of rocks" -> "rocks")
-                topic = match.split('of')[-1].strip()
-                if topic not in table_hints['table_topics']:
-                    table_hints['table_topics'].append(match)
-                    table_hints['table_keywords'].append(topic)
+    # "types of rocks" -> topic "types of rocks", keyword "rocks"
+    for word in CATEGORY_WORDS:
+        for match, topic in signals['categories'][word]:
+            topics[match] = True
+            keywords[topic] = True
     
     # ===== PATTERN 2: Comparative structures =====
-    # "A vs B", "compared to", "differences between"
-    comparison_patterns = [
-        r'(\w+)\s+vs\.?\s+(\w+)',
-        r'(\w+)\s+versus\s+(\w+)',
-        r'difference[s]?\s+between\s+(\w+)\s+and\s+(\w+)',
-        r'compar(e|ing|ison)\s+(\w+)\s+(and|with)\s+(\w+)',
-    ]
-    
-    for pattern in comparison_patterns:
-        matches = re.findall(pattern, text_lower)
-        if matches and len(matches) >= 2:  # Need at least 2 comparisons
-            table_hints['has_tables'] = True
-            table_hints['table_topics'].append('comparison table')
+    # "A vs B", "compared to", "differences between" - need at least 2
+    if any(count >= 2 for count in signals['comparisons'].values()):
+        topics['comparison table'] = True
     
     # ===== PATTERN 3: Structured lists with attributes =====
-    # Example: "Bacteria: causes disease, found in...\nVirus: causes..."
-    # Look for repeated colon patterns with similar structure
-    colon_lines = [line for line in raw_text.split('\n') if ':' in line and len(line) < 200]
-    if len(colon_lines) >= 3:  # At least 3 similar structured lines
-        # Check if they follow similar pattern (Item: description)
-        structured_count = sum(1 for line in colon_lines if re.match(r'^\w+[\w\s]*:', line.strip()))
-        if structured_count >= 3:
-            table_hints['has_tables'] = True
-            table_hints['table_topics'].append('structured list')
+    # "Bacteria: causes disease...\nVirus: causes..." - 3+ short "Item:" lines
+    if signals['structured_lines'] >= 3:
+        topics['structured list'] = True
     
     # ===== PATTERN 4: Enumerated properties =====
-    # "Properties of X: 1. ... 2. ... 3. ..."
-    # "Characteristics of X: a) ... b) ... c) ..."
-    if re.search(r'(properties|characteristics|features|attributes)\s+of\s+\w+', text_lower):
-        # Count numbered/lettered items
-        numbered_items = len(re.findall(r'^\s*[\d\w][\.)]\s+', raw_text, re.MULTILINE))
-        if numbered_items >= 4:  # 4+ enumerated items
-            table_hints['has_tables'] = True
-            table_hints['table_topics'].append('properties table')
+    # "Properties of X: 1. ... 2. ... 3. ..." - 4+ enumerated items
+    if signals['has_properties'] and signals['numbered_items'] >= 4:
+        topics['properties table'] = True
     
     # ===== PATTERN 5: Matrix-like content =====
-    # Multiple entities with multiple shared attributes
-    # Example: "Disease X: caused by... transmitted by... treated with..."
-    #          "Disease Y: caused by... transmitted by... treated with..."
-    
-    # Look for repeated attribute keywords across multiple subjects
-    attribute_keywords = ['caused by', 'transmitted', 'treated', 'prevented', 'symptoms', 
-                         'example', 'definition', 'formula', 'purpose', 'function']
-    
-    attribute_counts = {}
-    for keyword in attribute_keywords:
-        count = len(re.findall(keyword, text_lower))
-        if count >= 3:  # Same attribute mentioned 3+ times
-            attribute_counts[keyword] = count
-    
-    if len(attribute_counts) >= 2:  # 2+ attributes repeated across items
-        table_hints['has_tables'] = True
-        table_hints['table_topics'].append('attribute matrix')
+    # 2+ attribute keywords ("caused by", "symptoms", ...) each repeated 3+ times
+    if sum(1 for count in signals['attributes'].values() if count >= 3) >= 2:
+        topics['attribute matrix'] = True
     
     # ===== BUILD SUGGESTION FOR AI =====
-    if table_hints['has_tables']:
-        unique_topics = list(set(table_hints['table_topics']))
+    if topics:
+        unique_topics = list(topics)
+        table_hints['has_tables'] = True
+        table_hints['table_topics'] = unique_topics
+        table_hints['table_keywords'] = list(keywords)
         
         if len(unique_topics) == 1:
             table_hints['suggestion'] = f"This content contains {unique_topics[0]}. Present it as a table with NO Explanation or Example fields."
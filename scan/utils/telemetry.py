@@ -0,0 +1,186 @@
+# ============================================================================
+# FILE: scan/utils/telemetry.py - PROVIDER CALL TELEMETRY
+# ============================================================================
+
+"""
+AIRefine.processing_time hides retries, 429 waits and token counts. Every
+provider call in ai.py runs inside record_provider_call(), which writes one
+ProviderCallLog row; provider_latency_stats() turns the rows into
+p50/p95/p99 per provider/model/difficulty for the metrics dashboard.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import DatabaseError
+from django.utils import timezone
+
+from ..models import ProviderCallLog
+
+
+PERCENTILES = (50, 95, 99)
+GROUP_BY = ('provider', 'model', 'difficulty_level', 'kind')
+
+
+# ==================================================
+# RECORDING
+# ==================================================
+
+class ProviderCall:
+    """Counters for one provider call, filled in by the refiners."""
+
+    def __init__(self, provider, model, difficulty_level='', kind='refine'):
+        self.provider = provider
+        self.model = model
+        self.difficulty_level = difficulty_level
+        self.kind = kind
+        self.started_at = time.time()
+        self.backoff_seconds = 0.0
+        self.attempts = 0
+        self.status_code = None
+        self.input_tokens = None
+        self.output_tokens = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    @contextmanager
+    def waiting(self):
+        """Time spent in here counts as backoff (rate-limit slot or 429 block)."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.backoff_seconds += time.time() - start
+
+    def sent(self, request_bytes):
+        self.attempts += 1
+        self.request_bytes += request_bytes
+
+    def received(self, response, response_bytes=None):
+        """Status of the latest response; body size unless the caller counts it (streams)."""
+        self.status_code = response.status_code
+        if response_bytes is None:
+            response_bytes = len(response.content or b'')
+        self.response_bytes += response_bytes
+
+    def usage(self, input_tokens, output_tokens):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+    def save(self, error=None):
+        try:
+            ProviderCallLog.objects.create(
+                provider=self.provider,
+                model=self.model,
+                kind=self.kind,
+                difficulty_level=self.difficulty_level or '',
+                success=error is None,
+                error_message=str(error or '')[:1000],
+                duration_seconds=time.time() - self.started_at,
+                backoff_seconds=self.backoff_seconds,
+                attempts=self.attempts,
+                status_code=self.status_code,
+                input_tokens=self.input_tokens,
+                output_tokens=self.output_tokens,
+                request_bytes=self.request_bytes,
+                response_bytes=self.response_bytes,
+            )
+        except DatabaseError as e:
+            # Telemetry must never fail a refine
+            print(f"⚠️ Could not record {self.provider} call: {e}")
+
+
+@contextmanager
+def record_provider_call(provider, model, difficulty_level='', kind='refine'):
+    """
+    Yields a ProviderCall and saves it when the block exits. Any exception
+    leaving the block marks the call failed (and is re-raised).
+    """
+    call = ProviderCall(provider, model, difficulty_level, kind)
+    try:
+        yield call
+    except BaseException as e:
+        call.save(error=str(e) or type(e).__name__)
+        raise
+    call.save()
+
+
+# ==================================================
+# AGGREGATION
+# ==================================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list (None when empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def _round(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+def _summarize(rows):
+    """Call counts, latency percentiles, backoff and token averages of one group."""
+    ok = [row for row in rows if row['success']]
+    durations = sorted(row['duration_seconds'] for row in ok)
+    throughput = [
+        row['output_tokens'] / row['duration_seconds']
+        for row in ok if row['output_tokens'] and row['duration_seconds']
+    ]
+
+    summary = {
+        'calls': len(rows),
+        'failures': len(rows) - len(ok),
+        'error_rate': round((len(rows) - len(ok)) / len(rows), 3),
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}_seconds'] = _round(percentile(durations, pct))
+    summary.update({
+        'avg_backoff_seconds': _round(_mean([row['backoff_seconds'] for row in rows])),
+        'avg_attempts': _round(_mean([row['attempts'] for row in rows])),
+        'avg_input_tokens': _round(_mean([row['input_tokens'] for row in ok]), 0),
+        'avg_output_tokens': _round(_mean([row['output_tokens'] for row in ok]), 0),
+        'output_tokens_per_second': _round(_mean(throughput), 1),
+    })
+    return summary
+
+
+def provider_latency_stats(days=7, provider=None, group_by=GROUP_BY):
+    """
+    Aggregate calls of the last `days` days per `group_by` fields
+    (default provider, model, difficulty_level, kind).
+
+    Latency percentiles cover successful calls only - a fast failure is not
+    a fast provider. Rows are sorted fastest p50 first.
+
+    Returns:
+        list: dicts with the group_by fields plus calls, failures,
+              error_rate, p50/p95/p99 seconds, backoff and token averages,
+              output tokens per second
+    """
+    since = timezone.now() - timedelta(days=days)
+    calls = ProviderCallLog.objects.filter(created_at__gte=since, is_deleted=False)
+    if provider:
+        calls = calls.filter(provider=provider)
+
+    groups = {}
+    for call in calls.values(
+        *group_by, 'success', 'duration_seconds', 'backoff_seconds', 'attempts', 'input_tokens', 'output_tokens',
+    ):
+        groups.setdefault(tuple(call[field] for field in group_by), []).append(call)
+
+    stats = [
+        {**dict(zip(group_by, key)), **_summarize(rows)}
+        for key, rows in groups.items()
+    ]
+    stats.sort(key=lambda s: (s['p50_seconds'] is None, s['p50_seconds'] or 0))
+    return stats
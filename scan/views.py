@@ -12,6 +12,9 @@ from .views_functions import (
     # Scanning
     scan_new,
     upload_and_extract,
+    scan_batch_status,
+    scan_batch_save_form,
+    rescan_scan_page,
     save_topic,
     
     # Library
@@ -38,6 +41,8 @@ from .views_functions import (
     api_departments,
     api_course_topics,
     api_topic_detail,
+    api_topic_cards,
+    api_topic_card,
     api_department_courses,
     ocr_status,
 )
@@ -5,7 +5,7 @@ Each module handles a specific functionality area.
 """
 
 from .home_views import home
-from .scan_views import scan_new, upload_and_extract, save_topic
+from .scan_views import scan_new, upload_and_extract, scan_batch_status, scan_batch_save_form, rescan_scan_page, save_topic
 from .library_views import library, course_detail, course_full_summary, topic_detail
 from .topic_management_views import edit_refined_summary, delete_topic, manage_topic_assignments, manage_premium_topics
 from .course_management_views import create_course, delete_course
@@ -14,6 +14,8 @@ from .api_views import (
     api_departments,
     api_course_topics,
     api_topic_detail,
+    api_topic_cards,
+    api_topic_card,
     api_department_courses,
     ocr_status
 )
@@ -25,6 +27,9 @@ __all__ = [
     # Scanning
     'scan_new',
     'upload_and_extract',
+    'scan_batch_status',
+    'scan_batch_save_form',
+    'rescan_scan_page',
     'save_topic',
     
     # Library
@@ -51,6 +56,8 @@ __all__ = [
     'api_departments',
     'api_course_topics',
     'api_topic_detail',
+    'api_topic_cards',
+    'api_topic_card',
     'api_department_courses',
     'ocr_status',
 ]
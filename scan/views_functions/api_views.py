@@ -6,8 +6,8 @@ from django.shortcuts import get_object_or_404
 from django.http import JsonResponse
 from django.utils import timezone
 
-from ..models import Course, Topic, Department
-from ..utils.ocr import test_ocr_connection
+from ..models import Course, Topic, Department, QACard
+from ..utils.health import get_health
 from premium_users.views import filter_topics_for_user, check_topic_access
 
 
@@ -64,6 +64,62 @@ def api_topic_detail(request, topic_id):
     return JsonResponse(data)
 
 
+def _accessible_topic(request, topic_id):
+    """(topic, None) or (None, 403 response) using the same rules as api_topic_detail."""
+    topic = get_object_or_404(Topic, id=topic_id, is_deleted=False)
+    user_id = request.GET.get('user_id') or request.headers.get('X-User-ID')
+    if not check_topic_access(topic, user_id):
+        return None, JsonResponse({
+            'error': 'Access denied. This is a premium topic.',
+            'is_premium': True,
+            'requires_login': True
+        }, status=403)
+    return topic, None
+
+
+def api_topic_cards(request, topic_id):
+    """
+    Page through a topic's Q&A cards instead of downloading the whole summary.
+    Query params: page (1-based), page_size (max 100, default 20)
+    """
+    topic, denied = _accessible_topic(request, topic_id)
+    if denied:
+        return denied
+
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+        page_size = min(100, max(1, int(request.GET.get('page_size', 20))))
+    except ValueError:
+        return JsonResponse({'error': 'page and page_size must be integers'}, status=400)
+
+    cards = QACard.objects.filter(topic=topic, ai_refine__isnull=True)
+    total = cards.count()
+    offset = (page - 1) * page_size
+
+    return JsonResponse({
+        'topic_id': topic.id,
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'num_pages': (total + page_size - 1) // page_size,
+        'updated_at': int(topic.updated_at.timestamp()),
+        'cards': [card.to_dict() for card in cards[offset:offset + page_size]],
+    })
+
+
+def api_topic_card(request, topic_id, ordinal):
+    """Get a single Q&A card by its 1-based position"""
+    topic, denied = _accessible_topic(request, topic_id)
+    if denied:
+        return denied
+
+    card = get_object_or_404(QACard, topic=topic, ai_refine__isnull=True, ordinal=ordinal)
+    data = card.to_dict()
+    data['topic_id'] = topic.id
+    data['total'] = QACard.objects.filter(topic=topic, ai_refine__isnull=True).count()
+    return JsonResponse(data)
+
+
 def api_department_courses(request, dept_id):
     """Get all courses in a department (with topic counts filtered by user access)"""
     department = get_object_or_404(Department, id=dept_id)
@@ -84,9 +140,13 @@ def api_department_courses(request, dept_id):
 
 
 def ocr_status(request):
-    """Check OCR service health status"""
-    is_healthy, message = test_ocr_connection()
-    return JsonResponse({'healthy': is_healthy, 'message': message})
+    """
+    Cached OCR engine health (see utils/health.py) - no tunnel ping per hit.
+    Staff can force a fresh probe with ?refresh=1.
+    """
+    refresh = request.GET.get('refresh') in ['1', 'true'] and request.user.is_staff
+    health = get_health('ocr', refresh=refresh)
+    return JsonResponse({'healthy': health['ok'], **health})
 
 
 from django.contrib.auth.decorators import login_required
@@ -6,12 +6,17 @@ Scanning views - Handle OCR scanning and topic creation from images
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 from django.contrib import messages
-import os
-from django.conf import settings
 
-from ..models import Course, Topic, Department
-from ..utils.ocr import extract_text_from_image, extract_text_from_images_batch
+from django.urls import reverse
+
+from ..models import Course, Topic, Department, ScanBatch, ScanPage
+from ..utils.ocr_jobs import (
+    start_scan_batch, start_page_rescan, run_unclaimed_in_process, expire_stale_scan_batch, assemble_batch_text,
+    serialize_scan_batch,
+    flag_course_duplicates, delete_page_images,
+)
 
 
 def scan_new(request):
@@ -21,68 +26,111 @@ def scan_new(request):
 
 @csrf_exempt
 def upload_and_extract(request):
-    """Upload images and extract text via OCR (WITH BATCH PROCESSING)"""
+    """
+    Upload images and queue them for OCR (run_ocr_worker, or this process
+    if no worker takes them - see run_unclaimed_in_process).
+    Returns the batch id at once; poll scan_batch_status for page-by-page
+    progress, then load scan_batch_save_form.
+    """
     if request.method == 'POST' and request.FILES.getlist('images'):
         try:
             image_files = request.FILES.getlist('images')
-            temp_paths = []
-            temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp')
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            for idx, img in enumerate(image_files, 1):
-                img_path = os.path.join(temp_dir, f'temp_{idx}_{img.name}')
-                with open(img_path, 'wb+') as f:
-                    for chunk in img.chunks():
-                        f.write(chunk)
-                temp_paths.append(img_path)
-            
-            if len(temp_paths) > 1:
-                batch_results = extract_text_from_images_batch(temp_paths)
-                all_text = ""
-                for result in batch_results:
-                    page_num = result['page']
-                    text = result['text']
-                    all_text += f"--- Page {page_num} ---\n{text}\n\n"
-            else:
-                text = extract_text_from_image(temp_paths[0])
-                all_text = f"--- Page 1 ---\n{text}\n\n"
-            
-            for img_path in temp_paths:
-                try:
-                    if os.path.exists(img_path):
-                        os.remove(img_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete {img_path}: {e}")
-            
-            try:
-                if os.path.exists(temp_dir) and not os.listdir(temp_dir):
-                    os.rmdir(temp_dir)
-            except:
-                pass
-            
-            request.session['extracted_text'] = all_text
-            request.session['temp_image_count'] = len(image_files)
+            batch = start_scan_batch(image_files)
+            run_unclaimed_in_process(batch.id)
+            request.session['scan_batch_id'] = batch.id
             
-            courses = Course.objects.filter(is_deleted=False)
-            
-            return render(request, 'scan/partials/save_form.html', {
-                'extracted_text': all_text,
-                'courses': courses,
-                'page_count': len(image_files)
-            })
+            return JsonResponse({
+                'batch_id': batch.id,
+                'status': batch.status,
+                'page_count': batch.page_count,
+                'status_url': reverse('scan_batch_status', kwargs={'batch_id': batch.id}),
+                'save_form_url': reverse('scan_batch_save_form', kwargs={'batch_id': batch.id}),
+            }, status=202)
             
         except Exception as e:
-            return render(request, 'scan/partials/error.html', {
-                'error': str(e)
-            })
+            return JsonResponse({'error': str(e)}, status=500)
     
     return JsonResponse({'error': 'No images uploaded'}, status=400)
 
+
+def _session_scan_batch(request, batch_id):
+    """The batch if it was uploaded in this session (or the user is staff), else None."""
+    if request.session.get('scan_batch_id') != batch_id and not request.user.is_staff:
+        return None
+    batch = ScanBatch.objects.filter(id=batch_id, is_deleted=False).first()
+    return expire_stale_scan_batch(batch) if batch else None
+
+
+def scan_batch_status(request, batch_id):
+    """Progress of a scan batch, with the text of every finished page."""
+    batch = _session_scan_batch(request, batch_id)
+    if batch is None:
+        return JsonResponse({'error': 'Scan batch not found'}, status=404)
+    return JsonResponse(serialize_scan_batch(batch))
+
+
+def scan_batch_save_form(request, batch_id):
+    """Save form for a finished scan batch (what upload_and_extract used to render)."""
+    batch = _session_scan_batch(request, batch_id)
+    if batch is None:
+        return render(request, 'scan/partials/error.html', {'error': 'Scan batch not found'}, status=404)
+    if not batch.is_finished():
+        return render(request, 'scan/partials/error.html', {'error': 'OCR is still running'}, status=409)
+    
+    # save_topic assembles the same text from the pages - the session keeps only the batch id
+    all_text = assemble_batch_text(batch)
+    
+    courses = Course.objects.filter(is_deleted=False)
+    
+    return render(request, 'scan/partials/save_form.html', {
+        'batch': batch,
+        'extracted_text': all_text,
+        'courses': courses,
+        'page_count': batch.page_count,
+        'failed_pages': list(batch.pages.filter(status='failed').values_list('page_number', flat=True)),
+        'duplicate_pages': list(batch.pages.filter(status='duplicate').values_list('page_number', flat=True)),
+        'rescan_pages': list(batch.pages.filter(is_deleted=False).exclude(image='')),
+        'similar_pages': list(
+            batch.pages.exclude(duplicate_of=None).exclude(status='duplicate')
+            .values_list('page_number', 'duplicate_of__page_number')
+        ),
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def rescan_scan_page(request, batch_id, page_number):
+    """Re-OCR one page of a finished batch from its stored image (no re-upload)."""
+    batch = _session_scan_batch(request, batch_id)
+    if batch is None:
+        return JsonResponse({'error': 'Scan batch not found'}, status=404)
+    if not batch.is_finished():
+        return JsonResponse({'error': 'OCR is still running'}, status=409)
+    if batch.topic_id:
+        return JsonResponse({'error': 'This scan was already saved as a topic'}, status=409)
+    
+    page = get_object_or_404(ScanPage, batch=batch, page_number=page_number, is_deleted=False)
+    if not start_page_rescan(page):
+        return JsonResponse({'error': 'No stored image for this page - please upload it again'}, status=409)
+    run_unclaimed_in_process(batch.id)
+    
+    return JsonResponse({
+        'batch_id': batch.id,
+        'page': page.page_number,
+        'status': 'pending',
+        'status_url': reverse('scan_batch_status', kwargs={'batch_id': batch.id}),
+    }, status=202)
+
 @csrf_exempt
 def save_topic(request):
     """Save extracted text as a new topic."""
     if request.method == 'POST':
-        raw_text = request.session.get('extracted_text')
+        batch_id = request.session.get('scan_batch_id')
+        batch = ScanBatch.objects.filter(id=batch_id, is_deleted=False).first() if batch_id else None
+        if batch and (not batch.is_finished() or batch.pages.filter(status='pending').exists()):
+            # Pending pages would put placeholder text into the topic
+            return render(request, 'scan/partials/error.html', {'error': 'OCR is still running'}, status=409)
+        raw_text = assemble_batch_text(batch) if batch else ''
         if not raw_text:
             messages.error(request, "No extracted text found. Please scan again.")
             return redirect('scan_new')
@@ -146,8 +194,16 @@ def save_topic(request):
         
         print("=" * 80, file=sys.stderr)
 
-        request.session.pop('extracted_text', None)
-        request.session.pop('temp_image_count', None)
+        batch.topic = topic
+        batch.save(update_fields=['topic', 'updated_at'])
+        request.session.pop('scan_batch_id', None)
+        delete_page_images(batch.pages.all())  # the text is saved; a saved batch cannot be re-OCR'd
+
+        overlaps = flag_course_duplicates(batch)
+        if overlaps:
+            messages.warning(request, "Already scanned into this course: " + ", ".join(
+                f"page {page_number} → '{overlap.title}'" for page_number, overlap in sorted(overlaps.items())
+            ))
 
         # Try using the latest topic from DB instead
         latest_topic = Topic.objects.filter(course=course).latest('created_at')
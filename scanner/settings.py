@@ -165,6 +165,79 @@ COLAB_OCR_URL = os.environ.get(
     "COLAB_OCR_URL",
     "https://talon-bionomic-apogamously.ngrok-free.dev"
 )
+OCR_UPLOAD_RETRIES = int(os.environ.get("OCR_UPLOAD_RETRIES", "1"))  # re-sends after a dropped connection or 502/503/504
+OCR_SUB_BATCH_SIZE = int(os.environ.get("OCR_SUB_BATCH_SIZE", "4"))  # pages per /extract-text-batch call
+OCR_BATCH_CONCURRENCY = int(os.environ.get("OCR_BATCH_CONCURRENCY", "3"))  # sub-batches in flight at once
+OCR_PAGE_RETRIES = int(os.environ.get("OCR_PAGE_RETRIES", "2"))  # extra tries for a page that failed
+OCR_RETRY_BASE_DELAY = float(os.environ.get("OCR_RETRY_BASE_DELAY", "1.0"))  # seconds, doubled per page retry
+# Scan batches are OCR'd by `python manage.py run_ocr_worker` (or in the web process, see OCR_JOB_IN_PROCESS)
+OCR_JOB_WORKERS = int(os.environ.get("OCR_JOB_WORKERS", "2"))  # scan batches OCR'd at once per worker
+OCR_JOB_TIMEOUT = int(os.environ.get("OCR_JOB_TIMEOUT", "600"))  # seconds before a stuck batch is re-queued (or an unclaimed one failed)
+OCR_JOB_MAX_ATTEMPTS = int(os.environ.get("OCR_JOB_MAX_ATTEMPTS", "3"))  # worker runs before a stuck batch is failed
+OCR_JOB_IN_PROCESS = os.environ.get("OCR_JOB_IN_PROCESS", "True") == "True"  # web process OCRs batches no worker claimed
+OCR_JOB_IN_PROCESS_AFTER = float(os.environ.get("OCR_JOB_IN_PROCESS_AFTER", "5"))  # seconds a worker gets to claim a batch first
+SCAN_IMAGE_RETENTION_DAYS = int(os.environ.get("SCAN_IMAGE_RETENTION_DAYS", "3"))  # page photos of unsaved batches, see purge_scan_images
+SCAN_SKIP_DUPLICATE_PAGES = os.environ.get("SCAN_SKIP_DUPLICATE_PAGES", "True") == "True"  # skip, not just flag, near-exact repeats within one upload
+SCAN_DUPLICATE_HASH_SIZE = int(os.environ.get("SCAN_DUPLICATE_HASH_SIZE", "16"))  # ink hash of size*size bits (at most 16)
+SCAN_DUPLICATE_MAX_DISTANCE = int(os.environ.get("SCAN_DUPLICATE_MAX_DISTANCE", "24"))  # differing bits still flagged as the same page
+SCAN_SKIP_DUPLICATE_MAX_DISTANCE = int(os.environ.get("SCAN_SKIP_DUPLICATE_MAX_DISTANCE", "12"))  # differing bits still skipped (see calibrate_page_hash)
+
+# Local Tesseract when the OCR engine is down or cannot read a page (needs the tesseract binary)
+OCR_LOCAL_FALLBACK = os.environ.get("OCR_LOCAL_FALLBACK", "True") == "True"
+OCR_LOCAL_WORKERS = int(os.environ.get("OCR_LOCAL_WORKERS", "0"))  # 0 = one process per CPU core
+OCR_LOCAL_LANG = os.environ.get("OCR_LOCAL_LANG", "eng")
+
+# Page photos are shrunk before upload: EXIF rotation, grayscale, downscale, re-encode
+OCR_PREPROCESS = os.environ.get("OCR_PREPROCESS", "True") == "True"
+OCR_TARGET_DPI = int(os.environ.get("OCR_TARGET_DPI", "300"))  # assuming an A4/Letter page
+OCR_UPLOAD_FORMAT = os.environ.get("OCR_UPLOAD_FORMAT", "JPEG")  # JPEG or WEBP
+OCR_UPLOAD_QUALITY = int(os.environ.get("OCR_UPLOAD_QUALITY", "85"))
+OCR_PREPROCESS_WORKERS = int(os.environ.get("OCR_PREPROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# =========================
+# Outbound HTTP (Gemini / Groq / OCR)
+# =========================
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "4"))   # hosts kept per session
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))          # keep-alive sockets per host
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))   # seconds; read timeouts are per call
+
+# =========================
+# Caches
+# =========================
+CACHE_DIR = Path(os.environ.get("CACHE_DIR", BASE_DIR / "cache"))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Content-addressed AI refine results (see scan/utils/ai_cache.py)
+    'ai_refine': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR / 'ai_refine',
+        'TIMEOUT': int(os.environ.get("AI_REFINE_CACHE_TTL", str(7 * 24 * 3600))),  # age eviction
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("AI_REFINE_CACHE_MAX_ENTRIES", "1000")),  # size eviction
+        },
+    },
+    # Per-page OCR results keyed by image hash (see scan/utils/ocr_cache.py)
+    'ocr': {
+        'BACKEND': 'scan.utils.ocr_cache.LRUFileBasedCache',
+        'LOCATION': CACHE_DIR / 'ocr',
+        'TIMEOUT': int(os.environ.get("OCR_CACHE_TTL", str(30 * 24 * 3600))),  # age eviction
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("OCR_CACHE_MAX_ENTRIES", "5000")),  # least recently used evicted first
+        },
+    },
+    # Small provider metadata shared across workers (Groq model catalog, ...)
+    'providers': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR / 'providers',
+        'TIMEOUT': None,
+    },
+}
+
+GROQ_MODEL_CATALOG_TTL = int(os.environ.get("GROQ_MODEL_CATALOG_TTL", str(6 * 3600)))  # seconds before background refresh
+HEALTH_PROBE_INTERVAL = int(os.environ.get("HEALTH_PROBE_INTERVAL", "60"))  # seconds before OCR/AI health is re-probed
 
 # =========================
 # Security Headers
@@ -210,3 +283,29 @@ LOGIN_URL = '/backend/login/'  # Changed from 'core:admin_login'
 LOGIN_REDIRECT_URL = '/backend/account/'
 LOGOUT_REDIRECT_URL = '/backend/login/'
 AUTH_USER_MODEL = 'core.AdminUser'
+
+# =========================
+# AI Refine Job Queue
+# =========================
+# Jobs are processed by `python manage.py run_refine_worker`
+AI_REFINE_WORKER_CONCURRENCY = int(os.environ.get("AI_REFINE_WORKER_CONCURRENCY", "2"))
+AI_REFINE_JOB_TIMEOUT = int(os.environ.get("AI_REFINE_JOB_TIMEOUT", "900"))  # seconds before a stuck job is re-queued
+AI_REFINE_SYNC_DEADLINE = int(os.environ.get("AI_REFINE_SYNC_DEADLINE", "150"))  # max wait for mode=sync requests
+
+# Provider rate limits, shared by all workers (see scan/utils/rate_limit.py)
+AI_RATE_LIMITS = {
+    'gemini': {
+        'rpm': int(os.environ.get("GEMINI_RPM", "10")),        # requests per minute
+        'tpm': int(os.environ.get("GEMINI_TPM", "250000")),    # tokens per minute
+    },
+    'groq': {
+        'rpm': int(os.environ.get("GROQ_RPM", "30")),
+        'tpm': int(os.environ.get("GROQ_TPM", "12000")),
+    },
+}
+AI_RATE_LIMIT_MAX_WAIT = int(os.environ.get("AI_RATE_LIMIT_MAX_WAIT", "300"))  # default caller deadline (seconds)
+
+# Multi-page topics are refined page by page (see scan/utils/chunking.py)
+AI_CHUNK_MAX_TOKENS = int(os.environ.get("AI_CHUNK_MAX_TOKENS", "3000"))  # raw-text budget per provider call
+AI_CHUNK_CONCURRENCY = int(os.environ.get("AI_CHUNK_CONCURRENCY", "3"))   # chunk calls in flight per refine
+AI_SECTION_CONTEXT_CHARS = int(os.environ.get("AI_SECTION_CONTEXT_CHARS", "400"))  # neighbour-page text sent as context around a chunk